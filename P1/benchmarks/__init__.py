@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the Fruit Ninja game
+
+Run from the P1 directory, e.g. ``python -m benchmarks.sprite_atlas``
+"""
@@ -0,0 +1,90 @@
+"""
+Benchmark FruitImageLoader startup: eager decode + atlas build vs the sprite bundle cache
+
+Columns:
+    eager   decode every PNG and render the whole atlas in the constructor
+            (the previous startup path)
+    cold    first run with an empty cache: startup only, fruit types are
+            rendered on first use
+    warm    later runs: the cached bundle is memory mapped, nothing is decoded
+
+Each startup also fetches one sprite per fruit type and size so the
+timings include the work needed before the first frame is drawn.
+
+Usage:
+    python -m benchmarks.asset_startup --types 5 20 50 --sizes 3 6
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.image_loader import FruitImageLoader
+
+
+def make_assets(directory: Path, count: int, size: int = 200):
+    """Write `count` synthetic fruit PNGs"""
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        img = np.zeros((size, size, 4), dtype=np.uint8)
+        color = tuple(int(c) for c in rng.integers(0, 256, 3)) + (255,)
+        cv2.circle(img, (size // 2, size // 2), size // 2 - 5, color, -1)
+        cv2.imwrite(str(directory / f"fruit{i}.png"), img)
+
+
+def startup(assets: Path, cache: Path, types, sizes, eager: bool) -> float:
+    """Milliseconds from constructing the loader to having touched every sprite"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if eager:
+            loader = FruitImageLoader(str(assets), sprite_sizes=sizes, atlas_budget_mb=None,
+                                      cache_dir=None, fruit_types=types)
+            for fruit_type in types:
+                loader.get_image(fruit_type)
+            loader.build_sprite_atlas(4096, lazy=False)
+        else:
+            loader = FruitImageLoader(str(assets), sprite_sizes=sizes, atlas_budget_mb=4096,
+                                      cache_dir=str(cache), fruit_types=types)
+        for fruit_type in types:
+            for size in sizes:
+                loader.get_sprite(fruit_type, size, 0.0)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--types', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 6],
+                        help="Number of sprite sizes (starting at 80 px, 20 px apart)")
+    parser.add_argument('--rotation-steps', type=int, default=64)
+    args = parser.parse_args()
+    
+    print(f"\n{'types':>6} {'sizes':>6} {'eager ms':>10} {'cold ms':>10} {'warm ms':>10} {'speedup':>9}")
+    for count in args.types:
+        for num_sizes in args.sizes:
+            root = Path(tempfile.mkdtemp())
+            try:
+                assets, cache = root / "fruits", root / "cache"
+                assets.mkdir()
+                make_assets(assets, count)
+                types = [f"fruit{i}" for i in range(count)]
+                sizes = [80 + 20 * i for i in range(num_sizes)]
+                
+                eager = startup(assets, cache, types, sizes, eager=True)
+                cold = startup(assets, cache, types, sizes, eager=False)
+                warm = startup(assets, cache, types, sizes, eager=False)
+                print(f"{count:>6} {num_sizes:>6} {eager:>10.1f} {cold:>10.1f} {warm:>10.1f} "
+                      f"{eager / warm:>8.1f}x")
+            finally:
+                shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
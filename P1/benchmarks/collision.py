@@ -0,0 +1,72 @@
+"""
+Benchmark batched slice collision against the scalar per-fruit loop
+
+Usage:
+    python -m benchmarks.collision --fruits 1000 --segments 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.collision import segment_circle_intersect, slice_hits
+
+
+def scalar_hits(segments: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """Previous check_slice: Python loop over fruits and segments"""
+    hits = np.zeros(len(centers), dtype=bool)
+    for i, (center, radius) in enumerate(zip(centers, radii)):
+        for start, end in segments:
+            if segment_circle_intersect(start, end, center, radius):
+                hits[i] = True
+                break
+    return hits
+
+
+def time_it(fn, iterations: int) -> float:
+    """Mean milliseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fruits', type=int, default=1000)
+    parser.add_argument('--segments', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    centers = rng.uniform((0, 0), (args.width, args.height), (args.fruits, 2))
+    prev_centers = centers - rng.uniform((0, 3), (0, 7), (args.fruits, 2))
+    radii = rng.uniform(40, 60, args.fruits)
+    
+    # A swipe: a chain of short segments, like a fingertip trail
+    points = np.cumsum(rng.normal(0, 25, (args.segments + 1, 2)), axis=0) + (args.width / 2,
+                                                                             args.height / 2)
+    segments = np.stack([points[:-1], points[1:]], axis=1)
+    
+    results = [
+        ('scalar loop', lambda: scalar_hits(segments, centers, radii)),
+        ('batched, no grid', lambda: slice_hits(segments, centers, radii, cell_size=0)),
+        ('batched + grid', lambda: slice_hits(segments, centers, radii)),
+        ('batched + grid, swept', lambda: slice_hits(segments, centers, radii,
+                                                     prev_centers=prev_centers)),
+    ]
+    
+    print(f"\n{args.fruits} fruits x {args.segments} segments")
+    baseline = None
+    for name, fn in results:
+        ms = time_it(fn, args.iterations)
+        baseline = baseline or ms
+        print(f"  {name:<24} {ms:>9.3f} ms  {baseline / ms:>7.1f}x  hits={int(fn().sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Microbenchmark integer alpha compositing against the float blending path
+
+Usage:
+    python -m benchmarks.compositing --sprites 20 --iterations 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.compositing import AlphaCompositor
+from utils.image_loader import FruitImageLoader
+
+RESOLUTIONS = [(640, 480), (1280, 720)]
+
+
+def float_blit(frame: np.ndarray, sprite: np.ndarray, x: int, y: int):
+    """Previous Fruit.draw blend: float64 temporaries, straight alpha"""
+    clipped = AlphaCompositor.clip(frame.shape, sprite.shape, x, y)
+    if clipped is None:
+        return
+    dst_rows, dst_cols, src_rows, src_cols = clipped
+    src_region = sprite[src_rows, src_cols]
+    alpha = src_region[:, :, 3:4] / 255.0
+    rgb = src_region[:, :, :3]
+    frame_region = frame[dst_rows, dst_cols]
+    frame[dst_rows, dst_cols] = (rgb * alpha + frame_region * (1 - alpha)).astype(np.uint8)
+
+
+def make_scene(count: int, width: int, height: int, seed: int = 0):
+    """Random straight-alpha and premultiplied sprites with center positions"""
+    rng = np.random.default_rng(seed)
+    loader = FruitImageLoader(atlas_budget_mb=None)
+    straight, premultiplied = [], []
+    for i in range(count):
+        fruit_type = loader.fruit_types[i % len(loader.fruit_types)]
+        size = int(rng.integers(80, 121))
+        img = loader.rotate_image(loader.resize_image(loader.to_bgra(loader.get_image(fruit_type)), size),
+                                  float(rng.uniform(0, 360)))
+        straight.append(img)
+        premultiplied.append(loader.premultiply(img))
+    positions = np.column_stack([rng.uniform(0, width, count), rng.uniform(0, height, count)])
+    return straight, premultiplied, positions
+
+
+def time_it(fn, iterations: int) -> float:
+    """Mean microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sprites', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    
+    compositor = AlphaCompositor()
+    print(f"\n{'resolution':>12} {'float us':>12} {'blit us':>12} {'blit_many us':>14} {'speedup':>9}")
+    for width, height in RESOLUTIONS:
+        straight, premultiplied, positions = make_scene(args.sprites, width, height)
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+        
+        def float_path():
+            for img, (cx, cy) in zip(straight, positions):
+                h, w = img.shape[:2]
+                float_blit(frame, img, int(cx - w // 2), int(cy - h // 2))
+        
+        def blit_path():
+            for img, (cx, cy) in zip(premultiplied, positions):
+                compositor.blit_centered(frame, img, cx, cy)
+        
+        def blit_many_path():
+            compositor.blit_many(frame, premultiplied, positions)
+        
+        before = time_it(float_path, args.iterations)
+        single = time_it(blit_path, args.iterations)
+        batched = time_it(blit_many_path, args.iterations)
+        print(f"{f'{width}x{height}':>12} {before:>12.1f} {single:>12.1f} {batched:>14.1f} "
+              f"{before / batched:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
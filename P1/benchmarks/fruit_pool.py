@@ -0,0 +1,93 @@
+"""
+Benchmark the structure-of-arrays FruitPool against a per-object fruit list
+
+Each frame advances every fruit by one --timestep, frees the fruits that
+fell off the screen and spawns replacements. The game steps at 1/120 s.
+
+Usage:
+    python -m benchmarks.fruit_pool --fruits 10 100 1000 --frames 500
+    python -m benchmarks.fruit_pool --fruits 10 50 200 --timestep 0.00833
+"""
+import argparse
+import random
+import time
+
+from utils.fruit_pool import FruitPool
+
+
+class ListFruit:
+    """Per-object fruit with the physics of the original Fruit class"""
+    
+    def __init__(self, x: float, y: float, speed: float, size: float, rotation_speed: float):
+        self.x = x
+        self.y = y
+        self.speed = speed
+        self.size = size
+        self.rotation = 0.0
+        self.rotation_speed = rotation_speed
+        self.sliced = False
+    
+    def update(self, dt: float):
+        if not self.sliced:
+            self.y += self.speed * dt
+            self.rotation += self.rotation_speed
+
+
+def run_list(count: int, frames: int, height: int, dt: float = 1 / 30, seed: int = 0) -> float:
+    """Frames per second updating a Python list of fruits"""
+    rng = random.Random(seed)
+    
+    def spawn():
+        return ListFruit(rng.uniform(50, 590), rng.uniform(-60, height), rng.uniform(100, 200),
+                         rng.randint(40, 60), rng.uniform(-5, 5))
+    
+    fruits = [spawn() for _ in range(count)]
+    start = time.perf_counter()
+    for _ in range(frames):
+        for fruit in fruits[:]:
+            fruit.update(dt)
+            if fruit.y > height + fruit.size:
+                fruits.remove(fruit)
+        while len(fruits) < count:
+            fruits.append(spawn())
+    return frames / (time.perf_counter() - start)
+
+
+def run_pool(count: int, frames: int, height: int, dt: float = 1 / 30, seed: int = 0) -> float:
+    """Frames per second updating a FruitPool"""
+    rng = random.Random(seed)
+    fruits = FruitPool(capacity=count)
+    
+    def spawn():
+        fruits.spawn(0, rng.uniform(50, 590), rng.uniform(-60, height), 0.0,
+                     rng.uniform(100, 200), rng.randint(40, 60),
+                     rotation=0.0, rotation_speed=rng.uniform(-150, 150), score_value=10)
+    
+    for _ in range(count):
+        spawn()
+    start = time.perf_counter()
+    for frame in range(frames):
+        fruits.step(dt)
+        fruits.reap(height, frame * dt)
+        while len(fruits) < count:
+            spawn()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fruits', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--timestep', type=float, default=1 / 30, help="Seconds per frame")
+    args = parser.parse_args()
+    
+    print(f"\n{'fruits':>8} {'list fps':>12} {'pool fps':>12} {'speedup':>9}")
+    for count in args.fruits:
+        before = run_list(count, args.frames, 480, args.timestep)
+        after = run_pool(count, args.frames, 480, args.timestep)
+        print(f"{count:>8} {before:>12.1f} {after:>12.1f} {after / before:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark LandmarkExtractor: per-call time and memory allocated per frame
+
+Compares the previous list-building path (fresh RGB conversion, Python list of
+63 floats, np.array, frame copy for drawing) with the preallocated buffers and
+in-place drawing.
+
+Usage:
+    python -m benchmarks.landmark_extraction --frames data/frames
+    python -m benchmarks.landmark_extraction --frames videos/session.mp4 --limit 200
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from utils.landmark_extractor import LandmarkExtractor
+from utils.video_processor import VideoProcessor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_frames(source: str, limit: int) -> List[np.ndarray]:
+    """Load recorded frames from an image directory or a video file"""
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        frames = [cv2.imread(str(p)) for p in files[:limit]]
+        return [f for f in frames if f is not None]
+    
+    cap = VideoProcessor.load_video(str(path))
+    if cap is None:
+        return []
+    frames = []
+    for _, frame in VideoProcessor.read_frames(cap):
+        frames.append(frame)
+        if len(frames) >= limit:
+            break
+    cap.release()
+    return frames
+
+
+def legacy_process_frame(extractor: LandmarkExtractor, frame: np.ndarray):
+    """Previous process_frame implementation"""
+    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    results = extractor.hands.process(image_rgb)
+    
+    landmarks = None
+    if results.multi_hand_landmarks:
+        hand_landmarks = results.multi_hand_landmarks[0]
+        landmarks = []
+        for landmark in hand_landmarks.landmark:
+            landmarks.extend([landmark.x, landmark.y, landmark.z])
+        landmarks = np.array(landmarks)
+    
+    annotated_frame = frame.copy()
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            extractor.mp_drawing.draw_landmarks(
+                annotated_frame, hand_landmarks, extractor.mp_hands.HAND_CONNECTIONS,
+                extractor.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
+                extractor.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2))
+    return landmarks, annotated_frame
+
+
+def measure(fn, frames: List[np.ndarray]):
+    """
+    Run fn over every frame
+    
+    Returns:
+        Tuple of (microseconds per call, KB allocated per call)
+    """
+    # Warm up so one-time buffer allocations are not counted
+    for frame in frames[:5]:
+        fn(frame)
+    
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    us_per_call = (time.perf_counter() - start) / len(frames) * 1e6
+    
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    tracemalloc.stop()
+    return us_per_call, allocated / len(frames) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', required=True, help="Directory of recorded frames or a video file")
+    parser.add_argument('--limit', type=int, default=300, help="Maximum number of frames to load")
+    args = parser.parse_args()
+    
+    frames = load_frames(args.frames, args.limit)
+    if not frames:
+        print(f"No frames found in {args.frames}")
+        return
+    print(f"Loaded {len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}")
+    
+    # Static image mode so every path does identical work on every frame
+    extractor = LandmarkExtractor(static_image_mode=True)
+    
+    print(f"\n{'path':<24} {'us/call':>12} {'KB alloc/frame':>16}")
+    rows = [
+        ('legacy (lists + copy)', False, lambda f: legacy_process_frame(extractor, f)),
+        ('buffers + copy draw', False, extractor.process_frame),
+        ('buffers + in-place draw', True, extractor.process_frame),
+    ]
+    for name, draw_in_place, fn in rows:
+        extractor.draw_in_place = draw_in_place
+        # In-place drawing only changes pixels; work on copies to keep inputs clean
+        us, kb = measure(fn, [f.copy() for f in frames])
+        print(f"{name:<24} {us:>12.1f} {kb:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark game server throughput against the number of stations
+
+Each station is fed from a recorded video (videos are reused round-robin
+when there are more stations than files) and runs capture plus MediaPipe in
+its own process; one game process updates every station's game.
+
+Usage:
+    python -m benchmarks.server_scaling videos/a.mp4 videos/b.mp4 --stations 1 2 4 8
+"""
+import argparse
+import os
+from itertools import cycle, islice
+
+from game_server import run_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('videos', nargs='+', help="Recorded videos feeding the stations")
+    parser.add_argument('--stations', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--max-frames', type=int, default=300, help="Frames per station")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+    
+    print(f"{os.cpu_count()} CPUs")
+    print(f"\n{'stations':>9} {'frames':>8} {'seconds':>9} {'total fps':>10} "
+          f"{'fps/station':>12} {'scaling':>8}")
+    base_fps = None
+    for count in args.stations:
+        sources = list(islice(cycle(args.videos), count))
+        stats = run_server(sources, width=args.width, height=args.height, headless=True,
+                           max_frames=args.max_frames, seed=0)
+        base_fps = base_fps or stats['fps']
+        print(f"{count:>9} {sum(stats['frames']):>8} {stats['seconds']:>9.2f} {stats['fps']:>10.1f} "
+              f"{stats['fps'] / count:>12.1f} {stats['fps'] / base_fps:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark fruit drawing with and without the pre-rendered sprite atlas
+
+Usage:
+    python -m benchmarks.sprite_atlas --fruits 10 20 50 --frames 300
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from utils.compositing import AlphaCompositor
+from utils.fruit_pool import FruitPool
+from utils.image_loader import FruitImageLoader
+
+
+def make_fruits(image_loader: FruitImageLoader, count: int, width: int, height: int,
+                seed: int = 0) -> FruitPool:
+    """Create fruits spread over the frame"""
+    rng = random.Random(seed)
+    fruits = FruitPool(capacity=count)
+    for _ in range(count):
+        fruits.spawn(rng.randrange(len(image_loader.fruit_types)),
+                     rng.randint(50, width - 50), rng.uniform(0, height),
+                     0.0, rng.uniform(100, 200), rng.randint(40, 60),
+                     rotation=rng.uniform(0, 360), rotation_speed=rng.uniform(-150, 150),
+                     score_value=10)
+    return fruits
+
+
+def run(image_loader: FruitImageLoader, count: int, frames: int,
+        width: int = 640, height: int = 480) -> float:
+    """
+    Draw `count` fruits for `frames` frames
+    
+    Returns:
+        Frames per second
+    """
+    fruits = make_fruits(image_loader, count, width, height)
+    compositor = AlphaCompositor()
+    background = np.full((height, width, 3), 40, dtype=np.uint8)
+    frame = background.copy()
+    
+    start = time.perf_counter()
+    for _ in range(frames):
+        np.copyto(frame, background)
+        fruits.step(1 / 30)
+        fruits.position[:, 1] %= height
+        
+        indices = fruits.active_indices()
+        sprites = [image_loader.render_sprite(image_loader.fruit_types[fruits.type_index[i]],
+                                              fruits.size[i] * 2, fruits.rotation[i])
+                   for i in indices]
+        compositor.blit_many(frame, sprites, fruits.position[indices])
+    elapsed = time.perf_counter() - start
+    return frames / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fruits', type=int, nargs='+', default=[1, 10, 20, 50])
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--rotation-steps', type=int, default=64)
+    parser.add_argument('--budget-mb', type=float, default=96.0)
+    args = parser.parse_args()
+    
+    warp_loader = FruitImageLoader(atlas_budget_mb=None)
+    atlas_loader = FruitImageLoader(rotation_steps=args.rotation_steps,
+                                    atlas_budget_mb=None, cache_dir=None)
+    atlas_loader.build_sprite_atlas(args.budget_mb, lazy=False)
+    
+    print(f"\n{'fruits':>8} {'warp fps':>12} {'atlas fps':>12} {'speedup':>9}")
+    for count in args.fruits:
+        before = run(warp_loader, count, args.frames)
+        after = run(atlas_loader, count, args.frames)
+        print(f"{count:>8} {before:>12.1f} {after:>12.1f} {after / before:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
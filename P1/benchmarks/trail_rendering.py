@@ -0,0 +1,102 @@
+"""
+Benchmark trail rendering: per-frame cv2.line loops vs the persistent trail layer
+
+The loop path is the previous FruitNinja.update code: every stored hand-path
+point and slice is redrawn each frame, with lists trimmed by pop(0). The
+layer path draws only the newest segment, fades the overlay in place and adds
+it to the frame.
+
+Usage:
+    python -m benchmarks.trail_rendering --points 20 200 1000
+"""
+import argparse
+import math
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from utils.trail_renderer import TrailRenderer
+
+
+def fingertip(frame: int, width: int, height: int):
+    """Synthetic fingertip path (a Lissajous curve)"""
+    t = frame / 30
+    return (int(width / 2 + width * 0.4 * math.sin(3 * t)),
+            int(height / 2 + height * 0.4 * math.sin(4 * t)))
+
+
+def run_loops(points: int, frames: int, width: int, height: int) -> float:
+    """Milliseconds per frame redrawing every trail segment"""
+    background = np.full((height, width, 3), 90, dtype=np.uint8)
+    frame = np.empty_like(background)
+    hand_path = []
+    slice_trail = []
+    start = 0.0
+    for i in range(points + frames):
+        if i == points:
+            # Trails are full from here on
+            start = time.perf_counter()
+        np.copyto(frame, background)
+        pos = fingertip(i, width, height)
+        if hand_path:
+            slice_trail.append((hand_path[-1], pos))
+            if len(slice_trail) > points:
+                slice_trail.pop(0)
+        hand_path.append(pos)
+        if len(hand_path) > points:
+            hand_path.pop(0)
+        
+        for j in range(len(hand_path) - 1):
+            alpha = j / len(hand_path)
+            cv2.line(frame, hand_path[j], hand_path[j + 1],
+                     (int(255 * alpha), 0, int(255 * (1 - alpha))), 2)
+        for j, (a, b) in enumerate(slice_trail):
+            alpha = (len(slice_trail) - j) / len(slice_trail)
+            brightness = int(255 * alpha)
+            cv2.line(frame, a, b, (brightness, brightness, brightness), max(2, int(4 * alpha)))
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def run_layer(points: int, frames: int, width: int, height: int) -> float:
+    """Milliseconds per frame with the persistent trail layer"""
+    background = np.full((height, width, 3), 90, dtype=np.uint8)
+    frame = np.empty_like(background)
+    trails = TrailRenderer()
+    trails.ensure(frame.shape)
+    hand_path = deque(maxlen=points)
+    start = 0.0
+    for i in range(points + frames):
+        if i == points:
+            start = time.perf_counter()
+        np.copyto(frame, background)
+        pos = fingertip(i, width, height)
+        if hand_path:
+            trails.add_segment(hand_path[-1], pos, (255, 0, 0), 2)
+            trails.add_segment(hand_path[-1], pos, (255, 255, 255), 8)
+        hand_path.append(pos)
+        trails.decay(1 / 30)
+        trails.composite(frame)
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, nargs='+', default=[20, 200, 1000],
+                        help="Trail lengths (hand-path points and stored slices)")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+    
+    print(f"\n{'points':>8} {'loops ms':>10} {'layer ms':>10} {'speedup':>9}")
+    for points in args.points:
+        before = run_loops(points, args.frames, args.width, args.height)
+        after = run_layer(points, args.frames, args.width, args.height)
+        print(f"{points:>8} {before:>10.3f} {after:>10.3f} {before / after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
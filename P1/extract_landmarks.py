@@ -0,0 +1,250 @@
+"""
+Offline batch hand landmark extraction
+Runs MediaPipe over recorded videos or image directories on a process pool and
+stores the landmark streams as columnar .npz files for replay and tuning.
+
+Usage:
+    python extract_landmarks.py videos/session1.mp4 videos/session2.mp4
+    python extract_landmarks.py data/frames --static --workers 8
+"""
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from utils.landmark_cache import FEATURES, LandmarkCache, LandmarkStream, content_hash, list_images
+
+# One extractor per worker process, created by the pool initializer
+_extractor = None
+
+
+def _init_worker(params: Dict):
+    """Create this worker's MediaPipe instance"""
+    global _extractor
+    from utils.landmark_extractor import LandmarkExtractor
+    _extractor = LandmarkExtractor(
+        static_image_mode=params['static_image_mode'],
+        max_num_hands=params['max_num_hands'],
+        min_detection_confidence=params['min_detection_confidence'],
+        min_tracking_confidence=params['min_tracking_confidence']
+    )
+
+
+def _iter_frames(source: str, start: int, stop: Optional[int]):
+    """Yield (frame_number, frame) for frames [start, stop) of a video or image directory"""
+    if os.path.isdir(source):
+        for number, path in enumerate(list_images(source)[start:stop], start):
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                yield number, frame
+        return
+    
+    cap = cv2.VideoCapture(source)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    number = start
+    try:
+        while stop is None or number < stop:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield number, frame
+            number += 1
+    finally:
+        cap.release()
+
+
+def _extract_range(source: str, start: int, stop: Optional[int],
+                   mirror: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Extract landmarks for a range of frames in a worker process
+    
+    Args:
+        source: Video path or image directory
+        start: First frame number
+        stop: End frame number (exclusive), None for the end of the source
+        mirror: Flip frames horizontally first, as the game does
+    
+    Returns:
+        Tuple of (frame_index, hand_index, landmarks, end frame number)
+    """
+    frame_index: List[int] = []
+    hand_index: List[int] = []
+    rows: List[np.ndarray] = []
+    end = start
+    for number, frame in _iter_frames(source, start, stop):
+        if mirror:
+            frame = cv2.flip(frame, 1)
+        for hand, landmarks in enumerate(_extractor.extract_all_hands_landmarks(frame)):
+            frame_index.append(number)
+            hand_index.append(hand)
+            rows.append(landmarks.copy())
+        end = number + 1
+    
+    landmarks = np.stack(rows) if rows else np.zeros((0, FEATURES), dtype=np.float32)
+    return (np.array(frame_index, dtype=np.int32), np.array(hand_index, dtype=np.int8),
+            landmarks, end)
+
+
+def source_info(source: str) -> Dict:
+    """Frame count, rate and size of a video or image directory"""
+    if os.path.isdir(source):
+        images = list_images(source)
+        first = cv2.imread(str(images[0])) if images else None
+        height, width = first.shape[:2] if first is not None else (0, 0)
+        return {'frame_count': len(images), 'fps': 30.0, 'width': width, 'height': height}
+    
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        return {}
+    info = {
+        'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS) or 30.0,
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    }
+    cap.release()
+    return info
+
+
+def plan_chunks(frame_count: int, static: bool, chunk_size: int) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split a source into frame ranges for the pool
+    
+    Tracking mode carries hand state from frame to frame, so the whole source
+    is one task. Static mode treats frames independently and splits them into
+    chunks; the last chunk reads to the end in case the reported count is short.
+    """
+    if not static or frame_count <= chunk_size:
+        return [(0, None)]
+    starts = list(range(0, frame_count, chunk_size))
+    return [(s, s + chunk_size) for s in starts[:-1]] + [(starts[-1], None)]
+
+
+def output_names(sources: List[str]) -> Dict[str, str]:
+    """
+    Stream file name for every input
+    
+    An input's stem is used when no other input shares it. Inputs whose stems
+    collide (a/clip.mp4 and b/clip.mp4, or clip.avi next to clip.mp4) get a
+    short hash of their resolved path appended, so they never overwrite each
+    other.
+    
+    Args:
+        sources: Input paths
+        
+    Returns:
+        Mapping of input path to .npz file name
+    """
+    resolved = {source: str(Path(source).resolve()) for source in sources}
+    stems: Dict[str, set] = {}
+    for source in sources:
+        stems.setdefault(Path(source).stem, set()).add(resolved[source])
+    names = {}
+    for source in sources:
+        stem = Path(source).stem
+        if len(stems[stem]) == 1:
+            names[source] = f"{stem}.npz"
+        else:
+            digest = hashlib.blake2b(resolved[source].encode(), digest_size=4).hexdigest()
+            names[source] = f"{stem}-{digest}.npz"
+    return names
+
+
+def main():
+    """Extract landmarks for every input, skipping inputs already in the cache"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="Video files or image directories")
+    parser.add_argument('--output-dir', default='data/landmarks',
+                        help="Where <input name>.npz streams are written; inputs sharing a name "
+                             "get a path hash appended (default: data/landmarks)")
+    parser.add_argument('--cache-dir', default='data/landmark_cache',
+                        help="Content-hash cache directory (default: data/landmark_cache)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes, one MediaPipe instance each")
+    parser.add_argument('--static', action='store_true',
+                        help="Static image mode: frames are independent and split across workers")
+    parser.add_argument('--chunk-size', type=int, default=256,
+                        help="Static mode: frames per task")
+    parser.add_argument('--max-hands', type=int, default=2)
+    parser.add_argument('--min-detection-confidence', type=float, default=0.5)
+    parser.add_argument('--min-tracking-confidence', type=float, default=0.5)
+    parser.add_argument('--no-mirror', action='store_true',
+                        help="Do not flip frames horizontally (the game mirrors the camera)")
+    parser.add_argument('--force', action='store_true', help="Ignore cached results")
+    args = parser.parse_args()
+    
+    params = {
+        'static_image_mode': args.static,
+        'max_num_hands': args.max_hands,
+        'min_detection_confidence': args.min_detection_confidence,
+        'min_tracking_confidence': args.min_tracking_confidence,
+        'mirror': not args.no_mirror,
+    }
+    cache = LandmarkCache(args.cache_dir)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    names = output_names([source for source in args.inputs if os.path.exists(source)])
+    
+    # Resolve cache hits first so the pool only sees real work
+    pending = []
+    for source in args.inputs:
+        if not os.path.exists(source):
+            print(f"Skipping {source}: not found")
+            continue
+        key = content_hash(source, params)
+        stream = None if args.force else cache.get(key)
+        if stream is not None:
+            stream.save(str(output_dir / names[source]))
+            print(f"{source} -> {names[source]}: cached ({stream.num_frames} frames, {len(stream.landmarks)} hands)")
+            continue
+        info = source_info(source)
+        if not info:
+            print(f"Skipping {source}: could not open")
+            continue
+        pending.append((source, key, info))
+    
+    if not pending:
+        return
+    
+    start_time = time.perf_counter()
+    total_frames = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker,
+                             initargs=(params,)) as pool:
+        jobs = []
+        for source, key, info in pending:
+            chunks = plan_chunks(info['frame_count'], args.static, args.chunk_size)
+            futures = [pool.submit(_extract_range, source, begin, end, params['mirror'])
+                       for begin, end in chunks]
+            jobs.append((source, key, info, futures))
+        
+        for source, key, info, futures in jobs:
+            parts = []
+            num_frames = 0
+            for future in futures:
+                frame_index, hand_index, landmarks, end = future.result()
+                parts.append(LandmarkStream(frame_index, hand_index, landmarks, end))
+                num_frames = max(num_frames, end)
+            stream = LandmarkStream.concatenate(
+                parts, num_frames=num_frames, fps=info['fps'],
+                width=info['width'], height=info['height'], source=source)
+            cache.put(key, stream)
+            stream.save(str(output_dir / names[source]))
+            total_frames += num_frames
+            print(f"{source} -> {names[source]}: {num_frames} frames, {len(stream.landmarks)} hands")
+    
+    elapsed = time.perf_counter() - start_time
+    print(f"\nExtracted {total_frames} frames in {elapsed:.1f}s "
+          f"({total_frames / max(elapsed, 1e-9):.1f} frames/s, {args.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
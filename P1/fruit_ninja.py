@@ -6,423 +6,601 @@ import cv2
 import numpy as np
 import random
 import math
-from typing import List, Tuple, Optional
+from typing import Callable, Deque, List, Sequence, Tuple, Optional, Union
 import time
 import os
+import argparse
+import hashlib
+from collections import deque
 
 from utils.landmark_extractor import LandmarkExtractor
+from utils.video_processor import ThreadedCapture
+from utils.inference_pipeline import AsyncLandmarkStage
 from utils.image_loader import FruitImageLoader
-
-
-class Fruit:
-    """Represents a fruit in the game"""
-    
-    def __init__(self, fruit_type: str, x: float, speed: float, size: float = 50, 
-                 image_loader: FruitImageLoader = None):
-        """
-        Initialize a fruit
-        
-        Args:
-            fruit_type: Type of fruit (apple, banana, orange, etc.)
-            x: Starting x position
-            speed: Falling speed
-            size: Fruit size
-            image_loader: FruitImageLoader instance for getting fruit images
-        """
-        self.type = fruit_type
-        self.x = x
-        self.y = -size  # Start above screen
-        self.speed = speed
-        self.size = size
-        self.rotation = random.uniform(0, 360)
-        self.rotation_speed = random.uniform(-5, 5)
-        self.sliced = False
-        self.score_value = 10 if fruit_type in ['apple', 'orange'] else 15
-        
-        # Store image loader reference
-        self.image_loader = image_loader
-        self.base_image = None
-        
-        # Load fruit image if image loader is provided
-        if image_loader:
-            self.base_image = image_loader.get_image(fruit_type)
-        
-    def update(self, dt: float):
-        """Update fruit position"""
-        if not self.sliced:
-            self.y += self.speed * dt
-            self.rotation += self.rotation_speed
-            
-    def draw(self, frame: np.ndarray):
-        """Draw the fruit on the frame"""
-        if self.sliced:
-            return
-        
-        if self.base_image is not None and self.image_loader:
-            # Use image
-            # Resize image
-            img_size = int(self.size * 2)
-            resized_img = self.image_loader.resize_image(self.base_image, img_size)
-            
-            # Rotate image
-            rotated_img = self.image_loader.rotate_image(resized_img, self.rotation)
-            
-            # Calculate position to draw (center the image)
-            h, w = rotated_img.shape[:2]
-            x1 = int(self.x - w // 2)
-            y1 = int(self.y - h // 2)
-            x2 = x1 + w
-            y2 = y1 + h
-            
-            # Check bounds
-            frame_h, frame_w = frame.shape[:2]
-            
-            # Calculate source region
-            src_x1 = max(0, -x1)
-            src_y1 = max(0, -y1)
-            src_x2 = min(w, frame_w - x1)
-            src_y2 = min(h, frame_h - y1)
-            
-            # Calculate destination region
-            dst_x1 = max(0, x1)
-            dst_y1 = max(0, y1)
-            dst_x2 = min(frame_w, x2)
-            dst_y2 = min(frame_h, y2)
-            
-            if dst_x2 > dst_x1 and dst_y2 > dst_y1 and src_x2 > src_x1 and src_y2 > src_y1:
-                # Extract region from rotated image
-                src_region = rotated_img[src_y1:src_y2, src_x1:src_x2]
-                
-                if src_region.shape[2] == 4:  # Has alpha channel
-                    # Blend with alpha channel
-                    alpha = src_region[:, :, 3:4] / 255.0
-                    rgb = src_region[:, :, :3]
-                    frame_region = frame[dst_y1:dst_y2, dst_x1:dst_x2]
-                    blended = (rgb * alpha + frame_region * (1 - alpha)).astype(np.uint8)
-                    frame[dst_y1:dst_y2, dst_x1:dst_x2] = blended
-                else:
-                    # No alpha channel, just copy
-                    frame[dst_y1:dst_y2, dst_x1:dst_x2] = src_region
-        else:
-            # Fallback to circle if no image
-            center = (int(self.x), int(self.y))
-            color = (0, 0, 255) if self.type == 'apple' else (0, 200, 255)
-            cv2.circle(frame, center, int(self.size), color, -1)
-            cv2.circle(frame, center, int(self.size), (255, 255, 255), 2)
-    
-    def is_off_screen(self, height: int) -> bool:
-        """Check if fruit is off screen"""
-        return self.y > height + self.size
-    
-    def get_bounds(self) -> Tuple[int, int, int, int]:
-        """Get bounding box (x, y, width, height)"""
-        return (int(self.x - self.size), int(self.y - self.size),
-                int(self.size * 2), int(self.size * 2))
+from utils.compositing import AlphaCompositor
+from utils.fruit_pool import FruitPool
+from utils.collision import slice_hits
+from utils.motion_filter import OneEuroFilter
+from utils.trail_renderer import TrailRenderer
+from utils.profiler import profiler
 
 
 class SliceDetector:
     """Detects slicing gestures from hand movement"""
     
-    def __init__(self, min_slice_speed: float = 100.0):
+    # Frame size the speed threshold is specified for
+    REFERENCE_SIZE = (640, 480)
+    FINGERTIP = 8  # Index finger tip landmark
+    
+    def __init__(self, min_slice_speed: float = 100.0, frame_size: Tuple[int, int] = (640, 480),
+                 max_hands: int = 2, history: int = 32, max_speed: float = 8000.0, min_jump: float = 0.05,
+                 min_cutoff: float = 1.0, beta: float = 0.01, d_cutoff: float = 4.0):
         """
         Initialize slice detector
         
         Args:
-            min_slice_speed: Minimum speed (pixels per frame) to register as a slice
+            min_slice_speed: Minimum fingertip speed to register as a slice, in
+                pixels per second of a 640x480 frame (scaled to the actual size)
+            frame_size: (width, height) of the frames the landmarks come from
+            max_hands: Number of hands tracked at once
+            history: Fingertip samples kept per hand
+            max_speed: Fastest plausible fingertip, in pixels per second of a
+                640x480 frame; a move between two samples continues the same
+                hand only if it is within max_speed times their interval
+            min_jump: Smallest such allowed move, as a fraction of the frame
+                diagonal, so jitter at high sample rates still matches
+            min_cutoff: One-Euro cutoff (Hz) at rest
+            beta: One-Euro speed coefficient, per 640x480 pixel per second
+            d_cutoff: One-Euro cutoff (Hz) of the velocity estimate
         """
         self.min_slice_speed = min_slice_speed
-        self.prev_landmarks = None
-        self.prev_time = None
+        self.max_hands = max_hands
+        self.history = history
+        self.max_speed = max_speed
+        self.min_jump = min_jump
+        self._beta = beta
+        self.filter = OneEuroFilter(max_hands, min_cutoff=min_cutoff, d_cutoff=d_cutoff)
+        
+        # Ring buffer of raw fingertip samples (x, y, t) per hand slot
+        self.samples = np.zeros((max_hands, history, 3), dtype=np.float64)
+        self.sample_count = np.zeros(max_hands, dtype=np.int32)
+        self.head = np.zeros(max_hands, dtype=np.int32)
+        self._seen = np.zeros(max_hands, dtype=bool)
+        
+        self.set_frame_size(*frame_size)
+    
+    def set_frame_size(self, width: int, height: int):
+        """
+        Set the pixel size landmarks are mapped to
         
-    def detect_slice(self, landmarks: Optional[np.ndarray]) -> Tuple[bool, Tuple[int, int], Tuple[int, int]]:
+        The speed threshold and filter sensitivity are scaled with the frame
+        diagonal, so the same hand motion slices at any resolution.
         """
-        Detect if a slicing motion occurred
+        self.frame_width = width
+        self.frame_height = height
+        scale = math.hypot(width, height) / math.hypot(*self.REFERENCE_SIZE)
+        self.speed_threshold = self.min_slice_speed * scale
+        self.max_jump_speed = self.max_speed * scale
+        self.min_jump_distance = self.min_jump * math.hypot(width, height)
+        self.filter.beta = self._beta / scale
+    
+    def reset(self, hand: Optional[int] = None):
+        """Forget the samples of one hand slot (or all)"""
+        slots = range(self.max_hands) if hand is None else [hand]
+        for slot in slots:
+            self.sample_count[slot] = 0
+            self.filter.reset(slot)
+    
+    def _last_sample(self, slot: int) -> np.ndarray:
+        """Newest raw (x, y, t) sample of a hand slot"""
+        return self.samples[slot, (self.head[slot] - 1) % self.history]
+    
+    def _assign_slots(self, points: List[Tuple[float, float]], timestamp: float) -> List[int]:
+        """
+        Match the fingertips of one frame to hand slots
+        
+        Fingertip-slot pairs are taken globally nearest first, over all hands
+        at once, and only within the distance a fingertip can cover since the
+        slot's last sample (max_speed times the interval, at least min_jump).
+        A fingertip left over starts a fresh slot; if none is free it takes a
+        slot whose hand was not matched this frame, which is reset so no slice
+        joins the two hands.
+        
+        Returns:
+            Slot per fingertip, -1 where no slot is left
+        """
+        pairs = []
+        for slot in range(self.max_hands):
+            if self.sample_count[slot] == 0:
+                continue
+            last_x, last_y, last_t = self._last_sample(slot)
+            reach = max(self.min_jump_distance, self.max_jump_speed * (timestamp - last_t))
+            max_distance = reach ** 2
+            for i, (x, y) in enumerate(points):
+                distance = (last_x - x) ** 2 + (last_y - y) ** 2
+                if distance <= max_distance:
+                    pairs.append((distance, i, slot))
+        pairs.sort()
+        
+        slots = [-1] * len(points)
+        for _, i, slot in pairs:
+            if slots[i] < 0 and not self._seen[slot]:
+                slots[i] = slot
+                self._seen[slot] = True
+        
+        for i in range(len(points)):
+            if slots[i] >= 0:
+                continue
+            free = [slot for slot in range(self.max_hands) if not self._seen[slot]]
+            if not free:
+                break
+            # Prefer an empty slot over one whose hand may still come back
+            slot = min(free, key=lambda candidate: self.sample_count[candidate] > 0)
+            self.reset(slot)
+            slots[i] = slot
+            self._seen[slot] = True
+        return slots
+    
+    def update(self, hands: Sequence[np.ndarray],
+               timestamp: float) -> List[Tuple[int, Tuple[int, int], Tuple[int, int]]]:
+        """
+        Add one frame of hand landmarks and detect slices
+        
+        Hands are matched to tracked fingertips by _assign_slots, so a hand
+        that jumps across the frame (or swaps order) never continues another.
+        Slices are decided on the filtered velocity; the segment itself
+        follows the raw fingertip from the previous sample to this one.
         
         Args:
-            landmarks: Current hand landmarks
-            
+            hands: Flattened landmarks (63 values) of every detected hand
+            timestamp: Time the landmarks correspond to
+        
         Returns:
-            Tuple of (is_slice, start_point, end_point)
+            List of (hand slot, start point, end point) slice segments
         """
-        if landmarks is None:
-            self.prev_landmarks = None
-            self.prev_time = None
-            return False, None, None
-        
-        current_time = time.time()
-        
-        # Get index finger tip position (landmark 8)
-        # Landmarks are stored as [x, y, z, x, y, z, ...]
-        # Landmark 8 (index finger tip) is at indices 24-26
-        if len(landmarks) < 27:
-            return False, None, None
-        
-        current_x = landmarks[24]  # x coordinate
-        current_y = landmarks[25]   # y coordinate
-        
-        # Convert normalized coordinates to pixel coordinates (assuming 640x480 default)
-        # We'll use a fixed frame size for now
-        frame_width = 640
-        frame_height = 480
-        
-        current_px = int(current_x * frame_width)
-        current_py = int(current_y * frame_height)
-        
-        if self.prev_landmarks is None or self.prev_time is None:
-            self.prev_landmarks = landmarks.copy()
-            self.prev_time = current_time
-            return False, None, None
-        
-        prev_x = self.prev_landmarks[24]
-        prev_y = self.prev_landmarks[25]
-        prev_px = int(prev_x * frame_width)
-        prev_py = int(prev_y * frame_height)
-        
-        # Calculate speed
-        dt = current_time - self.prev_time
-        if dt > 0:
-            distance = math.sqrt((current_px - prev_px)**2 + (current_py - prev_py)**2)
-            speed = distance / dt
+        segments = []
+        self._seen[:] = False
+        offset = self.FINGERTIP * 3
+        points = [(float(landmarks[offset]) * self.frame_width,
+                   float(landmarks[offset + 1]) * self.frame_height)
+                  for landmarks in hands[:self.max_hands] if len(landmarks) >= offset + 2]
+        for (x, y), slot in zip(points, self._assign_slots(points, timestamp)):
+            if slot < 0:
+                continue
             
-            if speed > self.min_slice_speed:
-                self.prev_landmarks = landmarks.copy()
-                self.prev_time = current_time
-                return True, (prev_px, prev_py), (current_px, current_py)
+            has_previous = self.sample_count[slot] > 0
+            if has_previous:
+                prev_x, prev_y, prev_t = self._last_sample(slot)
+            _, velocity = self.filter.update(slot, x, y, timestamp)
+            
+            sample = self.samples[slot, self.head[slot]]
+            sample[0], sample[1], sample[2] = x, y, timestamp
+            self.head[slot] = (self.head[slot] + 1) % self.history
+            self.sample_count[slot] = min(self.sample_count[slot] + 1, self.history)
+            
+            if has_previous and prev_t < timestamp:
+                speed = math.hypot(velocity[0], velocity[1])
+                if speed > self.speed_threshold:
+                    segments.append((slot, (int(prev_x), int(prev_y)), (int(x), int(y))))
+        
+        # Hands that disappeared start over when they come back
+        for slot in range(self.max_hands):
+            if not self._seen[slot] and self.sample_count[slot]:
+                self.reset(slot)
+        return segments
+    
+    def fingertips(self) -> List[Tuple[int, Tuple[int, int]]]:
+        """
+        Filtered fingertip position of every tracked hand
         
-        self.prev_landmarks = landmarks.copy()
-        self.prev_time = current_time
-        return False, None, None
+        Returns:
+            List of (hand slot, (x, y)) in pixels
+        """
+        return [(slot, (int(self.filter.value[slot, 0]), int(self.filter.value[slot, 1])))
+                for slot in range(self.max_hands) if self.sample_count[slot]]
+    
+    def hand_history(self, slot: int) -> np.ndarray:
+        """
+        Raw fingertip samples of a hand, oldest first
+        
+        Returns:
+            (n, 3) array of (x, y, t)
+        """
+        count = self.sample_count[slot]
+        order = (self.head[slot] - count + np.arange(count)) % self.history
+        return self.samples[slot, order]
     
-    def get_hand_path(self, landmarks: Optional[np.ndarray], frame_width: int, frame_height: int) -> List[Tuple[int, int]]:
+    def detect_slice(self, landmarks: Optional[np.ndarray],
+                     timestamp: Optional[float] = None) -> Tuple[bool, Tuple[int, int], Tuple[int, int]]:
         """
-        Get current hand position for drawing trail
+        Detect if a slicing motion occurred (single hand)
         
         Args:
-            landmarks: Hand landmarks
-            frame_width: Frame width
-            frame_height: Frame height
+            landmarks: Current hand landmarks
+            timestamp: Time the landmarks correspond to (defaults to now)
             
         Returns:
-            List of (x, y) positions
+            Tuple of (is_slice, start_point, end_point)
         """
-        if landmarks is None or len(landmarks) < 27:
-            return []
-        
-        # Get index finger tip
-        x = int(landmarks[24] * frame_width)
-        y = int(landmarks[25] * frame_height)
-        
-        return [(x, y)]
+        current_time = time.time() if timestamp is None else timestamp
+        segments = self.update([] if landmarks is None else [landmarks], current_time)
+        if segments:
+            _, start, end = segments[0]
+            return True, start, end
+        return False, None, None
 
 
 class FruitNinja:
     """Main Fruit Ninja game class"""
     
-    def __init__(self, width: int = 640, height: int = 480):
+    def __init__(self, width: int = 640, height: int = 480,
+                 pipelined: bool = False, max_latency: float = 0.15, infer_every: int = 1,
+                 clock: Optional[Callable[[], float]] = None, seed: Optional[int] = None,
+                 landmark_extractor: Optional[LandmarkExtractor] = None,
+                 sim_rate: float = 120.0, image_loader: Optional[FruitImageLoader] = None):
         """
         Initialize Fruit Ninja game
         
         Args:
             width: Game window width
             height: Game window height
+            pipelined: Run hand landmark inference on a worker thread, one frame
+                ahead of rendering
+            max_latency: Latency budget (seconds) for pipelined landmarks
+            infer_every: In pipelined mode, run inference on every Nth frame only
+                and extrapolate the fingertip in between
+            clock: Time source in seconds (defaults to time.time); replays pass
+                a virtual clock
+            seed: Seed for fruit spawning (random if None)
+            landmark_extractor: Landmark source (defaults to a MediaPipe
+                LandmarkExtractor); replays pass a recorded stream
+            sim_rate: Simulation steps per second, independent of the camera
+                and render frame rates
+            image_loader: Sprite source (defaults to a new FruitImageLoader);
+                games running side by side can share one
         """
+        self.clock = clock or time.time
+        self.rng = random.Random(seed)
         self.width = width
         self.height = height
         self.score = 0
         self.lives = 3
         self.game_over = False
         
-        self.fruits: List[Fruit] = []
+        self.fruits = FruitPool()
         self.fruit_types = ['apple', 'banana', 'orange', 'watermelon', 'pineapple']
         
         # Load fruit images
-        self.image_loader = FruitImageLoader()
-        
-        self.landmark_extractor = LandmarkExtractor()
-        self.slice_detector = SliceDetector(min_slice_speed=150.0)
-        
-        self.last_fruit_spawn = time.time()
+        self.image_loader = image_loader or FruitImageLoader()
+        # Fill the atlas now rather than on the first frames that draw each fruit
+        self.image_loader.warm_up()
+        self.compositor = AlphaCompositor()
+        
+        self.landmark_extractor = landmark_extractor or LandmarkExtractor()
+        self.slice_detector = SliceDetector(min_slice_speed=150.0, frame_size=(width, height))
+        
+        self.inference: Optional[AsyncLandmarkStage] = None
+        if pipelined:
+            self.inference = AsyncLandmarkStage(self.landmark_extractor,
+                                                max_latency=max_latency,
+                                                infer_every=infer_every)
+            self.inference.start()
+        
+        # Latency tracking for the debug overlay (seconds)
+        self.show_debug = False
+        self.show_profile = False
+        self.frame_timestamp = self.clock()
+        self.landmark_age: Optional[float] = None
+        self.motion_to_photon: Optional[float] = None
+        
+        # Fixed-step simulation: physics, spawning and misses advance in
+        # 1/sim_rate steps; rendering interpolates between the last two steps
+        self.timestep = 1.0 / sim_rate
+        self.max_frame_time = 0.25  # Longer stalls are clamped, not replayed step by step
+        self.accumulator = 0.0
+        self.sim_time = 0.0
+        
+        self.last_fruit_spawn = self.sim_time
         self.spawn_interval = 1.5  # Spawn a fruit every 1.5 seconds
         self.fruit_speed_range = (100, 200)  # Pixels per second
         
-        self.slice_trail: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
-        self.trail_max_length = 10
-        self.hand_path: List[Tuple[int, int]] = []
+        # Recent fingertip points per hand; points and slices are drawn once
+        # into the trail layer, which fades them over time
         self.hand_path_max_length = 20
+        self.hand_paths: List[Deque[Tuple[int, int]]] = [deque(maxlen=self.hand_path_max_length)
+                                                         for _ in range(self.slice_detector.max_hands)]
+        self.trails = TrailRenderer()
+        self.trail_time: Optional[float] = None
         
     def spawn_fruit(self):
         """Spawn a new fruit at random position"""
-        if time.time() - self.last_fruit_spawn > self.spawn_interval:
-            fruit_type = random.choice(self.fruit_types)
-            x = random.randint(50, self.width - 50)
-            speed = random.uniform(*self.fruit_speed_range)
+        if self.sim_time - self.last_fruit_spawn > self.spawn_interval:
+            type_index = self.rng.randrange(len(self.fruit_types))
+            fruit_type = self.fruit_types[type_index]
+            x = self.rng.randint(50, self.width - 50)
+            speed = self.rng.uniform(*self.fruit_speed_range)
+            size = self.rng.randint(40, 60)
             
-            fruit = Fruit(fruit_type, x, speed, size=random.randint(40, 60), 
-                         image_loader=self.image_loader)
-            self.fruits.append(fruit)
-            self.last_fruit_spawn = time.time()
+            self.fruits.spawn(type_index, x, -size, 0.0, speed, size,
+                              rotation=self.rng.uniform(0, 360),
+                              rotation_speed=self.rng.uniform(-150, 150),
+                              score_value=10 if fruit_type in ['apple', 'orange'] else 15)
+            self.last_fruit_spawn = self.sim_time
             
             # Increase difficulty over time
             self.spawn_interval = max(0.5, 1.5 - self.score / 1000)
     
-    def check_slice(self, start: Tuple[int, int], end: Tuple[int, int]) -> int:
+    def check_slice(self, segments: Sequence[Tuple[Tuple[int, int], Tuple[int, int]]]) -> int:
         """
-        Check if a slice intersects any fruits
+        Check if any slice segment intersects any fruits
+        
+        Fruits are tested as swept circles over every simulation step since
+        the previous check, so fast swipes and fast fruits cannot tunnel past
+        each other between frames.
         
         Args:
-            start: Start point of slice
-            end: End point of slice
+            segments: Slice segments as (start, end) points
             
         Returns:
             Number of fruits sliced
         """
-        sliced_count = 0
+        indices = self.fruits.active_indices()
+        if len(indices) == 0 or len(segments) == 0:
+            return 0
+        
+        hits = slice_hits(segments, self.fruits.position[indices], self.fruits.size[indices],
+                          prev_centers=self.fruits.sweep_origin[indices])
+        hit_indices = indices[hits]
+        if len(hit_indices):
+            self.score += self.fruits.mark_sliced(hit_indices, self.sim_time)
+        return len(hit_indices)
+    
+    def get_landmarks(self, frame: np.ndarray, timestamp: float,
+                      draw: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get landmarks of every hand in a frame and the frame with landmarks drawn
         
-        for fruit in self.fruits:
-            if fruit.sliced:
-                continue
-            
-            # Check if slice line intersects fruit circle
-            if self.line_circle_intersect(start, end, 
-                                         (int(fruit.x), int(fruit.y)), 
-                                         int(fruit.size)):
-                fruit.sliced = True
-                self.score += fruit.score_value
-                sliced_count += 1
+        In pipelined mode the frame is handed to the inference worker and the
+        landmarks are predicted at the frame's capture time from the newest
+        finished results, so rendering never waits on MediaPipe.
         
-        return sliced_count
+        Args:
+            frame: Current camera frame
+            timestamp: Capture time of the frame
+            draw: Draw the landmarks (skipped for frames that are not rendered)
+            
+        Returns:
+            Tuple of ((hands, 63) landmarks array, annotated frame)
+        """
+        if self.inference is None:
+            self.landmark_age = 0.0
+            hands, results = self.landmark_extractor.detect_hands(frame)
+            if not draw:
+                return hands, frame
+            return hands, self.landmark_extractor.draw_landmarks(frame, results)
+        
+        self.inference.submit(frame, timestamp)
+        hands = self.inference.predict_hands(timestamp)
+        self.landmark_age = self.inference.landmark_age(timestamp)
+        
+        latest = self.inference.latest
+        if not draw:
+            return hands, frame
+        if latest is None:
+            return hands, frame if self.landmark_extractor.draw_in_place else frame.copy()
+        return hands, self.landmark_extractor.draw_landmarks(frame, latest.results)
     
-    def line_circle_intersect(self, p1: Tuple[int, int], p2: Tuple[int, int],
-                             center: Tuple[int, int], radius: int) -> bool:
+    def update(self, frame: np.ndarray, dt: float, timestamp: Optional[float] = None,
+               render: bool = True) -> Optional[np.ndarray]:
         """
-        Check if a line segment intersects a circle
+        Update game state
+        
+        Input is sampled once per camera frame, the simulation advances in
+        fixed steps covering `dt`, and the frame is rendered with fruits
+        interpolated between the last two steps.
         
         Args:
-            p1: Start point of line
-            p2: End point of line
-            center: Circle center
-            radius: Circle radius
-            
+            frame: Current camera frame
+            dt: Delta time since last frame
+            timestamp: Capture time of the frame (defaults to now)
+            render: Draw the game onto the frame; pass False to only advance
+                the game (e.g. when the render rate is capped)
+        
         Returns:
-            True if line intersects circle
+            Rendered frame, or None if render is False
         """
-        # Vector from p1 to p2
-        dx = p2[0] - p1[0]
-        dy = p2[1] - p1[1]
+        if timestamp is None:
+            timestamp = self.clock()
+        self.frame_timestamp = timestamp
         
-        # Vector from p1 to circle center
-        fx = p1[0] - center[0]
-        fy = p1[1] - center[1]
+        # Landmarks are normalized to the camera frame, whatever its size
+        height, width = frame.shape[:2]
+        if (width, height) != (self.slice_detector.frame_width, self.slice_detector.frame_height):
+            self.slice_detector.set_frame_size(width, height)
         
-        # Calculate discriminant
-        a = dx * dx + dy * dy
-        b = 2 * (fx * dx + fy * dy)
-        c = fx * fx + fy * fy - radius * radius
+        self.trails.ensure(frame.shape)
         
-        discriminant = b * b - 4 * a * c
+        # Extract hand landmarks
+        with profiler.scope("update.landmarks"):
+            hands, annotated_frame = self.get_landmarks(frame, timestamp, draw=render)
+        
+        if not self.game_over:
+            with profiler.scope("update.input"):
+                self.handle_input(hands, timestamp)
+            with profiler.scope("update.simulate"):
+                self.advance(dt)
+        
+        if not render:
+            return None
+        with profiler.scope("update.render"):
+            self.render(annotated_frame)
+        return annotated_frame
+    
+    def handle_input(self, hands: Sequence[np.ndarray], timestamp: float):
+        """
+        Turn hand landmarks into trails and slices
+        
+        Args:
+            hands: Flattened landmarks of every hand in this frame
+            timestamp: Time the landmarks correspond to
+        """
+        # Detect slicing motion of every hand
+        segments = self.slice_detector.update(hands, timestamp)
+        
+        # Add each hand's fingertip to its trail; hands that are gone start a new one
+        tracked = set()
+        for slot, current_pos in self.slice_detector.fingertips():
+            tracked.add(slot)
+            hand_path = self.hand_paths[slot]
+            if len(hand_path) == 0 or hand_path[-1] != current_pos:
+                if hand_path:
+                    self.trails.add_segment(hand_path[-1], current_pos, (255, 0, 0), 2)
+                hand_path.append(current_pos)
+        for slot, hand_path in enumerate(self.hand_paths):
+            if slot not in tracked:
+                hand_path.clear()
+        
+        slices = [(start, end) for _, start, end in segments]
+        if slices:
+            # Draw white knife slashes once; the trail layer fades them out
+            for slice_start, slice_end in slices:
+                self.trails.add_segment(slice_start, slice_end, (255, 255, 255), 8)
+            
+            # Check for fruit slices
+            if self.check_slice(slices) > 0:
+                # Add visual feedback for successful slice with white flash
+                for _, slice_end in slices:
+                    self.trails.add_circle(slice_end, 25, (255, 255, 255), -1)
+                    self.trails.add_circle(slice_end, 30, (255, 255, 255), 2)
         
-        if discriminant < 0:
-            return False
+        # The next check sweeps fruits from where they are now
+        self.fruits.begin_sweep()
+    
+    def advance(self, dt: float):
+        """
+        Run as many fixed simulation steps as `dt` covers
         
-        # Check if intersection point is on the line segment
-        t1 = (-b - math.sqrt(discriminant)) / (2 * a)
-        t2 = (-b + math.sqrt(discriminant)) / (2 * a)
+        Leftover time stays in the accumulator for the next frame, so the
+        simulation is independent of the camera frame rate.
         
-        return (0 <= t1 <= 1) or (0 <= t2 <= 1)
+        Args:
+            dt: Real time elapsed since the last call (seconds)
+        """
+        self.accumulator += min(max(dt, 0.0), self.max_frame_time)
+        while self.accumulator >= self.timestep and not self.game_over:
+            self.step(self.timestep)
+            self.accumulator -= self.timestep
     
-    def update(self, frame: np.ndarray, dt: float):
+    def step(self, dt: float):
         """
-        Update game state
+        Advance the simulation by one fixed step
         
         Args:
-            frame: Current camera frame
-            dt: Delta time since last frame
+            dt: Step length (seconds)
         """
-        # Extract hand landmarks
-        landmarks, annotated_frame = self.landmark_extractor.process_frame(frame)
+        self.sim_time += dt
+        self.spawn_fruit()
+        self.fruits.step(dt)
+        
+        # Remove fruits that are off screen or were sliced a moment ago
+        missed = self.fruits.reap(self.height, self.sim_time)
+        if missed:
+            self.lives -= missed
+            if self.lives <= 0:
+                self.game_over = True
+    
+    def render(self, frame: np.ndarray):
+        """
+        Draw trails, fruits and UI onto the frame
         
+        Args:
+            frame: Frame to draw on (modified in place)
+        """
         if self.game_over:
             # Draw UI even when game is over
-            self.draw_ui(annotated_frame)
-            return annotated_frame
+            self.draw_ui(frame)
+            return
         
-        # Detect slicing motion
-        is_slice, slice_start, slice_end = self.slice_detector.detect_slice(landmarks)
+        # Fade the trail layer by the time since the last render, then add it
+        with profiler.scope("render.trails"):
+            if self.trail_time is not None:
+                self.trails.decay(self.frame_timestamp - self.trail_time)
+            self.trail_time = self.frame_timestamp
+            self.trails.composite(frame)
         
-        # Get hand position for trail
-        hand_positions = self.slice_detector.get_hand_path(landmarks, self.width, self.height)
-        if hand_positions:
-            current_pos = hand_positions[0]
-            
-            # Add to hand path trail
-            if len(self.hand_path) == 0 or self.hand_path[-1] != current_pos:
-                self.hand_path.append(current_pos)
-                if len(self.hand_path) > self.hand_path_max_length:
-                    self.hand_path.pop(0)
-            
-            # Draw hand trail (fading effect)
-            for i in range(len(self.hand_path) - 1):
-                alpha = i / len(self.hand_path)
-                color = (int(255 * alpha), 0, int(255 * (1 - alpha)))
-                cv2.line(annotated_frame, self.hand_path[i], self.hand_path[i+1],
-                        color, 2)
-        
-        if is_slice and slice_start and slice_end:
-            # Draw white knife slash with glowing effect
-            # Outer glow (thicker, slightly transparent would be ideal but using brighter white)
-            cv2.line(annotated_frame, slice_start, slice_end, (255, 255, 255), 8)
-            # Main slash line
-            cv2.line(annotated_frame, slice_start, slice_end, (255, 255, 255), 6)
-            # Inner bright line
-            cv2.line(annotated_frame, slice_start, slice_end, (255, 255, 255), 4)
-            
-            # Add to slice trail
-            self.slice_trail.append((slice_start, slice_end))
-            if len(self.slice_trail) > self.trail_max_length:
-                self.slice_trail.pop(0)
-            
-            # Check for fruit slices
-            sliced = self.check_slice(slice_start, slice_end)
-            if sliced > 0:
-                # Add visual feedback for successful slice with white flash
-                cv2.circle(annotated_frame, slice_end, 25, (255, 255, 255), -1)
-                cv2.circle(annotated_frame, slice_end, 30, (255, 255, 255), 2)
-        
-        # Draw slice trail (white with fade out effect)
-        for i, (start, end) in enumerate(self.slice_trail):
-            alpha = (len(self.slice_trail) - i) / len(self.slice_trail) if self.slice_trail else 1
-            # White color with alpha fade
-            brightness = int(255 * alpha)
-            color = (brightness, brightness, brightness)
-            thickness = max(2, int(4 * alpha))
-            cv2.line(annotated_frame, start, end, color, thickness)
-        
-        # Update fruits
-        self.spawn_fruit()
+        with profiler.scope("render.fruits"):
+            self.draw_fruits(frame, self.accumulator / self.timestep)
         
-        for fruit in self.fruits[:]:
-            fruit.update(dt)
-            fruit.draw(annotated_frame)
-            
-            # Remove fruits that are off screen or sliced
-            if fruit.is_off_screen(self.height):
-                if not fruit.sliced:
-                    self.lives -= 1
-                    if self.lives <= 0:
-                        self.game_over = True
-                self.fruits.remove(fruit)
-            elif fruit.sliced:
-                # Keep sliced fruits for a moment, then remove
-                if time.time() - getattr(fruit, 'sliced_time', time.time()) > 0.1:
-                    self.fruits.remove(fruit)
+        # Draw UI
+        with profiler.scope("render.ui"):
+            self.draw_ui(frame)
+    
+    def draw_fruits(self, frame: np.ndarray, alpha: float = 1.0):
+        """
+        Composite all live fruits onto the frame in one batched pass
+        
+        Args:
+            frame: Frame to draw on
+            alpha: Fraction of a simulation step elapsed since the last step;
+                fruits are drawn between their previous and current positions
+        """
+        indices = self.fruits.active_indices()
+        positions, rotations = self.fruits.interpolate(indices, alpha)
+        sprites = []
+        visible = []
+        with profiler.scope("fruits.sprites"):
+            for j, i in enumerate(indices):
+                fruit_type = self.fruit_types[self.fruits.type_index[i]]
+                size = self.fruits.size[i]
+                sprite = self.image_loader.render_sprite(fruit_type, size * 2, rotations[j])
+                if sprite is None:
+                    # Fallback to circle if no image
+                    center = (int(positions[j, 0]), int(positions[j, 1]))
+                    color = (0, 0, 255) if fruit_type == 'apple' else (0, 200, 255)
+                    cv2.circle(frame, center, int(size), color, -1)
+                    cv2.circle(frame, center, int(size), (255, 255, 255), 2)
                 else:
-                    if not hasattr(fruit, 'sliced_time'):
-                        fruit.sliced_time = time.time()
+                    sprites.append(sprite)
+                    visible.append(j)
         
-        # Draw UI
-        self.draw_ui(annotated_frame)
+        if sprites:
+            with profiler.scope("fruits.composite"):
+                self.compositor.blit_many(frame, sprites, positions[visible])
+    
+    def frame_displayed(self, display_time: Optional[float] = None):
+        """
+        Record that the last rendered frame reached the screen
         
-        return annotated_frame
+        Args:
+            display_time: Time the frame was shown (defaults to now)
+        """
+        display_time = self.clock() if display_time is None else display_time
+        latency = display_time - self.frame_timestamp
+        if self.motion_to_photon is None:
+            self.motion_to_photon = latency
+        else:
+            self.motion_to_photon = 0.9 * self.motion_to_photon + 0.1 * latency
+    
+    def draw_debug(self, frame: np.ndarray):
+        """Draw latency overlay (motion-to-photon, landmark age, inference time)"""
+        lines = []
+        if self.motion_to_photon is not None:
+            lines.append(f"Motion-to-photon: {self.motion_to_photon * 1000:.1f} ms")
+        if self.landmark_age is not None:
+            lines.append(f"Landmark age: {self.landmark_age * 1000:.1f} ms")
+        if self.inference is not None and self.inference.latest is not None:
+            lines.append(f"Inference: {self.inference.latest.inference_time * 1000:.1f} ms "
+                         f"(every {self.inference.infer_every} frame(s))")
+        
+        for i, line in enumerate(lines):
+            cv2.putText(frame, line, (10, self.height - 15 - 22 * (len(lines) - 1 - i)),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1)
+    
+    def draw_profile(self, frame: np.ndarray):
+        """Draw per-scope frame-time percentiles from the profiler"""
+        for i, line in enumerate(profiler.overlay_lines()):
+            cv2.putText(frame, line, (self.width - 330, 20 + 18 * i),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
     
     def draw_ui(self, frame: np.ndarray):
         """Draw game UI (score, lives, etc.)"""
@@ -436,6 +614,11 @@ class FruitNinja:
         cv2.putText(frame, lives_text, (10, 70),
                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         
+        if self.show_debug:
+            self.draw_debug(frame)
+        if self.show_profile:
+            self.draw_profile(frame)
+        
         # Draw game over
         if self.game_over:
             game_over_text = "GAME OVER! Press 'r' to restart"
@@ -445,45 +628,119 @@ class FruitNinja:
             cv2.putText(frame, game_over_text, (text_x, text_y),
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
     
+    def state_hash(self) -> str:
+        """
+        Hash of the gameplay state (score, lives and every live fruit)
+        
+        Two runs over the same input with the same seed and clock produce the
+        same hash, so replays can detect behavioural changes.
+        
+        Returns:
+            Hex digest of the state
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{self.score},{self.lives},{self.game_over}".encode())
+        indices = self.fruits.active_indices()
+        for column in (self.fruits.type_index, self.fruits.position, self.fruits.velocity,
+                       self.fruits.rotation, self.fruits.size, self.fruits.sliced):
+            digest.update(np.ascontiguousarray(column[indices]).tobytes())
+        return digest.hexdigest()
+    
     def reset(self):
         """Reset game state"""
         self.score = 0
         self.lives = 3
         self.game_over = False
         self.fruits.clear()
-        self.last_fruit_spawn = time.time()
+        self.accumulator = 0.0
+        self.last_fruit_spawn = self.sim_time
         self.spawn_interval = 1.5
-        self.hand_path.clear()
-        self.slice_trail.clear()
+        for hand_path in self.hand_paths:
+            hand_path.clear()
+        self.trails.clear()
+        self.slice_detector.reset()
+    
+    def close(self):
+        """Stop background workers"""
+        if self.inference is not None:
+            self.inference.stop()
+
+
+def parse_source(source: str) -> Union[int, str]:
+    """Interpret a --source argument as a camera index or a video path"""
+    return int(source) if source.isdigit() else source
 
 
 def main():
     """Main game loop"""
+    parser = argparse.ArgumentParser(description="Fruit Ninja - Hand Tracking Edition")
+    parser.add_argument('--source', default='0',
+                        help="Camera index or path to a recorded video (default: 0)")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="Run hand inference on a worker thread, one frame ahead of rendering")
+    parser.add_argument('--infer-every', type=int, default=1,
+                        help="Pipelined mode: run inference every Nth frame and extrapolate between")
+    parser.add_argument('--max-latency', type=float, default=0.15,
+                        help="Pipelined mode: discard landmarks older than this many seconds")
+    parser.add_argument('--debug', action='store_true', help="Show the latency overlay")
+    parser.add_argument('--sim-rate', type=float, default=120.0,
+                        help="Simulation steps per second (default: 120)")
+    parser.add_argument('--max-render-fps', type=float, default=0.0,
+                        help="Cap the render rate; frames in between only advance the game (0 = no cap)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time each stage of the frame and show the profiler overlay")
+    parser.add_argument('--profile-output', default='data/profile',
+                        help="With --profile, write <path>.json and <path>.csv at exit (default: data/profile)")
+    parser.add_argument('--prune-cache', action='store_true',
+                        help="Delete sprite bundles built for other assets or settings, then exit")
+    args = parser.parse_args()
+    profiler.enabled = args.profile
+    
+    if args.prune_cache:
+        removed = FruitImageLoader().prune_cache()
+        print(f"Removed {removed} stale sprite bundle files")
+        return
+    
     print("Fruit Ninja - Hand Tracking Edition")
     print("Instructions:")
     print("- Move your hand quickly to slice fruits")
     print("- Don't let fruits fall to the bottom!")
-    print("- Press 'q' to quit, 'r' to restart")
+    print("- Press 'q' to quit, 'r' to restart, 'd' for the latency overlay, 'p' for the profiler overlay")
     print("\nStarting game...")
     
-    cap = cv2.VideoCapture(0)
+    # Frames are captured on a background thread so camera I/O overlaps
+    # with landmark extraction and rendering
+    cap = ThreadedCapture(parse_source(args.source), width=640, height=480)
     
-    if not cap.isOpened():
+    if not cap.start():
         print("Error: Could not open webcam")
         return
     
-    # Set camera resolution
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    game = FruitNinja(width=640, height=480, pipelined=args.pipelined,
+                      max_latency=args.max_latency, infer_every=args.infer_every,
+                      sim_rate=args.sim_rate)
+    game.show_debug = args.debug
+    game.show_profile = args.profile
     
-    game = FruitNinja(width=640, height=480)
+    # The loop owns each flipped frame, so landmarks can be drawn without a copy
+    game.landmark_extractor.draw_in_place = True
     
     prev_time = time.time()
+    render_interval = 1.0 / args.max_render_fps if args.max_render_fps > 0 else 0.0
+    next_render = prev_time
     
     try:
         while True:
-            ret, frame = cap.read()
+            frame_start = time.perf_counter_ns()
+            with profiler.scope("loop.capture"):
+                ret, frame = cap.read()
             if not ret or frame is None:
+                if cap.isOpened():
+                    # The camera stalled past the read timeout; keep the window
+                    # responsive and wait again
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                    continue
                 break
             
             # Check if frame is valid
@@ -498,26 +755,48 @@ def main():
             dt = current_time - prev_time
             prev_time = current_time
             
-            # Update game
-            game_frame = game.update(frame, dt)
+            # Update game; render only when the render cap allows
+            render = current_time >= next_render
+            if render:
+                next_render = max(next_render + render_interval, current_time)
+            with profiler.scope("update"):
+                game_frame = game.update(frame, dt, cap.last_timestamp, render=render)
             
             # Check if game_frame is valid before displaying
             if game_frame is None or game_frame.size == 0:
                 continue
             
             # Display frame
-            cv2.imshow("Fruit Ninja", game_frame)
-            
-            key = cv2.waitKey(1) & 0xFF
+            with profiler.scope("loop.display"):
+                cv2.imshow("Fruit Ninja", game_frame)
+                key = cv2.waitKey(1) & 0xFF
+            game.frame_displayed()
+            if profiler.enabled:
+                profiler.record_ns("loop.frame", time.perf_counter_ns() - frame_start)
             if key == ord('q'):
                 break
             elif key == ord('r'):
                 game.reset()
                 print("Game restarted!")
+            elif key == ord('d'):
+                game.show_debug = not game.show_debug
+            elif key == ord('p'):
+                # The overlay needs samples, so it turns profiling on as well
+                game.show_profile = not game.show_profile
+                profiler.enabled = profiler.enabled or game.show_profile
     
     finally:
+        game.close()
         cap.release()
         cv2.destroyAllWindows()
+        stats = cap.stats()
+        print(f"\nCapture: {stats['frames_captured']:.0f} frames read, "
+              f"{stats['frames_dropped']:.0f} dropped, {stats['capture_ms']:.1f} ms/read, "
+              f"{stats['wait_ms']:.1f} ms waiting per frame")
+        if profiler.enabled:
+            for suffix in ('.json', '.csv'):
+                profiler.dump(args.profile_output + suffix)
+            print(f"Profile written to {args.profile_output}.json/.csv")
         print(f"\nFinal Score: {game.score}")
 
 
@@ -0,0 +1,258 @@
+"""
+Multi-station Fruit Ninja server
+Each camera station (a camera index or a video file) gets its own process
+that captures frames and runs MediaPipe, and hands every frame with its
+landmarks to the game process through a shared-memory ring. The game process
+keeps one FruitNinja per station and renders each station's frame in place
+in shared memory, so frames are never pickled or copied between processes.
+
+Usage:
+    python game_server.py 0 1                     # two cameras
+    python game_server.py videos/a.mp4 videos/b.mp4 --headless
+"""
+import argparse
+import multiprocessing as mp
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from fruit_ninja import FruitNinja, parse_source
+from utils.image_loader import FruitImageLoader
+from utils.landmark_extractor import LandmarkExtractor
+from utils.shared_ring import SharedFrameRing
+from utils.video_processor import ThreadedCapture
+
+
+class RingLandmarkSource:
+    """Landmark source for a game fed by a station process
+    
+    The station already ran MediaPipe; the server sets `hands` to the
+    landmarks that arrived with the frame before each update.
+    """
+    
+    def __init__(self, draw_in_place: bool = True):
+        """
+        Initialize ring landmark source
+        
+        Args:
+            draw_in_place: If True, draw landmarks directly on the input frame
+        """
+        self.draw_in_place = draw_in_place
+        self.hands = np.zeros((0, 63), dtype=np.float32)
+    
+    def detect_hands(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Landmarks delivered with the current frame
+        
+        Returns:
+            Tuple of ((hands, 63) landmarks, the same array as "results")
+        """
+        return self.hands, self.hands
+    
+    def draw_landmarks(self, image: np.ndarray, results: np.ndarray,
+                       in_place: Optional[bool] = None) -> np.ndarray:
+        """Draw the delivered landmark points"""
+        if in_place is None:
+            in_place = self.draw_in_place
+        image_out = image if in_place else image.copy()
+        height, width = image_out.shape[:2]
+        for hand in results:
+            for x, y in hand.reshape(-1, 3)[:, :2]:
+                cv2.circle(image_out, (int(x * width), int(y * height)), 2, (0, 255, 0), -1)
+        return image_out
+
+
+def station_main(source: Union[int, str], ring: SharedFrameRing, stop,
+                 mirror: bool = True, max_frames: Optional[int] = None):
+    """
+    Capture and landmark extraction for one station (runs in its own process)
+    
+    Cameras are timestamped with their capture time and drop stale frames
+    while the game is busy; video files deliver every frame with timestamps
+    at the file's frame rate.
+    
+    Args:
+        source: Camera index or video path
+        ring: Ring shared with the game process
+        stop: Event set by the server to end the station
+        mirror: Flip frames horizontally, as the live game does
+        max_frames: Stop after this many frames
+    """
+    height, width = ring.frame_shape[:2]
+    live = isinstance(source, int)
+    cap = ThreadedCapture(source, width=width if live else None, height=height if live else None)
+    try:
+        if not cap.start():
+            return
+        fps = cap.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        extractor = LandmarkExtractor(max_num_hands=ring.max_hands)
+        frame_out = np.empty(ring.frame_shape, dtype=np.uint8)
+        
+        frames = 0
+        while not stop.is_set() and (max_frames is None or frames < max_frames):
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                if cap.isOpened():
+                    continue  # the camera stalled past the read timeout
+                break
+            if frame.shape != frame_out.shape:
+                frame = cv2.resize(frame, (width, height))
+            if mirror:
+                cv2.flip(frame, 1, dst=frame_out)
+            else:
+                np.copyto(frame_out, frame)
+            
+            hands, _ = extractor.detect_hands(frame_out)
+            timestamp = cap.last_timestamp if live else frames / fps
+            
+            # Wait for the game in short steps so a stop request is noticed
+            while not ring.put(frame_out, hands, timestamp, timeout=0.1):
+                if stop.is_set():
+                    return
+            frames += 1
+    finally:
+        cap.release()
+        while not stop.is_set() and not ring.put_end(timeout=0.1):
+            pass
+        ring.close()
+
+
+def run_server(sources: Sequence[Union[int, str]], width: int = 640, height: int = 480,
+               headless: bool = False, mirror: bool = True, max_frames: Optional[int] = None,
+               slots: int = 4, seed: Optional[int] = None, sim_rate: float = 120.0) -> Dict:
+    """
+    Run one game per station until every station ends (or 'q' is pressed)
+    
+    Args:
+        sources: Camera indices and/or video paths, one per station
+        width: Frame width every station is scaled to
+        height: Frame height every station is scaled to
+        headless: Do not open windows
+        mirror: Flip frames horizontally
+        max_frames: Frames per station
+        slots: Ring slots per station
+        seed: Fruit spawning seed (station i uses seed + i)
+        sim_rate: Simulation steps per second
+    
+    Returns:
+        Dictionary with frames and scores per station, elapsed seconds and
+        total frames per second
+    """
+    context = mp.get_context()
+    stop = context.Event()
+    ready = context.Semaphore(0)
+    rings = [SharedFrameRing((height, width, 3), slots=slots, context=context, notify=ready)
+             for _ in sources]
+    stations = [context.Process(target=station_main, name=f"station-{i}",
+                                args=(source, ring, stop, mirror, max_frames), daemon=True)
+                for i, (source, ring) in enumerate(zip(sources, rings))]
+    for station in stations:
+        station.start()
+    
+    # Stations share one sprite atlas; only game state is per station
+    image_loader = FruitImageLoader()
+    inputs = [RingLandmarkSource() for _ in sources]
+    games = [FruitNinja(width=width, height=height, landmark_extractor=source,
+                        seed=None if seed is None else seed + i, sim_rate=sim_rate,
+                        image_loader=image_loader)
+             for i, source in enumerate(inputs)]
+    
+    frames = [0] * len(sources)
+    last_timestamp: List[Optional[float]] = [None] * len(sources)
+    active = set(range(len(sources)))
+    next_station = 0
+    start = time.perf_counter()
+    try:
+        while active:
+            # One `ready` count per filled slot of any ring, so after a
+            # successful acquire at least one ring has a frame waiting
+            if not ready.acquire(timeout=0.05):
+                if not headless and (cv2.waitKey(1) & 0xFF) == ord('q'):
+                    break
+                continue
+            
+            # Serve stations round-robin so a fast one cannot starve the others
+            for k in range(len(sources)):
+                i = (next_station + k) % len(sources)
+                slot = rings[i].acquire(timeout=0) if i in active else None
+                if slot is not None:
+                    break
+            else:
+                continue
+            next_station = i + 1
+            ring = rings[i]
+            
+            if ring.is_end(slot):
+                ring.release(slot)
+                active.discard(i)
+                continue
+            
+            timestamp = ring.timestamp(slot)
+            dt = 0.0 if last_timestamp[i] is None else timestamp - last_timestamp[i]
+            last_timestamp[i] = timestamp
+            inputs[i].hands = ring.hands(slot)
+            game_frame = games[i].update(ring.frame(slot), dt, timestamp)
+            if not headless:
+                cv2.imshow(f"Fruit Ninja - station {i}", game_frame)
+            ring.release(slot)
+            frames[i] += 1
+            
+            if not headless:
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q'):
+                    break
+                elif key == ord('r'):
+                    for game in games:
+                        game.reset()
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for station in stations:
+            station.join(timeout=2.0)
+            if station.is_alive():
+                station.terminate()
+        for game in games:
+            game.close()
+        for ring in rings:
+            ring.close()
+        if not headless:
+            cv2.destroyAllWindows()
+    
+    return {
+        'stations': len(sources),
+        'frames': frames,
+        'scores': [game.score for game in games],
+        'seconds': elapsed,
+        'fps': sum(frames) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    """Start the server for the given stations"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sources', nargs='+', help="Camera indices and/or video files, one per station")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--headless', action='store_true', help="Do not open windows")
+    parser.add_argument('--no-mirror', action='store_true', help="Do not flip frames horizontally")
+    parser.add_argument('--max-frames', type=int, help="Stop each station after this many frames")
+    parser.add_argument('--slots', type=int, default=4, help="Ring slots per station (default: 4)")
+    parser.add_argument('--seed', type=int, help="Fruit spawning seed")
+    parser.add_argument('--sim-rate', type=float, default=120.0,
+                        help="Simulation steps per second (default: 120)")
+    args = parser.parse_args()
+    
+    stats = run_server([parse_source(s) for s in args.sources], width=args.width,
+                       height=args.height, headless=args.headless, mirror=not args.no_mirror,
+                       max_frames=args.max_frames, slots=args.slots, seed=args.seed,
+                       sim_rate=args.sim_rate)
+    for i, (frames, score) in enumerate(zip(stats['frames'], stats['scores'])):
+        print(f"Station {i}: {frames} frames, score {score}")
+    print(f"Total: {sum(stats['frames'])} frames in {stats['seconds']:.2f} s ({stats['fps']:.1f} fps)")
+
+
+if __name__ == "__main__":
+    main()
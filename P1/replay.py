@@ -0,0 +1,235 @@
+"""
+Deterministic record/replay harness for Fruit Ninja
+Feeds a recorded video (and optionally a cached landmark stream from
+extract_landmarks.py) through the game headless, with a fixed virtual clock
+and a seeded RNG, and reports per-frame timings plus a final state hash.
+
+Usage:
+    python replay.py videos/session.mp4 --landmarks data/landmarks/session.npz
+    python replay.py videos/session.mp4 --landmarks data/landmarks/session.npz --output baseline.json
+    python replay.py videos/session.mp4 --landmarks data/landmarks/session.npz --baseline baseline.json
+    python replay.py videos/session.mp4 --profile data/replay_profile
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from fruit_ninja import FruitNinja
+from utils.landmark_cache import LandmarkStream, StreamLandmarkSource
+from utils.profiler import profiler
+from utils.video_processor import VideoProcessor
+
+PERCENTILES = (50, 95, 99)
+
+
+class VirtualClock:
+    """Clock that only moves when advanced, so replays do not depend on wall time"""
+    
+    def __init__(self, start: float = 0.0):
+        """
+        Initialize virtual clock
+        
+        Args:
+            start: Initial time in seconds
+        """
+        self.now = start
+    
+    def __call__(self) -> float:
+        """Current virtual time"""
+        return self.now
+    
+    def advance(self, dt: float):
+        """Move the clock forward by dt seconds"""
+        self.now += dt
+
+
+def frame_time_summary(frame_times: List[float]) -> Dict[str, float]:
+    """
+    Summarize per-frame times
+    
+    Args:
+        frame_times: Seconds per frame
+    
+    Returns:
+        Dictionary with mean, max and p50/p95/p99 in milliseconds
+    """
+    times_ms = np.asarray(frame_times, dtype=np.float64) * 1000
+    if len(times_ms) == 0:
+        return {}
+    summary = {f"p{p}": float(np.percentile(times_ms, p)) for p in PERCENTILES}
+    summary['mean'] = float(times_ms.mean())
+    summary['max'] = float(times_ms.max())
+    return summary
+
+
+def replay(video_path: str, landmarks_path: Optional[str] = None, seed: int = 0,
+           fps: Optional[float] = None, limit: Optional[int] = None,
+           mirror: bool = True, warmup: int = 5) -> Dict:
+    """
+    Run the game over a recorded video without a display
+    
+    Args:
+        video_path: Recorded video
+        landmarks_path: Cached landmark stream (.npz); None runs MediaPipe
+        seed: Fruit spawning seed
+        fps: Virtual frame rate (defaults to the video's)
+        limit: Maximum number of frames
+        mirror: Flip frames horizontally, as the live game does
+        warmup: Leading frames left out of the timings (first-touch costs)
+    
+    Returns:
+        Report with per-frame timings, summary statistics and hashes
+    """
+    cap = VideoProcessor.load_video(video_path)
+    if cap is None:
+        raise FileNotFoundError(video_path)
+    info = VideoProcessor.get_video_info(cap)
+    fps = fps or info['fps'] or 30.0
+    dt = 1.0 / fps
+    
+    extractor = None
+    if landmarks_path:
+        extractor = StreamLandmarkSource(LandmarkStream.load(landmarks_path), draw_in_place=True)
+    
+    clock = VirtualClock()
+    game = FruitNinja(width=info['width'], height=info['height'],
+                      clock=clock, seed=seed, landmark_extractor=extractor)
+    game.landmark_extractor.draw_in_place = True
+    
+    frame_times = []
+    frames = 0
+    frames_digest = hashlib.sha256()
+    try:
+        for frame_num, frame in VideoProcessor.read_frames(cap):
+            if limit is not None and frame_num >= limit:
+                break
+            if mirror:
+                frame = cv2.flip(frame, 1)
+            
+            clock.advance(dt)
+            start = time.perf_counter()
+            game_frame = game.update(frame, dt, clock())
+            if frame_num >= warmup:
+                frame_times.append(time.perf_counter() - start)
+            frames_digest.update(game_frame.tobytes())
+            frames += 1
+    finally:
+        cap.release()
+        game.close()
+    
+    return {
+        'video': video_path,
+        'landmarks': landmarks_path,
+        'seed': seed,
+        'fps': fps,
+        'frames': frames,
+        'score': game.score,
+        'lives': game.lives,
+        'state_hash': game.state_hash(),
+        'frames_hash': frames_digest.hexdigest(),
+        'frame_ms': frame_time_summary(frame_times),
+        'frame_times': frame_times,
+    }
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compare a replay report against a baseline report
+    
+    Args:
+        report: Current run
+        baseline: Stored run of the same recording
+        tolerance: Allowed relative slowdown of each percentile (0.1 = 10%)
+    
+    Returns:
+        List of failure messages (empty if the run passes)
+    """
+    failures = []
+    if report['state_hash'] != baseline.get('state_hash'):
+        failures.append(f"state hash changed: {baseline.get('state_hash')} -> {report['state_hash']}")
+    for p in PERCENTILES:
+        key = f"p{p}"
+        old = baseline.get('frame_ms', {}).get(key)
+        new = report['frame_ms'].get(key)
+        if old is None or new is None:
+            continue
+        if new > old * (1 + tolerance):
+            failures.append(f"{key} frame time regressed: {old:.2f} ms -> {new:.2f} ms "
+                            f"(+{(new / old - 1) * 100:.0f}%)")
+    return failures
+
+
+def main():
+    """Replay a recording and optionally check it against a baseline"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', help="Recorded video file")
+    parser.add_argument('--landmarks', help="Cached landmark stream (.npz) from extract_landmarks.py")
+    parser.add_argument('--seed', type=int, default=0, help="Fruit spawning seed")
+    parser.add_argument('--fps', type=float, help="Virtual frame rate (default: the video's)")
+    parser.add_argument('--limit', type=int, help="Replay at most this many frames")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Replay N times; timings are pooled and hashes must match")
+    parser.add_argument('--warmup', type=int, default=5,
+                        help="Leading frames excluded from the timings (default: 5)")
+    parser.add_argument('--no-mirror', action='store_true', help="Do not flip frames horizontally")
+    parser.add_argument('--output', help="Write the report as JSON (e.g. to use as a baseline)")
+    parser.add_argument('--baseline', help="Fail if slower than or different from this report")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed relative p50/p95/p99 slowdown vs the baseline (default: 0.10)")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Time each stage of the frame and write PATH.json and PATH.csv")
+    args = parser.parse_args()
+    profiler.enabled = bool(args.profile)
+    
+    runs = [replay(args.video, args.landmarks, seed=args.seed, fps=args.fps,
+                   limit=args.limit, mirror=not args.no_mirror, warmup=args.warmup)
+            for _ in range(max(1, args.repeat))]
+    report = runs[0]
+    failures = []
+    if len({run['state_hash'] for run in runs}) > 1:
+        failures.append("replay is not deterministic: state hashes differ between runs")
+    report['frame_times'] = [t for run in runs for t in run['frame_times']]
+    report['frame_ms'] = frame_time_summary(report['frame_times'])
+    report['runs'] = len(runs)
+    
+    summary = report['frame_ms']
+    print(f"Replayed {report['frames']} frames x {len(runs)} run(s): "
+          f"score {report['score']}, lives {report['lives']}")
+    print("Frame time: " + ", ".join(f"{k} {v:.2f} ms" for k, v in summary.items()))
+    print(f"State hash: {report['state_hash']}")
+    
+    if args.profile:
+        report['profile'] = profiler.summary()
+        for name, entry in report['profile'].items():
+            print(f"  {name:<26} p50 {entry['p50_ms']:7.2f}  p99 {entry['p99_ms']:7.2f}  "
+                  f"total {entry['total_ms']:9.1f} ms")
+        for suffix in ('.json', '.csv'):
+            profiler.dump(args.profile + suffix)
+        print(f"Profile written to {args.profile}.json/.csv")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(report, json.load(f), args.tolerance)
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    if args.baseline:
+        print("OK: matches baseline")
+
+
+if __name__ == "__main__":
+    main()
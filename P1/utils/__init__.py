@@ -4,6 +4,7 @@ Utilities for computer vision projects
 from .landmark_extractor import LandmarkExtractor
 from .video_processor import VideoProcessor
 from .image_loader import FruitImageLoader
+from .compositing import AlphaCompositor
 
-__all__ = ['LandmarkExtractor', 'VideoProcessor', 'FruitImageLoader']
+__all__ = ['LandmarkExtractor', 'VideoProcessor', 'FruitImageLoader', 'AlphaCompositor']
 
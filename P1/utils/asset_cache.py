@@ -0,0 +1,130 @@
+"""
+Disk cache of pre-rendered sprite atlases
+
+A bundle is one flat .npy file with every premultiplied, pre-scaled and
+pre-rotated sprite, plus a small JSON file with the atlas parameters (fruit
+types, sizes, rotation steps) and the atlas byte size. The (fruit, size)
+blocks are laid out in that order, so their offsets follow from the
+parameters. Bundles are keyed by the source images' mtime and size and by
+the atlas parameters, so editing an asset or changing sprite sizes builds a
+new bundle. Loading maps the file instead of decoding any PNG.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# Bump when the atlas layout or rendering changes
+BUNDLE_VERSION = 1
+
+
+def bundle_key(sources: Sequence[Path], params: Dict) -> str:
+    """
+    Key identifying the source images and atlas parameters
+    
+    Args:
+        sources: Source image paths (missing files are part of the key)
+        params: Atlas parameters (sizes, rotation steps, ...)
+    
+    Returns:
+        Short hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps({'version': BUNDLE_VERSION, **params}, sort_keys=True).encode())
+    for path in sources:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{Path(path).name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+        except FileNotFoundError:
+            digest.update(f"{Path(path).name}:missing".encode())
+    return digest.hexdigest()[:16]
+
+
+class SpriteBundle:
+    """Reads and writes memory-mappable sprite atlas bundles"""
+    
+    def __init__(self, cache_dir: str = "assets/cache"):
+        """
+        Initialize sprite bundle store
+        
+        Args:
+            cache_dir: Directory holding sprites-<key>.npy/.json pairs
+        """
+        self.cache_dir = Path(cache_dir)
+    
+    def paths(self, key: str) -> Tuple[Path, Path]:
+        """Atlas and index paths for a key"""
+        return self.cache_dir / f"sprites-{key}.npy", self.cache_dir / f"sprites-{key}.json"
+    
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, Dict]]:
+        """
+        Map a bundle into memory
+        
+        Args:
+            key: Bundle key
+        
+        Returns:
+            Tuple of (read-only flat uint8 atlas, parameters) or None on a miss
+        """
+        atlas_path, index_path = self.paths(key)
+        if not atlas_path.exists() or not index_path.exists():
+            return None
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            atlas = np.load(atlas_path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if atlas.nbytes != index.get('nbytes'):
+            return None
+        return atlas, index
+    
+    def save(self, key: str, atlas: np.ndarray, index: Dict):
+        """
+        Write a bundle; bundles with other keys are left for prune()
+        
+        Other loaders (or processes) may still be mapping or about to load
+        them, so saving never removes anything.
+        
+        Args:
+            key: Bundle key
+            atlas: Flat uint8 atlas
+            index: Atlas parameters (JSON serializable)
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        atlas_path, index_path = self.paths(key)
+        
+        # Write to per-process temporary files, then rename them into place, so
+        # readers and concurrent writers never see a torn bundle. The atlas
+        # goes first: load() needs both files and checks their sizes agree
+        tmp_atlas = self.cache_dir / f".{atlas_path.name}.{os.getpid()}.tmp"
+        with open(tmp_atlas, 'wb') as f:
+            np.save(f, atlas)
+        os.replace(tmp_atlas, atlas_path)
+        tmp_index = self.cache_dir / f".{index_path.name}.{os.getpid()}.tmp"
+        with open(tmp_index, 'w') as f:
+            json.dump({**index, 'nbytes': int(atlas.nbytes)}, f)
+        os.replace(tmp_index, index_path)
+    
+    def prune(self, keep: Sequence[str]) -> int:
+        """
+        Delete bundles whose key is not in `keep`
+        
+        Run it as a separate step (fruit_ninja.py --prune-cache), when no
+        other loader needs the old bundles.
+        
+        Args:
+            keep: Keys of the bundles to keep
+        
+        Returns:
+            Number of files removed
+        """
+        keep_paths = {path for key in keep for path in self.paths(key)}
+        removed = 0
+        for path in self.cache_dir.glob("sprites-*"):
+            if path not in keep_paths:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,188 @@
+"""
+Batched slice-vs-fruit collision detection
+"""
+import math
+import numpy as np
+from typing import Optional, Tuple
+
+# Squared lengths below this are treated as degenerate (point) segments
+_EPSILON = 1e-9
+
+
+def segment_circle_intersect(p1: Tuple[float, float], p2: Tuple[float, float],
+                             center: Tuple[float, float], radius: float) -> bool:
+    """
+    Check if a line segment crosses a circle's boundary (scalar reference)
+    
+    Args:
+        p1: Start point of line
+        p2: End point of line
+        center: Circle center
+        radius: Circle radius
+    
+    Returns:
+        True if line intersects circle
+    """
+    # Vector from p1 to p2
+    dx = p2[0] - p1[0]
+    dy = p2[1] - p1[1]
+    
+    # Vector from p1 to circle center
+    fx = p1[0] - center[0]
+    fy = p1[1] - center[1]
+    
+    # Calculate discriminant
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - radius * radius
+    
+    discriminant = b * b - 4 * a * c
+    
+    if discriminant < 0 or a == 0:
+        return False
+    
+    # Check if intersection point is on the line segment
+    t1 = (-b - math.sqrt(discriminant)) / (2 * a)
+    t2 = (-b + math.sqrt(discriminant)) / (2 * a)
+    
+    return (0 <= t1 <= 1) or (0 <= t2 <= 1)
+
+
+def segment_segment_distance_sq(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Squared closest distance between every pair of segments
+    
+    Args:
+        a: (N, 2, 2) array of segments [[x1, y1], [x2, y2]]
+        b: (M, 2, 2) array of segments
+    
+    Returns:
+        (N, M) array of squared distances
+    """
+    p1 = a[:, None, 0, :]
+    d1 = a[:, None, 1, :] - p1
+    q1 = b[None, :, 0, :]
+    d2 = b[None, :, 1, :] - q1
+    r = p1 - q1
+    
+    aa = np.einsum('ijk,ijk->ij', d1, d1)
+    ee = np.einsum('ijk,ijk->ij', d2, d2)
+    bb = np.einsum('ijk,ijk->ij', d1, d2)
+    cc = np.einsum('ijk,ijk->ij', d1, r)
+    ff = np.einsum('ijk,ijk->ij', d2, r)
+    aa, ee = np.broadcast_arrays(aa, ee)
+    
+    a_point = aa <= _EPSILON
+    e_point = ee <= _EPSILON
+    safe_a = np.where(a_point, 1.0, aa)
+    safe_e = np.where(e_point, 1.0, ee)
+    
+    # Closest points of the infinite lines, clamped to the first segment
+    denom = aa * ee - bb * bb
+    parallel = denom <= _EPSILON
+    s = np.clip((bb * ff - cc * ee) / np.where(parallel, 1.0, denom), 0.0, 1.0)
+    s = np.where(parallel, 0.0, s)
+    
+    # Matching point on the second segment, re-clamping s if t leaves [0, 1]
+    t = (bb * s + ff) / safe_e
+    s = np.where(t < 0.0, np.clip(-cc / safe_a, 0.0, 1.0), s)
+    s = np.where(t > 1.0, np.clip((bb - cc) / safe_a, 0.0, 1.0), s)
+    t = np.clip(t, 0.0, 1.0)
+    
+    # Degenerate cases: either segment is a point
+    s = np.where(a_point, 0.0, s)
+    t = np.where(a_point, np.clip(ff / safe_e, 0.0, 1.0), t)
+    s = np.where(e_point, np.clip(-cc / safe_a, 0.0, 1.0), s)
+    t = np.where(e_point, 0.0, t)
+    s = np.where(a_point & e_point, 0.0, s)
+    
+    diff = (p1 + d1 * s[..., None]) - (q1 + d2 * t[..., None])
+    return np.einsum('ijk,ijk->ij', diff, diff)
+
+
+def grid_candidates(segments: np.ndarray, centers: np.ndarray, margin: float,
+                    cell_size: float) -> np.ndarray:
+    """
+    Uniform-grid broadphase: fruits whose cell is near any slice segment
+    
+    Every segment's bounding box, grown by `margin`, is rasterized onto a
+    coarse grid with a 2D difference array, so marking all segments is a
+    single vectorized scatter plus two cumulative sums.
+    
+    Args:
+        segments: (M, 2, 2) array of slice segments
+        centers: (N, 2) array of fruit centers
+        margin: Distance within which a fruit may still hit a segment
+        cell_size: Grid cell side length in pixels
+    
+    Returns:
+        Boolean mask (N,) of fruits that need the exact test
+    """
+    origin = centers.min(axis=0)
+    fruit_cells = ((centers - origin) // cell_size).astype(np.intp)
+    grid_w, grid_h = fruit_cells.max(axis=0) + 1
+    
+    lo = np.floor((segments.min(axis=1) - margin - origin) / cell_size).astype(np.intp)
+    hi = np.floor((segments.max(axis=1) + margin - origin) / cell_size).astype(np.intp)
+    lo = np.clip(lo, 0, [grid_w, grid_h])
+    hi = np.clip(hi + 1, 0, [grid_w, grid_h])
+    
+    # Difference array: +1/-1 at box corners, prefix sums give coverage counts
+    coverage = np.zeros((grid_h + 1, grid_w + 1), dtype=np.int32)
+    np.add.at(coverage, (lo[:, 1], lo[:, 0]), 1)
+    np.add.at(coverage, (lo[:, 1], hi[:, 0]), -1)
+    np.add.at(coverage, (hi[:, 1], lo[:, 0]), -1)
+    np.add.at(coverage, (hi[:, 1], hi[:, 0]), 1)
+    np.cumsum(coverage, axis=0, out=coverage)
+    np.cumsum(coverage, axis=1, out=coverage)
+    
+    return coverage[fruit_cells[:, 1], fruit_cells[:, 0]] > 0
+
+
+def slice_hits(segments: np.ndarray, centers: np.ndarray, radii: np.ndarray,
+               prev_centers: Optional[np.ndarray] = None,
+               cell_size: Optional[float] = None) -> np.ndarray:
+    """
+    Find every fruit touched by any slice segment
+    
+    Fruits are treated as swept circles (capsules from `prev_centers` to
+    `centers`), so a fast fruit cannot tunnel through a slice between
+    frames, and a long fast swipe is one segment rather than two samples.
+    
+    Args:
+        segments: (M, 2, 2) slice segments from this frame and/or trail history
+        centers: (N, 2) fruit centers
+        radii: (N,) fruit radii
+        prev_centers: (N, 2) fruit centers at the previous frame (optional)
+        cell_size: Broadphase grid cell size; None picks twice the largest
+            radius, 0 disables the broadphase
+    
+    Returns:
+        Boolean hit mask (N,)
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    hits = np.zeros(len(centers), dtype=bool)
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    if len(centers) == 0 or len(segments) == 0:
+        return hits
+    radii = np.asarray(radii, dtype=np.float64)
+    if prev_centers is None:
+        prev_centers = centers
+    prev_centers = np.asarray(prev_centers, dtype=np.float64).reshape(-1, 2)
+    
+    if cell_size is None:
+        cell_size = 2.0 * float(radii.max())
+    if cell_size > 0:
+        travel = np.sqrt(((centers - prev_centers) ** 2).sum(axis=1)).max()
+        candidates = np.flatnonzero(grid_candidates(segments, centers,
+                                                    float(radii.max()) + travel,
+                                                    cell_size))
+    else:
+        candidates = np.arange(len(centers))
+    if len(candidates) == 0:
+        return hits
+    
+    paths = np.stack([prev_centers[candidates], centers[candidates]], axis=1)
+    distance_sq = segment_segment_distance_sq(paths, segments)
+    hits[candidates] = (distance_sq <= (radii[candidates] ** 2)[:, None]).any(axis=1)
+    return hits
@@ -0,0 +1,162 @@
+"""
+Integer alpha compositing of premultiplied sprites onto video frames
+
+All arithmetic is done in uint16 with preallocated scratch buffers, so a
+blit allocates no per-pixel float temporaries:
+
+    dst = src_premultiplied + dst * (255 - alpha) / 255
+
+Channel shuffles (splitting BGRA into color and broadcast alpha planes) are
+done with OpenCV, which is much faster than NumPy on 3/4-channel strides.
+"""
+import cv2
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+
+class AlphaCompositor:
+    """Blends premultiplied BGRA sprites into BGR frames in place"""
+    
+    def __init__(self, max_sprite_size: int = 256):
+        """
+        Initialize compositor
+        
+        Args:
+            max_sprite_size: Initial scratch buffer side length; buffers grow
+                automatically if a larger sprite is blitted
+        """
+        self._capacity = 0
+        self._ensure_scratch(max_sprite_size, max_sprite_size)
+    
+    def _ensure_scratch(self, h: int, w: int):
+        """Grow scratch buffers to hold at least an h x w region"""
+        if h * w <= self._capacity:
+            return
+        self._capacity = h * w
+        # Flat buffers so that every (h, w, c) view taken from them is contiguous
+        self._color8 = np.empty(h * w * 3, dtype=np.uint8)
+        self._alpha8 = np.empty(h * w, dtype=np.uint8)
+        self._inv_alpha8 = np.empty(h * w * 3, dtype=np.uint8)
+        self._acc16 = np.empty(h * w * 3, dtype=np.uint16)
+        self._tmp16 = np.empty(h * w * 3, dtype=np.uint16)
+    
+    def _views(self, h: int, w: int):
+        """Contiguous h x w views into the scratch buffers"""
+        n = h * w
+        return (self._color8[:n * 3].reshape(h, w, 3),
+                self._alpha8[:n].reshape(h, w),
+                self._inv_alpha8[:n * 3].reshape(h, w, 3),
+                self._acc16[:n * 3].reshape(h, w, 3),
+                self._tmp16[:n * 3].reshape(h, w, 3))
+    
+    @staticmethod
+    def clip(frame_shape: Tuple[int, ...], sprite_shape: Tuple[int, ...],
+             x: int, y: int) -> Optional[Tuple[slice, slice, slice, slice]]:
+        """
+        Clip a sprite placed with its top-left corner at (x, y) to the frame
+        
+        Args:
+            frame_shape: Shape of the destination frame
+            sprite_shape: Shape of the sprite
+            x: Left edge of the sprite in frame coordinates
+            y: Top edge of the sprite in frame coordinates
+        
+        Returns:
+            (dst_rows, dst_cols, src_rows, src_cols) slices or None if the
+            sprite is entirely off-frame
+        """
+        frame_h, frame_w = frame_shape[:2]
+        h, w = sprite_shape[:2]
+        src_x1 = max(0, -x)
+        src_y1 = max(0, -y)
+        src_x2 = min(w, frame_w - x)
+        src_y2 = min(h, frame_h - y)
+        if src_x2 <= src_x1 or src_y2 <= src_y1:
+            return None
+        return (slice(y + src_y1, y + src_y2), slice(x + src_x1, x + src_x2),
+                slice(src_y1, src_y2), slice(src_x1, src_x2))
+    
+    def blit(self, frame: np.ndarray, sprite: np.ndarray, x: int, y: int) -> bool:
+        """
+        Composite a premultiplied BGRA sprite into a BGR frame in place
+        
+        Args:
+            frame: Destination frame (H x W x 3, uint8), modified in place
+            sprite: Premultiplied sprite (h x w x 4, uint8)
+            x: Left edge of the sprite in frame coordinates
+            y: Top edge of the sprite in frame coordinates
+        
+        Returns:
+            True if any part of the sprite was drawn
+        """
+        clipped = self.clip(frame.shape, sprite.shape, x, y)
+        if clipped is None:
+            return False
+        dst_rows, dst_cols, src_rows, src_cols = clipped
+        
+        src = sprite[src_rows, src_cols]
+        dst = frame[dst_rows, dst_cols]
+        h, w = src.shape[:2]
+        self._ensure_scratch(h, w)
+        color, alpha, inv_alpha, acc, tmp = self._views(h, w)
+        
+        # Split premultiplied color and (255 - alpha) broadcast to 3 channels
+        cv2.cvtColor(src, cv2.COLOR_BGRA2BGR, dst=color)
+        cv2.extractChannel(src, 3, dst=alpha)
+        cv2.bitwise_not(alpha, dst=alpha)
+        cv2.cvtColor(alpha, cv2.COLOR_GRAY2BGR, dst=inv_alpha)
+        
+        # dst * (255 - alpha), at most 255 * 255 so it fits in uint16
+        np.copyto(acc, dst)
+        np.copyto(tmp, inv_alpha)
+        acc *= tmp
+        
+        # Exact rounded division by 255: (v + 128 + ((v + 128) >> 8)) >> 8
+        acc += 128
+        np.right_shift(acc, 8, out=tmp)
+        acc += tmp
+        acc >>= 8
+        
+        # Premultiplied color never overflows: src <= alpha, dst term <= 255 - alpha
+        np.copyto(tmp, color)
+        acc += tmp
+        np.copyto(dst, acc, casting='unsafe')
+        return True
+    
+    def blit_centered(self, frame: np.ndarray, sprite: np.ndarray,
+                      cx: float, cy: float) -> bool:
+        """Composite a sprite centered at (cx, cy)"""
+        h, w = sprite.shape[:2]
+        return self.blit(frame, sprite, int(cx) - w // 2, int(cy) - h // 2)
+    
+    def blit_many(self, frame: np.ndarray, sprites: Sequence[np.ndarray],
+                  positions: np.ndarray) -> int:
+        """
+        Composite many sprites in one pass
+        
+        Args:
+            frame: Destination frame (H x W x 3, uint8), modified in place
+            sprites: Premultiplied BGRA sprites, drawn in order
+            positions: (N, 2) array of sprite centers (x, y)
+        
+        Returns:
+            Number of sprites that were at least partially drawn
+        """
+        if len(sprites) == 0:
+            return 0
+        positions = np.asarray(positions)
+        sizes = np.array([s.shape[:2] for s in sprites], dtype=np.int32)
+        
+        # Vectorized placement and frame rejection before touching pixels
+        tops = positions[:, 1].astype(np.int32) - sizes[:, 0] // 2
+        lefts = positions[:, 0].astype(np.int32) - sizes[:, 1] // 2
+        frame_h, frame_w = frame.shape[:2]
+        visible = ((lefts < frame_w) & (tops < frame_h) &
+                   (lefts + sizes[:, 1] > 0) & (tops + sizes[:, 0] > 0))
+        
+        self._ensure_scratch(int(sizes[:, 0].max()), int(sizes[:, 1].max()))
+        
+        drawn = 0
+        for i in np.flatnonzero(visible):
+            drawn += self.blit(frame, sprites[i], int(lefts[i]), int(tops[i]))
+        return drawn
@@ -0,0 +1,279 @@
+"""
+Structure-of-arrays storage and physics for game fruits
+"""
+import math
+
+import numpy as np
+from typing import Optional
+
+
+class FruitPool:
+    """Stores every fruit in preallocated NumPy arrays with a free-list
+    
+    At game sizes (a few dozen fruits) a frame pays for NumPy calls, not
+    arithmetic, so the per-step work is kept to as few calls as possible:
+    - Position and rotation share one state array, double-buffered with the
+      previous step's, and motion * dt is cached while no fruit changes, so
+      a step is a buffer swap and one add
+    - reap only compares positions once the fastest fruit may have covered
+      the distance the nearest one had left to the bottom of the screen, or
+      once a slice may have expired; positions must only be moved by step
+    """
+    
+    def __init__(self, capacity: int = 64, sliced_linger: float = 0.1):
+        """
+        Initialize fruit pool
+        
+        Args:
+            capacity: Initial number of fruit slots (grows by doubling when full)
+            sliced_linger: Seconds a sliced fruit is kept before its slot is freed
+        """
+        self.sliced_linger = sliced_linger
+        self.capacity = 0
+        self._free_count = 0
+        # Earliest slice time of a lingering fruit, so reap skips the expiry test
+        self._first_sliced = math.inf
+        # Screen height the off-screen limits were computed for
+        self._height = None
+        # Distance left to the bottom at the last full reap, and the most any
+        # fruit has moved down since
+        self._reach = -math.inf
+        self._travel = 0.0
+        # dt the cached motion * dt is for (None when motion changed)
+        self._dt = None
+        self._current = 0
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int):
+        """Allocate (or grow) the per-fruit arrays, keeping existing fruits"""
+        old = self.capacity
+        
+        def grow(array: Optional[np.ndarray], shape, dtype, fill=0) -> np.ndarray:
+            new = np.full(shape, fill, dtype=dtype)
+            if array is not None:
+                new[:old] = array
+            return new
+        
+        # Columns x, y, rotation of this step and the previous one; step swaps
+        # them, and position, rotation and their prev_ versions are views
+        buffers = []
+        for buffer in getattr(self, '_buffers', [(None,), (None,)]):
+            state = grow(buffer[0], (capacity, 3), np.float32)
+            buffers.append((state, state[:, :2], state[:, 2]))
+        self._buffers = buffers
+        self._bind()
+        # vx, vy, rotation speed of fruits that move this step; 0 otherwise (free or sliced)
+        self._motion = grow(getattr(self, '_motion', None), (capacity, 3), np.float32)
+        self._step = np.zeros((capacity, 3), dtype=np.float32)
+        self._dt = None
+        
+        self.sweep_origin = grow(getattr(self, 'sweep_origin', None), (capacity, 2), np.float32)
+        self.velocity = grow(getattr(self, 'velocity', None), (capacity, 2), np.float32)
+        self.rotation_speed = grow(getattr(self, 'rotation_speed', None), capacity, np.float32)
+        self.size = grow(getattr(self, 'size', None), capacity, np.float32)
+        self.type_index = grow(getattr(self, 'type_index', None), capacity, np.int16)
+        self.score_value = grow(getattr(self, 'score_value', None), capacity, np.int32)
+        self.alive = grow(getattr(self, 'alive', None), capacity, bool)
+        self.sliced = grow(getattr(self, 'sliced', None), capacity, bool)
+        # inf unless sliced, so one comparison finds the expired fruits
+        self.sliced_time = grow(getattr(self, 'sliced_time', None), capacity, np.float64, np.inf)
+        
+        # height + size: a fruit below it has left the screen; inf for free slots
+        self._limit = grow(getattr(self, '_limit', None), capacity, np.float32, np.inf)
+        self._moving = grow(getattr(self, '_moving', None), capacity, bool)
+        self._mask = np.zeros(capacity, dtype=bool)
+        self._mask2 = np.zeros(capacity, dtype=bool)
+        
+        # Free-list as a stack of slot indices; lowest indices are reused first
+        free = np.zeros(capacity, dtype=np.int32)
+        if old:
+            free[:self._free_count] = self._free[:self._free_count]
+        new_slots = np.arange(capacity - 1, old - 1, -1, dtype=np.int32)
+        free[self._free_count:self._free_count + len(new_slots)] = new_slots
+        self._free = free
+        self._free_count += len(new_slots)
+        self.capacity = capacity
+    
+    def _bind(self):
+        """Point the state attributes at the current and previous buffers"""
+        self._state, self.position, self.rotation = self._buffers[self._current]
+        self._prev_state, self.prev_position, self.prev_rotation = self._buffers[1 - self._current]
+    
+    def __len__(self) -> int:
+        """Number of live fruits (including sliced fruits still lingering)"""
+        return self.capacity - self._free_count
+    
+    def spawn(self, type_index: int, x: float, y: float, vx: float, vy: float,
+              size: float, rotation: float, rotation_speed: float,
+              score_value: int) -> int:
+        """
+        Add a fruit to the pool
+        
+        Args:
+            type_index: Index of the fruit type
+            x: Starting x position
+            y: Starting y position
+            vx: Horizontal velocity (pixels per second)
+            vy: Vertical velocity (pixels per second)
+            size: Fruit radius
+            rotation: Initial rotation in degrees
+            rotation_speed: Rotation speed in degrees per second
+            score_value: Points awarded when sliced
+        
+        Returns:
+            Slot index of the new fruit
+        """
+        if self._free_count == 0:
+            self._allocate(max(1, self.capacity * 2))
+        self._free_count -= 1
+        i = int(self._free[self._free_count])
+        
+        self._state[i] = (x, y, rotation)
+        self._prev_state[i] = self._state[i]
+        self._motion[i] = (vx, vy, rotation_speed)
+        self.sweep_origin[i] = (x, y)
+        self.velocity[i] = (vx, vy)
+        self.rotation_speed[i] = rotation_speed
+        self.size[i] = size
+        self.type_index[i] = type_index
+        self.score_value[i] = score_value
+        self.alive[i] = True
+        self.sliced[i] = False
+        self._moving[i] = True
+        self._dt = None
+        if self._height is not None:
+            self._limit[i] = self.size[i] + self._height
+            self._reach = min(self._reach, self._travel + float(self._limit[i]) - y - 1.0)
+        return i
+    
+    def step(self, dt: float):
+        """
+        Advance every moving fruit in one vectorized update
+        
+        Args:
+            dt: Delta time in seconds
+        """
+        if dt != self._dt:
+            np.multiply(self._motion, dt, out=self._step)
+            self._dt = dt
+            self._max_fall = max(0.0, float(self._step[:, 1].max()))
+        
+        # The current state becomes the previous one, for interpolated rendering
+        self._current = 1 - self._current
+        self._bind()
+        np.add(self._prev_state, self._step, out=self._state)
+        self._travel += self._max_fall
+    
+    def begin_sweep(self):
+        """
+        Start a new collision sweep at the current positions
+        
+        Slice tests cover each fruit's path from the sweep origin to its
+        current position, which may span several simulation steps.
+        """
+        np.copyto(self.sweep_origin, self.position)
+    
+    def interpolate(self, indices: np.ndarray, alpha: float):
+        """
+        Blend the previous and current step for rendering between steps
+        
+        Args:
+            indices: Slot indices to interpolate
+            alpha: Fraction of a step elapsed since the last step (0..1)
+        
+        Returns:
+            Tuple of ((len(indices), 2) positions, (len(indices),) rotations)
+        """
+        prev_position = self.prev_position[indices]
+        prev_rotation = self.prev_rotation[indices]
+        positions = prev_position + (self.position[indices] - prev_position) * alpha
+        rotations = prev_rotation + (self.rotation[indices] - prev_rotation) * alpha
+        return positions, rotations
+    
+    def mark_sliced(self, indices: np.ndarray, now: float) -> int:
+        """
+        Mark fruits as sliced
+        
+        Args:
+            indices: Slot indices of the fruits hit by a slice
+            now: Current time in seconds
+        
+        Returns:
+            Total score value of the newly sliced fruits
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        indices = indices[self.alive[indices] & ~self.sliced[indices]]
+        self.sliced[indices] = True
+        self.sliced_time[indices] = now
+        self._moving[indices] = False
+        self._motion[indices] = 0.0
+        if len(indices):
+            self._first_sliced = min(self._first_sliced, now)
+            self._dt = None
+        return int(self.score_value[indices].sum())
+    
+    def reap(self, height: int, now: float) -> int:
+        """
+        Free fruits that left the screen or finished lingering after a slice
+        
+        Args:
+            height: Screen height in pixels
+            now: Current time in seconds
+        
+        Returns:
+            Number of unsliced fruits that fell off the bottom of the screen
+        """
+        expiring = now - self.sliced_linger > self._first_sliced
+        if height != self._height:
+            self._height = height
+            np.add(self.size, height, out=self._limit)
+            self._limit[~self.alive] = np.inf
+        elif not expiring and self._travel < self._reach:
+            # Fast path: no fruit can have crossed the bottom, no slice has expired
+            return 0
+        
+        # off_screen = alive & (y > height + size)
+        off_screen = np.greater(self.position[:, 1], self._limit, out=self._mask)
+        missed = int(np.count_nonzero(off_screen & ~self.sliced))
+        if expiring:
+            # expired = now - sliced_time > linger; sliced_time is inf unless sliced
+            off_screen |= np.less(self.sliced_time, now - self.sliced_linger, out=self._mask2)
+        if off_screen.any():
+            self.free(np.flatnonzero(off_screen))
+        
+        # 1 px margin covers float32 rounding of the accumulated steps
+        self._reach = float(np.min(self._limit - self.position[:, 1])) - 1.0
+        self._travel = 0.0
+        return missed
+    
+    def free(self, indices: np.ndarray):
+        """
+        Return slots to the free-list
+        
+        Args:
+            indices: Slot indices of live fruits to remove
+        """
+        indices = np.asarray(indices, dtype=np.int32)
+        self.alive[indices] = False
+        self.sliced[indices] = False
+        self.sliced_time[indices] = np.inf
+        self._moving[indices] = False
+        self._motion[indices] = 0.0
+        self._limit[indices] = np.inf
+        self._dt = None
+        self._first_sliced = float(self.sliced_time.min())
+        
+        # Push in descending order so the lowest index is popped first
+        count = len(indices)
+        self._free[self._free_count:self._free_count + count] = indices[::-1]
+        self._free_count += count
+    
+    def active_indices(self) -> np.ndarray:
+        """Slot indices of live, unsliced fruits"""
+        return np.flatnonzero(self._moving)
+    
+    def clear(self):
+        """Remove all fruits"""
+        live = np.flatnonzero(self.alive)
+        if len(live):
+            self.free(live)
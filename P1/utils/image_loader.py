@@ -4,45 +4,62 @@ Utility for loading and managing fruit images
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Sequence, Set, Tuple
 import os
+import math
+
+from .asset_cache import SpriteBundle, bundle_key
 
 
 class FruitImageLoader:
     """Loads and manages fruit images"""
     
-    def __init__(self, assets_dir: str = "assets/fruits"):
+    def __init__(self, assets_dir: str = "assets/fruits",
+                 sprite_sizes: Sequence[int] = (80, 100, 120),
+                 rotation_steps: int = 64,
+                 atlas_budget_mb: Optional[float] = 96.0,
+                 cache_dir: Optional[str] = "assets/cache",
+                 fruit_types: Optional[Sequence[str]] = None):
         """
         Initialize image loader
         
+        Images are decoded lazily on first use. If a cached sprite bundle
+        matches the current assets and atlas settings, the atlas is memory
+        mapped from it and no image is decoded at all.
+        
         Args:
             assets_dir: Directory containing fruit images
+            sprite_sizes: Sprite sizes (in pixels) pre-rendered into the atlas
+            rotation_steps: Number of quantized rotation angles per sprite
+            atlas_budget_mb: Memory budget for the sprite atlas in megabytes.
+                Rotation steps are halved until the atlas fits; None or 0
+                disables the atlas (sprites are rotated per frame instead)
+            cache_dir: Directory for the memory-mappable sprite bundle
+                (None disables the disk cache)
+            fruit_types: Fruit names (defaults to the five built-in fruits)
         """
         self.assets_dir = Path(assets_dir)
         self.images: Dict[str, np.ndarray] = {}
-        self.fruit_types = ['apple', 'banana', 'orange', 'watermelon', 'pineapple']
-        self.load_images()
-    
-    def load_images(self):
-        """Load all fruit images from assets directory"""
-        # Create directory if it doesn't exist
-        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        self.fruit_types = list(fruit_types or ['apple', 'banana', 'orange', 'watermelon', 'pineapple'])
+        self.bundle = SpriteBundle(cache_dir) if cache_dir else None
         
-        # Try to load images, if not found, create placeholder images
-        for fruit_type in self.fruit_types:
-            image_path = self.assets_dir / f"{fruit_type}.png"
-            
-            if image_path.exists():
-                img = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
-                if img is not None:
-                    self.images[fruit_type] = img
-                    print(f"Loaded image: {fruit_type}.png")
-                else:
-                    self.images[fruit_type] = self._create_placeholder(fruit_type)
-            else:
-                # Create a placeholder image if file doesn't exist
-                self.images[fruit_type] = self._create_placeholder(fruit_type)
-                self._save_placeholder(fruit_type, self.images[fruit_type])
+        # Sprite atlas: one contiguous premultiplied BGRA buffer holding every
+        # fruit type x size x rotation, plus views into it for fast lookup
+        self.atlas: Optional[np.ndarray] = None
+        self.atlas_sizes = np.array(sorted(sprite_sizes), dtype=np.int32)
+        self.rotation_steps = rotation_steps
+        self._sprites: Dict[Tuple[str, int], np.ndarray] = {}
+        self._pending: Set[str] = set()  # Fruit types not yet rendered into the atlas
+        self._bundle_key: Optional[str] = None
+        
+        if atlas_budget_mb:
+            self.build_sprite_atlas(atlas_budget_mb)
+    
+    def _decode(self, fruit_type: str) -> np.ndarray:
+        """Decode a fruit image, or draw a placeholder (in memory only) if missing"""
+        image_path = self.assets_dir / f"{fruit_type}.png"
+        img = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED) if image_path.exists() else None
+        return img if img is not None else self._create_placeholder(fruit_type)
     
     def _create_placeholder(self, fruit_type: str, size: int = 100) -> np.ndarray:
         """
@@ -87,11 +104,228 @@ class FruitImageLoader:
         
         return img
     
-    def _save_placeholder(self, fruit_type: str, img: np.ndarray):
-        """Save placeholder image to file"""
-        output_path = self.assets_dir / f"{fruit_type}.png"
-        cv2.imwrite(str(output_path), img)
-        print(f"Created placeholder image: {fruit_type}.png")
+    @staticmethod
+    def atlas_canvas_size(size: int) -> int:
+        """Canvas side length that fits a size x size sprite at any rotation"""
+        return int(math.ceil(size * math.sqrt(2))) + 2
+    
+    def estimate_atlas_bytes(self, rotation_steps: int) -> int:
+        """
+        Estimate the memory needed by the sprite atlas
+        
+        Args:
+            rotation_steps: Number of quantized rotation angles
+            
+        Returns:
+            Size of the atlas in bytes
+        """
+        per_type = sum(self.atlas_canvas_size(int(s)) ** 2 * 4 for s in self.atlas_sizes)
+        return per_type * rotation_steps * len(self.fruit_types)
+    
+    def build_sprite_atlas(self, budget_mb: float = 96.0, lazy: bool = True) -> bool:
+        """
+        Set up the atlas holding every fruit type, size and rotation
+        
+        Sprites are stored with premultiplied alpha so that drawing only
+        needs a single multiply-add per pixel and no warps per frame. A
+        matching cached bundle is memory mapped; otherwise each fruit type is
+        rendered when it is first drawn (or now, if not lazy), and the bundle
+        is written once every type has been rendered.
+        
+        Args:
+            budget_mb: Maximum atlas size in megabytes
+            lazy: Render fruit types on first use instead of now
+            
+        Returns:
+            True if the atlas is available, False if it does not fit the budget
+        """
+        budget = budget_mb * 1024 * 1024
+        steps = self.rotation_steps
+        while steps > 4 and self.estimate_atlas_bytes(steps) > budget:
+            steps //= 2
+        if self.estimate_atlas_bytes(steps) > budget:
+            print(f"Sprite atlas does not fit in {budget_mb} MB, rotating per frame")
+            self.atlas = None
+            self._sprites.clear()
+            self._pending.clear()
+            return False
+        
+        if steps != self.rotation_steps:
+            print(f"Sprite atlas: reduced rotation steps {self.rotation_steps} -> {steps} "
+                  f"to fit {budget_mb} MB")
+        self.rotation_steps = steps
+        
+        sources = [self.assets_dir / f"{fruit_type}.png" for fruit_type in self.fruit_types]
+        self._bundle_key = bundle_key(sources, {
+            'fruit_types': self.fruit_types,
+            'sizes': [int(s) for s in self.atlas_sizes],
+            'rotation_steps': steps,
+        })
+        cached = self.bundle.load(self._bundle_key) if self.bundle else None
+        if cached is not None:
+            self.atlas = cached[0]
+            self._pending.clear()
+        else:
+            self.atlas = np.zeros(self.estimate_atlas_bytes(steps), dtype=np.uint8)
+            self._pending = set(self.fruit_types)
+        
+        # Views of every (fruit, size) block: (steps, canvas, canvas, 4)
+        self._sprites.clear()
+        offset = 0
+        for fruit_type in self.fruit_types:
+            for size in self.atlas_sizes:
+                canvas = self.atlas_canvas_size(int(size))
+                count = steps * canvas * canvas * 4
+                self._sprites[(fruit_type, int(size))] = \
+                    self.atlas[offset:offset + count].reshape(steps, canvas, canvas, 4)
+                offset += count
+        
+        source = "mapped from cache" if cached is not None else "rendered on first use"
+        print(f"Sprite atlas: {len(self.fruit_types)} fruits x {len(self.atlas_sizes)} sizes "
+              f"x {steps} angles ({self.atlas.nbytes / (1024 * 1024):.1f} MB, {source})")
+        
+        if not lazy:
+            for fruit_type in list(self._pending):
+                self._render_fruit(fruit_type)
+        return True
+    
+    def _render_fruit(self, fruit_type: str):
+        """Render all sizes and rotations of one fruit type into the atlas"""
+        steps = self.rotation_steps
+        base = self.to_bgra(self.get_image(fruit_type))
+        for size in self.atlas_sizes:
+            size = int(size)
+            canvas = self.atlas_canvas_size(size)
+            frames = self._sprites[(fruit_type, size)]
+            
+            # Premultiply before warping so edges blend without dark fringes
+            sprite = self.premultiply(self.resize_image(base, size))
+            center = (canvas / 2.0, canvas / 2.0)
+            for step in range(steps):
+                matrix = cv2.getRotationMatrix2D((size / 2.0, size / 2.0),
+                                                 step * 360.0 / steps, 1.0)
+                matrix[0, 2] += center[0] - size / 2.0
+                matrix[1, 2] += center[1] - size / 2.0
+                cv2.warpAffine(sprite, matrix, (canvas, canvas), dst=frames[step],
+                               flags=cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_CONSTANT,
+                               borderValue=(0, 0, 0, 0))
+        
+        self._pending.discard(fruit_type)
+        if not self._pending and self.bundle is not None:
+            self.bundle.save(self._bundle_key, self.atlas, {
+                'fruit_types': self.fruit_types,
+                'sizes': [int(s) for s in self.atlas_sizes],
+                'rotation_steps': steps,
+            })
+    
+    def warm_up(self) -> int:
+        """
+        Render every fruit type still missing from the atlas
+        
+        Call before the game loop starts, so a cold start does not render a
+        whole fruit type (all sizes and rotations) inside a drawn frame.
+        
+        Returns:
+            Number of fruit types rendered
+        """
+        pending = [fruit_type for fruit_type in self.fruit_types if fruit_type in self._pending]
+        for fruit_type in pending:
+            self._render_fruit(fruit_type)
+        return len(pending)
+    
+    def prune_cache(self) -> int:
+        """
+        Delete cached sprite bundles other than the one for the current settings
+        
+        Returns:
+            Number of files removed
+        """
+        if self.bundle is None or self._bundle_key is None:
+            return 0
+        return self.bundle.prune([self._bundle_key])
+    
+    @property
+    def has_atlas(self) -> bool:
+        """Whether pre-rendered sprites are available"""
+        return self.atlas is not None
+    
+    def get_sprite(self, fruit_type: str, size: float, angle: float) -> Optional[np.ndarray]:
+        """
+        Look up a pre-rendered, premultiplied sprite from the atlas
+        
+        Args:
+            fruit_type: Type of fruit
+            size: Desired sprite size in pixels (snapped to the nearest bucket)
+            angle: Rotation angle in degrees (snapped to the nearest step)
+            
+        Returns:
+            BGRA view into the atlas (premultiplied alpha) or None if unavailable
+        """
+        if self.atlas is None:
+            return None
+        bucket = int(self.atlas_sizes[np.abs(self.atlas_sizes - size).argmin()])
+        frames = self._sprites.get((fruit_type, bucket))
+        if frames is None:
+            return None
+        if fruit_type in self._pending:
+            self._render_fruit(fruit_type)
+        step = int(round(angle * self.rotation_steps / 360.0)) % self.rotation_steps
+        return frames[step]
+    
+    def render_sprite(self, fruit_type: str, size: float, angle: float) -> Optional[np.ndarray]:
+        """
+        Get a premultiplied sprite, rotating on the fly if the atlas is unavailable
+        
+        Args:
+            fruit_type: Type of fruit
+            size: Sprite size in pixels
+            angle: Rotation angle in degrees
+            
+        Returns:
+            BGRA image with premultiplied alpha or None if the fruit has no image
+        """
+        sprite = self.get_sprite(fruit_type, size, angle)
+        if sprite is not None:
+            return sprite
+        base = self.get_image(fruit_type)
+        if base is None:
+            return None
+        resized = self.resize_image(self.to_bgra(base), int(size))
+        return self.premultiply(self.rotate_image(resized, angle))
+    
+    @staticmethod
+    def to_bgra(img: np.ndarray) -> np.ndarray:
+        """
+        Add an opaque alpha channel to grayscale or BGR images
+        
+        Args:
+            img: Input image
+            
+        Returns:
+            BGRA image (the input itself if it already has alpha)
+        """
+        if img.ndim == 2:
+            return cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)
+        if img.shape[2] == 3:
+            return cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+        return img
+    
+    @staticmethod
+    def premultiply(img: np.ndarray) -> np.ndarray:
+        """
+        Convert a BGRA image to premultiplied alpha
+        
+        Args:
+            img: BGRA image with straight alpha
+            
+        Returns:
+            BGRA image with color channels scaled by alpha
+        """
+        out = img.copy()
+        alpha = img[:, :, 3:4].astype(np.uint16)
+        out[:, :, :3] = (img[:, :, :3] * alpha + 127) // 255
+        return out
     
     def get_image(self, fruit_type: str) -> Optional[np.ndarray]:
         """
@@ -103,7 +337,11 @@ class FruitImageLoader:
         Returns:
             Image array or None if not found
         """
-        return self.images.get(fruit_type)
+        img = self.images.get(fruit_type)
+        if img is None and fruit_type in self.fruit_types:
+            # Decode on first use
+            img = self.images[fruit_type] = self._decode(fruit_type)
+        return img
     
     def rotate_image(self, img: np.ndarray, angle: float) -> np.ndarray:
         """
@@ -0,0 +1,239 @@
+"""
+Pipelined hand landmark inference decoupled from rendering
+"""
+import threading
+import time
+import numpy as np
+from typing import Optional
+
+from .landmark_extractor import LandmarkExtractor, NUM_LANDMARKS
+
+# Landmark copies kept by results; the extractor reuses its own buffer per call
+_RESULT_SLOTS = 4
+
+
+class LandmarkResult:
+    """Landmarks computed for one captured frame"""
+    
+    def __init__(self, frame_id: int, capture_time: float, hands: np.ndarray,
+                 results: object, inference_time: float):
+        """
+        Initialize landmark result
+        
+        Args:
+            frame_id: Sequence number of the submitted frame
+            capture_time: Capture timestamp of the frame (seconds)
+            hands: (hands, 63) flattened landmarks of every detected hand
+            results: Raw MediaPipe results (used for drawing)
+            inference_time: Seconds spent in MediaPipe
+        """
+        self.frame_id = frame_id
+        self.capture_time = capture_time
+        self.hands = hands
+        self.landmarks = hands[0] if len(hands) else None
+        self.results = results
+        self.inference_time = inference_time
+
+
+class AsyncLandmarkStage:
+    """Runs landmark inference on a worker thread while the game renders"""
+    
+    def __init__(self,
+                 extractor: Optional[LandmarkExtractor] = None,
+                 max_latency: float = 0.15,
+                 infer_every: int = 1,
+                 max_hand_speed: float = 10.0,
+                 min_hand_jump: float = 0.05):
+        """
+        Initialize the inference stage
+        
+        Args:
+            extractor: LandmarkExtractor used by the worker (created if None)
+            max_latency: Latency budget in seconds. Landmarks older than this at
+                render time are discarded, and extrapolation never reaches further
+                than this past the newest result
+            infer_every: Run inference on every Nth submitted frame only; frames
+                in between are covered by extrapolation
+            max_hand_speed: Fastest plausible wrist, in (normalized) frame sizes
+                per second; a hand of the newest result is only blended with a
+                hand of the previous one within this speed times their interval
+            min_hand_jump: Smallest such allowed wrist move (normalized)
+        """
+        self.extractor = extractor or LandmarkExtractor()
+        self.max_latency = max_latency
+        self.infer_every = max(1, infer_every)
+        self.max_hand_speed = max_hand_speed
+        self.min_hand_jump = min_hand_jump
+        
+        self._cond = threading.Condition()
+        self._pending: Optional[np.ndarray] = None
+        self._working: Optional[np.ndarray] = None
+        self._pending_time = 0.0
+        self._pending_id = -1
+        self._has_pending = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._submitted = 0
+        
+        max_hands = getattr(self.extractor, 'max_num_hands', 2)
+        self._result_landmarks = np.zeros((_RESULT_SLOTS, max_hands, NUM_LANDMARKS * 3),
+                                          dtype=np.float32)
+        self._result_slot = 0
+        
+        # Two newest results, used to interpolate/extrapolate to render time
+        self.previous: Optional[LandmarkResult] = None
+        self.latest: Optional[LandmarkResult] = None
+        
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+    
+    def start(self):
+        """Start the worker thread"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="AsyncLandmarkStage", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the worker thread"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+    
+    def submit(self, frame: np.ndarray, capture_time: float) -> bool:
+        """
+        Queue a frame for inference
+        
+        The frame is copied into a preallocated buffer. If the worker has not
+        picked up the previous frame yet, that frame is replaced (newest wins).
+        
+        Args:
+            frame: Camera frame (BGR)
+            capture_time: Capture timestamp of the frame
+        
+        Returns:
+            True if the frame was queued, False if it was skipped
+        """
+        self._submitted += 1
+        if (self._submitted - 1) % self.infer_every != 0:
+            self.frames_skipped += 1
+            return False
+        
+        with self._cond:
+            if self._pending is None or self._pending.shape != frame.shape:
+                self._pending = np.empty_like(frame)
+            np.copyto(self._pending, frame)
+            self._pending_time = capture_time
+            self._pending_id = self._submitted
+            self._has_pending = True
+            self._cond.notify_all()
+        return True
+    
+    def _worker(self):
+        """Worker loop: take the newest pending frame and run MediaPipe on it"""
+        while True:
+            with self._cond:
+                while self._running and not self._has_pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                # Swap buffers so submit() can keep writing while we infer
+                self._pending, self._working = self._working, self._pending
+                capture_time = self._pending_time
+                frame_id = self._pending_id
+                self._has_pending = False
+            
+            start = time.perf_counter()
+            hands, results = self.extractor.detect_hands(self._working)
+            count = min(len(hands), self._result_landmarks.shape[1])
+            slot = self._result_landmarks[self._result_slot, :count]
+            self._result_slot = (self._result_slot + 1) % _RESULT_SLOTS
+            np.copyto(slot, hands[:count])
+            result = LandmarkResult(frame_id, capture_time, slot, results,
+                                    time.perf_counter() - start)
+            
+            with self._cond:
+                self.previous, self.latest = self.latest, result
+                self.frames_inferred += 1
+    
+    def predict_hands(self, render_time: float) -> np.ndarray:
+        """
+        Estimate the landmarks of every hand at render time
+        
+        Linearly interpolates between (or extrapolates from) the two newest
+        results. Extrapolation is capped at the latency budget. Each hand of
+        the newest result is blended with the previous hand whose wrist is
+        nearest (pairs taken nearest first), and only if the wrist could have
+        moved that far in between; other hands are returned as detected.
+        
+        Args:
+            render_time: Timestamp the landmarks should correspond to
+                (normally the capture time of the frame being rendered)
+        
+        Returns:
+            (hands, 63) landmarks; empty if no fresh hand is available
+        """
+        with self._cond:
+            previous, latest = self.previous, self.latest
+        if latest is None or render_time - latest.capture_time > self.max_latency:
+            return self._result_landmarks[0, :0]
+        if previous is None or not len(previous.hands) or not len(latest.hands):
+            return latest.hands
+        
+        span = latest.capture_time - previous.capture_time
+        if span <= 0:
+            return latest.hands
+        pairs = self._match_hands(previous.hands, latest.hands, span)
+        if not pairs:
+            return latest.hands
+        target = min(render_time, latest.capture_time + self.max_latency)
+        alpha = (target - previous.capture_time) / span
+        hands = latest.hands.copy()
+        for i, j in pairs:
+            hands[i] = previous.hands[j] + (latest.hands[i] - previous.hands[j]) * alpha
+        return hands
+    
+    def _match_hands(self, previous: np.ndarray, latest: np.ndarray, span: float):
+        """
+        Pair hands of two results by wrist position
+        
+        Returns:
+            List of (latest index, previous index), nearest wrists first
+        """
+        # Landmark 0 is the wrist; compare its (x, y)
+        offsets = latest[:, None, :2] - previous[None, :, :2]
+        distances = np.hypot(offsets[..., 0], offsets[..., 1])
+        reach = max(self.min_hand_jump, self.max_hand_speed * span)
+        pairs = []
+        used_latest, used_previous = set(), set()
+        for flat in np.argsort(distances, axis=None):
+            i, j = divmod(int(flat), distances.shape[1])
+            if distances[i, j] > reach:
+                break
+            if i not in used_latest and j not in used_previous:
+                pairs.append((i, j))
+                used_latest.add(i)
+                used_previous.add(j)
+        return pairs
+    
+    def predict_landmarks(self, render_time: float) -> Optional[np.ndarray]:
+        """
+        Estimate the first hand's landmarks at render time
+        
+        Args:
+            render_time: Timestamp the landmarks should correspond to
+        
+        Returns:
+            Flattened landmarks or None if no fresh hand is available
+        """
+        hands = self.predict_hands(render_time)
+        return hands[0] if len(hands) else None
+    
+    def landmark_age(self, render_time: float) -> Optional[float]:
+        """Seconds between the newest landmark capture and render time"""
+        latest = self.latest
+        return None if latest is None else render_time - latest.capture_time
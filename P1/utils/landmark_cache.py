@@ -0,0 +1,283 @@
+"""
+Columnar storage and content-hash cache for offline landmark streams
+"""
+import hashlib
+import json
+import os
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FEATURES = 63  # 21 landmarks * (x, y, z)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class LandmarkStream:
+    """Landmarks for every frame of a source, stored as flat columns
+    
+    One row per detected hand: frame index, hand index and 63 floats. Rows
+    are sorted by frame, so the hands of a frame are a contiguous slice.
+    """
+    
+    def __init__(self,
+                 frame_index: np.ndarray,
+                 hand_index: np.ndarray,
+                 landmarks: np.ndarray,
+                 num_frames: int,
+                 fps: float = 30.0,
+                 width: int = 0,
+                 height: int = 0,
+                 source: str = ""):
+        """
+        Initialize landmark stream
+        
+        Args:
+            frame_index: (K,) frame number of each row
+            hand_index: (K,) hand number within its frame
+            landmarks: (K, 63) flattened landmarks
+            num_frames: Number of frames in the source (including frames without hands)
+            fps: Source frame rate
+            width: Source frame width
+            height: Source frame height
+            source: Path of the source video or image directory
+        """
+        self.frame_index = np.asarray(frame_index, dtype=np.int32)
+        self.hand_index = np.asarray(hand_index, dtype=np.int8)
+        self.landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, FEATURES)
+        self.num_frames = int(num_frames)
+        self.fps = float(fps)
+        self.width = int(width)
+        self.height = int(height)
+        self.source = source
+        
+        # Row range of each frame, computed once for O(1) lookups
+        frames = np.arange(self.num_frames + 1)
+        self._offsets = np.searchsorted(self.frame_index, frames, side='left')
+    
+    def __len__(self) -> int:
+        """Number of frames"""
+        return self.num_frames
+    
+    def frame_landmarks(self, frame: int) -> np.ndarray:
+        """
+        Get all hands detected in a frame
+        
+        Args:
+            frame: Frame number
+        
+        Returns:
+            (hands, 63) view of the landmark column (empty if no hand)
+        """
+        return self.landmarks[self._offsets[frame]:self._offsets[frame + 1]]
+    
+    def save(self, path: str):
+        """
+        Save the stream as an uncompressed .npz (one array per column)
+        
+        Args:
+            path: Output file path
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path,
+                 frame_index=self.frame_index,
+                 hand_index=self.hand_index,
+                 landmarks=self.landmarks,
+                 meta=np.array(json.dumps({
+                     'num_frames': self.num_frames,
+                     'fps': self.fps,
+                     'width': self.width,
+                     'height': self.height,
+                     'source': self.source,
+                 })))
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'LandmarkStream':
+        """
+        Load a stream saved with save()
+        
+        Args:
+            path: .npz file path
+        
+        Returns:
+            LandmarkStream instance
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(data['frame_index'], data['hand_index'], data['landmarks'], **meta)
+    
+    @classmethod
+    def concatenate(cls, parts: Iterable['LandmarkStream'], **kwargs) -> 'LandmarkStream':
+        """
+        Join streams covering consecutive frame ranges
+        
+        Args:
+            parts: Streams whose frame indices are already global and ordered
+            **kwargs: Metadata for the joined stream (num_frames, fps, ...)
+        
+        Returns:
+            Combined LandmarkStream
+        """
+        parts = list(parts)
+        return cls(np.concatenate([p.frame_index for p in parts]) if parts else [],
+                   np.concatenate([p.hand_index for p in parts]) if parts else [],
+                   np.concatenate([p.landmarks for p in parts]) if parts else np.zeros((0, FEATURES)),
+                   **kwargs)
+
+
+class StreamLandmarkSource:
+    """Plays a LandmarkStream back through the LandmarkExtractor interface
+    
+    Each detect/process call consumes the next frame of the stream, so a game
+    fed the recorded video frame by frame sees exactly the cached landmarks
+    without running MediaPipe.
+    """
+    
+    def __init__(self, stream: LandmarkStream, draw_in_place: bool = False):
+        """
+        Initialize stream source
+        
+        Args:
+            stream: Landmarks to play back
+            draw_in_place: If True, draw landmarks directly on the input frame
+        """
+        self.stream = stream
+        self.draw_in_place = draw_in_place
+        self.frame = 0
+    
+    def _next(self) -> np.ndarray:
+        """Hands of the next frame ((0, 63) once the stream is exhausted)"""
+        if self.frame >= self.stream.num_frames:
+            return self.stream.landmarks[:0]
+        hands = self.stream.frame_landmarks(self.frame)
+        self.frame += 1
+        return hands
+    
+    def extract_landmarks(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """First hand of the next frame or None"""
+        hands = self._next()
+        return hands[0] if len(hands) else None
+    
+    def extract_all_hands_landmarks(self, image: np.ndarray) -> List[np.ndarray]:
+        """All hands of the next frame"""
+        return list(self._next())
+    
+    def detect(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Take the next frame's landmarks
+        
+        Returns:
+            Tuple of (first hand or None, all hands of the frame as "results")
+        """
+        hands = self._next()
+        return (hands[0] if len(hands) else None), hands
+    
+    def detect_hands(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Take the next frame's landmarks
+        
+        Returns:
+            Tuple of ((hands, 63) landmarks, the same array as "results")
+        """
+        hands = self._next()
+        return hands, hands
+    
+    def draw_landmarks(self, image: np.ndarray, results: np.ndarray,
+                       in_place: Optional[bool] = None) -> np.ndarray:
+        """Draw the recorded landmark points"""
+        if in_place is None:
+            in_place = self.draw_in_place
+        image_out = image if in_place else image.copy()
+        height, width = image_out.shape[:2]
+        for hand in results:
+            for x, y in hand.reshape(-1, 3)[:, :2]:
+                cv2.circle(image_out, (int(x * width), int(y * height)), 2, (0, 255, 0), -1)
+        return image_out
+    
+    def process_frame(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Take the next frame's landmarks and draw them
+        
+        Returns:
+            Tuple of (first hand or None, frame with landmarks drawn)
+        """
+        landmarks, hands = self.detect(frame)
+        return landmarks, self.draw_landmarks(frame, hands)
+
+
+def list_images(directory: str) -> List[Path]:
+    """Image files of a directory in frame order"""
+    return sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def content_hash(source: str, params: Optional[Dict] = None, chunk_size: int = 1 << 20) -> str:
+    """
+    Hash the content of a video file or image directory plus extraction parameters
+    
+    Args:
+        source: Video path or image directory
+        params: Extraction parameters that affect the output
+        chunk_size: Read size in bytes
+    
+    Returns:
+        Hex digest identifying this (content, parameters) pair
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params or {}, sort_keys=True).encode())
+    
+    files = list_images(source) if os.path.isdir(source) else [Path(source)]
+    for path in files:
+        digest.update(path.name.encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LandmarkCache:
+    """Directory of landmark streams keyed by content hash"""
+    
+    def __init__(self, cache_dir: str = "data/landmark_cache"):
+        """
+        Initialize landmark cache
+        
+        Args:
+            cache_dir: Directory holding <hash>.npz files
+        """
+        self.cache_dir = Path(cache_dir)
+    
+    def path(self, key: str) -> Path:
+        """File path for a cache key"""
+        return self.cache_dir / f"{key}.npz"
+    
+    def get(self, key: str) -> Optional[LandmarkStream]:
+        """
+        Load a cached stream
+        
+        Args:
+            key: Content hash
+        
+        Returns:
+            LandmarkStream or None on a cache miss
+        """
+        path = self.path(key)
+        if not path.exists():
+            return None
+        return LandmarkStream.load(str(path))
+    
+    def put(self, key: str, stream: LandmarkStream) -> Path:
+        """
+        Store a stream
+        
+        Args:
+            key: Content hash
+            stream: Landmarks to cache
+        
+        Returns:
+            Path of the cached file
+        """
+        path = self.path(key)
+        stream.save(str(path))
+        return path
@@ -6,15 +6,20 @@ import mediapipe as mp
 import numpy as np
 from typing import List, Tuple, Optional
 
+from .profiler import profiler
+
+NUM_LANDMARKS = 21
+
 
 class LandmarkExtractor:
     """Extract hand landmarks using MediaPipe"""
     
-    def __init__(self, 
+    def __init__(self,
                  static_image_mode=False,
                  max_num_hands=2,
                  min_detection_confidence=0.5,
-                 min_tracking_confidence=0.5):
+                 min_tracking_confidence=0.5,
+                 draw_in_place=False):
         """
         Initialize MediaPipe hands solution
         
@@ -23,6 +28,8 @@ class LandmarkExtractor:
             max_num_hands: Maximum number of hands to detect
             min_detection_confidence: Minimum confidence for detection
             min_tracking_confidence: Minimum confidence for tracking
+            draw_in_place: If True, draw landmarks directly on the input frame
+                instead of on a copy
         """
         self.mp_hands = mp.solutions.hands
         self.hands = self.mp_hands.Hands(
@@ -32,34 +39,76 @@ class LandmarkExtractor:
             min_tracking_confidence=min_tracking_confidence
         )
         self.mp_drawing = mp.solutions.drawing_utils
+        self.draw_in_place = draw_in_place
+        self.max_num_hands = max_num_hands
+        
+        # Preallocated outputs, reused on every call
+        self.landmarks = np.zeros((max_num_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.num_hands = 0
+        self._rgb: Optional[np.ndarray] = None
+        self._landmark_spec = self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+        self._connection_spec = self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+    
+    def _to_rgb(self, image: np.ndarray) -> np.ndarray:
+        """Convert BGR to RGB into a reused buffer"""
+        if self._rgb is None or self._rgb.shape != image.shape:
+            self._rgb = np.empty_like(image)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return self._rgb
+    
+    def _process(self, image: np.ndarray):
+        """Run MediaPipe on a BGR image"""
+        with profiler.scope("landmarks.mediapipe"):
+            return self.hands.process(self._to_rgb(image))
+    
+    def _fill_landmarks(self, results) -> int:
+        """
+        Copy MediaPipe landmarks into the preallocated buffer
+        
+        Args:
+            results: MediaPipe results object
+        
+        Returns:
+            Number of hands written
+        """
+        count = 0
+        if results.multi_hand_landmarks:
+            for hand_landmarks in results.multi_hand_landmarks[:self.max_num_hands]:
+                out = self.landmarks[count]
+                for i, landmark in enumerate(hand_landmarks.landmark):
+                    out[i, 0] = landmark.x
+                    out[i, 1] = landmark.y
+                    out[i, 2] = landmark.z
+                count += 1
+        self.num_hands = count
+        return count
+    
+    def hand(self, index: int) -> np.ndarray:
+        """
+        Flattened view (21 points * 3 coordinates = 63 features) of one hand
         
+        The view points into the extractor's buffer and is overwritten by the
+        next call; copy it if it must be kept.
+        """
+        return self.landmarks[index].reshape(-1)
+    
     def extract_landmarks(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
         Extract hand landmarks from an image
         
         Args:
             image: Input image (BGR format)
-            
+        
         Returns:
             Flattened array of landmarks (21 points * 3 coordinates = 63 features)
-            Returns None if no hand detected
+            Returns None if no hand detected. The array is a view into a reused
+            buffer, valid until the next call.
         """
-        # Convert BGR to RGB
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = self._process(image)
         
-        # Process the image
-        results = self.hands.process(image_rgb)
-        
-        if results.multi_hand_landmarks:
-            # Get landmarks from the first detected hand
-            hand_landmarks = results.multi_hand_landmarks[0]
-            
-            # Extract landmark coordinates
-            landmarks = []
-            for landmark in hand_landmarks.landmark:
-                landmarks.extend([landmark.x, landmark.y, landmark.z])
-            
-            return np.array(landmarks)
+        if self._fill_landmarks(results):
+            # Landmarks from the first detected hand
+            return self.hand(0)
         
         return None
     
@@ -69,69 +118,89 @@ class LandmarkExtractor:
         
         Args:
             image: Input image (BGR format)
-            
+        
         Returns:
-            List of landmark arrays (one per hand)
+            List of landmark arrays (one per hand, views valid until the next call)
         """
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
-        
-        all_landmarks = []
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                landmarks = []
-                for landmark in hand_landmarks.landmark:
-                    landmarks.extend([landmark.x, landmark.y, landmark.z])
-                all_landmarks.append(np.array(landmarks))
-        
-        return all_landmarks
+        results = self._process(image)
+        count = self._fill_landmarks(results)
+        return [self.hand(i) for i in range(count)]
     
-    def draw_landmarks(self, image: np.ndarray, results) -> np.ndarray:
+    def draw_landmarks(self, image: np.ndarray, results, in_place: Optional[bool] = None) -> np.ndarray:
         """
         Draw landmarks on the image
         
         Args:
             image: Input image
             results: MediaPipe results object
-            
+            in_place: Draw directly on `image` instead of a copy
+                (defaults to the extractor's draw_in_place setting)
+        
         Returns:
             Image with landmarks drawn
         """
-        image_copy = image.copy()
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    image_copy,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    self.mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-                )
-        return image_copy
+        if in_place is None:
+            in_place = self.draw_in_place
+        with profiler.scope("landmarks.draw"):
+            image_out = image if in_place else image.copy()
+            if results.multi_hand_landmarks:
+                for hand_landmarks in results.multi_hand_landmarks:
+                    self.mp_drawing.draw_landmarks(
+                        image_out,
+                        hand_landmarks,
+                        self.mp_hands.HAND_CONNECTIONS,
+                        self._landmark_spec,
+                        self._connection_spec
+                    )
+        return image_out
     
-    def process_frame(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    def detect(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], object]:
         """
-        Process a single frame and extract landmarks
+        Run hand detection on a frame without drawing
         
         Args:
             frame: Input frame (BGR format)
-            
+        
         Returns:
-            Tuple of (landmarks array or None, frame with landmarks drawn)
+            Tuple of (landmarks view of the first hand or None, MediaPipe results)
         """
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        results = self._process(frame)
         
         landmarks = None
-        if results.multi_hand_landmarks:
-            hand_landmarks = results.multi_hand_landmarks[0]
-            landmarks = []
-            for landmark in hand_landmarks.landmark:
-                landmarks.extend([landmark.x, landmark.y, landmark.z])
-            landmarks = np.array(landmarks)
+        if self._fill_landmarks(results):
+            landmarks = self.hand(0)
         
-        # Draw landmarks on frame
-        annotated_frame = self.draw_landmarks(frame, results)
+        return landmarks, results
+    
+    def detect_hands(self, frame: np.ndarray) -> Tuple[np.ndarray, object]:
+        """
+        Run hand detection on a frame and return every hand
+        
+        Args:
+            frame: Input frame (BGR format)
+        
+        Returns:
+            Tuple of ((hands, 63) view of the landmark buffer, MediaPipe results)
+        """
+        results = self._process(frame)
+        count = self._fill_landmarks(results)
+        return self.landmarks[:count].reshape(count, -1), results
+    
+    def process_frame(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Process a single frame and extract landmarks
+        
+        Args:
+            frame: Input frame (BGR format)
+        
+        Returns:
+            Tuple of (landmarks array or None, frame with landmarks drawn)
+        """
+        with profiler.scope("landmarks.process_frame"):
+            landmarks, results = self.detect(frame)
+            
+            # Draw landmarks on frame
+            annotated_frame = self.draw_landmarks(frame, results)
         
         return landmarks, annotated_frame
     
@@ -139,4 +208,3 @@ class LandmarkExtractor:
         """Clean up resources"""
         if hasattr(self, 'hands'):
             self.hands.close()
-
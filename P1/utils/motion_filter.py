@@ -0,0 +1,90 @@
+"""
+One-Euro filtering of tracked points
+"""
+import math
+import numpy as np
+
+
+class OneEuroFilter:
+    """One-Euro low-pass filter for a fixed number of independent 2D points
+    
+    The cutoff frequency rises with speed: slow motion is smoothed heavily
+    (no jitter), fast motion passes through with little lag. The filtered
+    derivative doubles as a velocity estimate.
+    """
+    
+    def __init__(self, count: int, min_cutoff: float = 1.0, beta: float = 0.01,
+                 d_cutoff: float = 4.0):
+        """
+        Initialize filter
+        
+        Args:
+            count: Number of points filtered side by side (e.g. one per hand)
+            min_cutoff: Cutoff frequency (Hz) at rest
+            beta: Cutoff increase per unit of speed
+            d_cutoff: Cutoff frequency (Hz) of the derivative
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        
+        self.value = np.zeros((count, 2), dtype=np.float64)
+        self.velocity = np.zeros((count, 2), dtype=np.float64)
+        self.time = np.zeros(count, dtype=np.float64)
+        self.samples = np.zeros(count, dtype=np.int32)
+    
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        """Smoothing factor of a first-order low-pass at this cutoff and step"""
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+    
+    def reset(self, index: int):
+        """Forget the history of one point"""
+        self.samples[index] = 0
+        self.velocity[index] = 0.0
+    
+    def update(self, index: int, x: float, y: float, t: float):
+        """
+        Add a sample for one point
+        
+        The first sample initializes the point. The second seeds the velocity
+        with the raw finite difference, so a fast motion is visible as soon as
+        two samples exist instead of ramping up through the derivative filter.
+        
+        Args:
+            index: Point index
+            x: Raw x coordinate
+            y: Raw y coordinate
+            t: Sample time in seconds
+        
+        Returns:
+            Tuple of (filtered (2,) position view, (2,) velocity view per second)
+        """
+        value = self.value[index]
+        velocity = self.velocity[index]
+        samples = self.samples[index]
+        dt = t - self.time[index]
+        
+        if samples == 0:
+            value[0], value[1] = x, y
+        elif dt > 0:
+            raw_vx = (x - value[0]) / dt
+            raw_vy = (y - value[1]) / dt
+            if samples == 1:
+                velocity[0], velocity[1] = raw_vx, raw_vy
+            else:
+                a_d = self._alpha(self.d_cutoff, dt)
+                velocity[0] += a_d * (raw_vx - velocity[0])
+                velocity[1] += a_d * (raw_vy - velocity[1])
+            
+            speed = math.hypot(velocity[0], velocity[1])
+            a = self._alpha(self.min_cutoff + self.beta * speed, dt)
+            value[0] += a * (x - value[0])
+            value[1] += a * (y - value[1])
+        else:
+            return value, velocity
+        
+        self.time[index] = t
+        self.samples[index] = samples + 1
+        return value, velocity
@@ -0,0 +1,255 @@
+"""
+Scoped frame-time profiler
+
+Hot paths are wrapped in named scopes:
+
+    from utils.profiler import profiler
+    
+    with profiler.scope("render.fruits"):
+        ...
+
+While the profiler is disabled (the default) `scope` returns one shared no-op
+context manager, so instrumented code pays a method call and nothing else.
+When enabled, each scope's durations go into a log-linear (HDR-style)
+histogram: fixed memory, constant-time recording and a bounded relative
+error on every percentile, however many samples are recorded.
+"""
+import csv
+import json
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """Log-linear histogram of durations in microseconds
+    
+    Values below 2**sub_bucket_bits are counted exactly; above that, every
+    power of two is split into 2**(sub_bucket_bits - 1) equal buckets, so a
+    bucket is never wider than 2**-(sub_bucket_bits - 1) of its value.
+    """
+    
+    def __init__(self, sub_bucket_bits: int = 5, max_value_us: int = 60_000_000):
+        """
+        Initialize histogram
+        
+        Args:
+            sub_bucket_bits: Precision; 5 keeps percentiles within ~3%
+            max_value_us: Largest distinguishable value; larger ones are
+                counted in the last bucket
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.half_count = self.sub_bucket_count // 2
+        self.max_value_us = max_value_us
+        # A plain list: incrementing one element is much cheaper than on an ndarray
+        self.counts = [0] * (self._index(max_value_us) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+    
+    def _index(self, value: int) -> int:
+        """Bucket index of a value"""
+        exponent = max(value.bit_length() - self.sub_bucket_bits, 0)
+        if exponent == 0:
+            return value
+        return exponent * self.half_count + (value >> exponent)
+    
+    def _bucket_bounds(self, index: int):
+        """Lowest value and width of a bucket"""
+        if index < self.sub_bucket_count:
+            return index, 1
+        exponent = (index - self.sub_bucket_count) // self.half_count + 1
+        return (index - exponent * self.half_count) << exponent, 1 << exponent
+    
+    def record(self, value_us: int):
+        """Count one duration (microseconds)"""
+        value_us = min(max(value_us, 0), self.max_value_us)
+        self.counts[self._index(value_us)] += 1
+        if self.count == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.count += 1
+        self.total_us += value_us
+    
+    def percentile(self, p: float) -> float:
+        """
+        Duration at a percentile
+        
+        Args:
+            p: Percentile (0-100)
+        
+        Returns:
+            Middle of the bucket holding the percentile (microseconds), 0 if empty
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(np.ceil(p / 100.0 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        low, width = self._bucket_bounds(index)
+        return float(min(low + (width - 1) / 2.0, self.max_us))
+    
+    def buckets(self) -> List[List[int]]:
+        """Non-empty buckets as [lowest value (us), count] pairs"""
+        return [[self._bucket_bounds(int(i))[0], int(self.counts[i])]
+                for i in np.flatnonzero(self.counts)]
+    
+    def reset(self):
+        """Drop all samples"""
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+
+class _NullScope:
+    """Context manager that does nothing (profiling disabled)"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class _Scope:
+    """Times one execution of a block into a histogram"""
+    
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.record_ns(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class Profiler:
+    """Named scoped timers aggregated into histograms"""
+    
+    PERCENTILES = (50, 90, 99)
+    
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize profiler
+        
+        Args:
+            enabled: Start recording immediately
+        """
+        self.enabled = enabled
+        self.histograms: Dict[str, Histogram] = {}
+        # Scopes are also entered from the inference worker thread
+        self._lock = threading.Lock()
+    
+    def scope(self, name: str):
+        """
+        Context manager timing a block under `name`
+        
+        Args:
+            name: Scope name; dotted names ("update.render") group stages
+        
+        Returns:
+            Timing context manager, or a shared no-op one when disabled
+        """
+        if not self.enabled:
+            return _NULL_SCOPE
+        return _Scope(self, name)
+    
+    def record_ns(self, name: str, duration_ns: int):
+        """Record a duration measured elsewhere (nanoseconds)"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(duration_ns // 1000)
+    
+    def reset(self):
+        """Drop all recorded samples"""
+        with self._lock:
+            self.histograms.clear()
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Statistics per scope
+        
+        Returns:
+            Dictionary of scope name -> count, total, mean, min, max and
+            percentiles, all in milliseconds
+        """
+        with self._lock:
+            stats = {}
+            for name in sorted(self.histograms):
+                histogram = self.histograms[name]
+                entry = {
+                    'count': histogram.count,
+                    'total_ms': histogram.total_us / 1000.0,
+                    'mean_ms': histogram.total_us / 1000.0 / max(histogram.count, 1),
+                    'min_ms': histogram.min_us / 1000.0,
+                    'max_ms': histogram.max_us / 1000.0,
+                }
+                for p in self.PERCENTILES:
+                    entry[f'p{p}_ms'] = histogram.percentile(p) / 1000.0
+                stats[name] = entry
+            return stats
+    
+    def overlay_lines(self, prefix: Optional[str] = None) -> List[str]:
+        """
+        One line of text per scope for on-screen display
+        
+        Args:
+            prefix: Only include scopes starting with this prefix
+        """
+        return [f"{name}: p50 {entry['p50_ms']:.2f}  p99 {entry['p99_ms']:.2f} ms"
+                for name, entry in self.summary().items()
+                if prefix is None or name.startswith(prefix)]
+    
+    def dump(self, path: str):
+        """
+        Write the statistics to a file
+        
+        A .csv path gets one row per scope; anything else gets JSON with the
+        summary and the non-empty histogram buckets of each scope.
+        
+        Args:
+            path: Output file
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats = self.summary()
+        if path.suffix == '.csv':
+            columns = ['count', 'total_ms', 'mean_ms', 'min_ms', 'max_ms'] + \
+                      [f'p{p}_ms' for p in self.PERCENTILES]
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['scope'] + columns)
+                for name, entry in stats.items():
+                    writer.writerow([name] + [entry[c] for c in columns])
+            return
+        
+        with self._lock:
+            buckets = {name: histogram.buckets() for name, histogram in self.histograms.items()}
+        with open(path, 'w') as f:
+            json.dump({'unit': 'ms', 'bucket_unit': 'us',
+                       'scopes': {name: {**entry, 'buckets': buckets.get(name, [])}
+                                  for name, entry in stats.items()}}, f, indent=2)
+
+
+# Process-wide profiler used by the game's instrumented hot paths
+profiler = Profiler()
@@ -0,0 +1,190 @@
+"""
+Shared-memory ring buffer of camera frames and hand landmarks
+
+One producer process (a camera station) writes frames and their landmarks
+into fixed slots of a `multiprocessing.shared_memory` block; one consumer
+process (the game) reads them in the same order. Only the slot contents are
+shared; frames are never pickled. Two semaphores count free and filled
+slots, so a full ring makes the producer wait and an empty one makes the
+consumer wait. Rings may share a `notify` semaphore that counts filled slots
+across all of them, so one consumer can wait for whichever ring fills first.
+"""
+import multiprocessing as mp
+import os
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+from .landmark_extractor import NUM_LANDMARKS
+
+# Hand count written into a slot to mark the end of the stream
+END_OF_STREAM = -1
+
+
+def _align(offset: int, alignment: int = 64) -> int:
+    """Round an offset up to a cache-line boundary"""
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SharedFrameRing:
+    """Single-producer, single-consumer ring of (frame, hands, timestamp) slots"""
+    
+    def __init__(self, frame_shape: Tuple[int, int, int] = (480, 640, 3), slots: int = 4,
+                 max_hands: int = 2, context=None, notify=None):
+        """
+        Create the shared block and its semaphores
+        
+        The ring is passed to the other process as a Process argument; only
+        the block name, shapes and semaphores are pickled, and the child
+        attaches to the same memory.
+        
+        Args:
+            frame_shape: (height, width, channels) of every frame
+            slots: Number of frames in flight
+            max_hands: Hands stored per frame
+            context: multiprocessing context the processes are started from
+            notify: Semaphore released once per filled slot (optional, may be
+                shared by several rings)
+        """
+        context = context or mp.get_context()
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.max_hands = max_hands
+        self._free = context.Semaphore(slots)
+        self._filled = context.Semaphore(0)
+        self._notify = notify
+        
+        self._shm = shared_memory.SharedMemory(create=True, size=self._layout()[-1])
+        # Forked children inherit this object, so ownership goes by process
+        self._owner_pid = os.getpid()
+        self._attach()
+    
+    def _layout(self) -> Tuple[int, int, int, int, int]:
+        """Byte offsets of frames, landmarks, hand counts, timestamps and the total size"""
+        frames = 0
+        landmarks = _align(frames + self.slots * int(np.prod(self.frame_shape)))
+        counts = _align(landmarks + self.slots * self.max_hands * NUM_LANDMARKS * 3 * 4)
+        timestamps = _align(counts + self.slots * 4)
+        return frames, landmarks, counts, timestamps, _align(timestamps + self.slots * 8)
+    
+    def _attach(self):
+        """Create the array views onto the shared block"""
+        frames, landmarks, counts, timestamps, _ = self._layout()
+        buf = self._shm.buf
+        self.frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8,
+                                 buffer=buf, offset=frames)
+        self.landmarks = np.ndarray((self.slots, self.max_hands, NUM_LANDMARKS * 3),
+                                    dtype=np.float32, buffer=buf, offset=landmarks)
+        self.counts = np.ndarray((self.slots,), dtype=np.int32, buffer=buf, offset=counts)
+        self.timestamps = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=timestamps)
+        # Each side walks the slots in the same order, so indices stay local
+        self._write_index = 0
+        self._read_index = 0
+    
+    def __getstate__(self):
+        return {'name': self._shm.name, 'frame_shape': self.frame_shape, 'slots': self.slots,
+                'max_hands': self.max_hands, 'free': self._free, 'filled': self._filled,
+                'notify': self._notify, 'owner_pid': self._owner_pid}
+    
+    def __setstate__(self, state):
+        self.frame_shape = state['frame_shape']
+        self.slots = state['slots']
+        self.max_hands = state['max_hands']
+        self._free = state['free']
+        self._filled = state['filled']
+        self._notify = state['notify']
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._owner_pid = state['owner_pid']
+        self._attach()
+    
+    @property
+    def name(self) -> str:
+        """Name of the shared memory block"""
+        return self._shm.name
+    
+    def put(self, frame: np.ndarray, hands: np.ndarray, timestamp: float,
+            timeout: Optional[float] = None) -> bool:
+        """
+        Copy a frame and its landmarks into the next slot (producer side)
+        
+        Args:
+            frame: Frame of exactly `frame_shape`
+            hands: (n, 63) landmarks; hands beyond max_hands are dropped
+            timestamp: Capture time of the frame
+            timeout: Seconds to wait for a free slot (None waits forever)
+        
+        Returns:
+            True if written, False if the ring stayed full
+        """
+        if not self._free.acquire(timeout=timeout):
+            return False
+        slot = self._write_index
+        np.copyto(self.frames[slot], frame)
+        count = min(len(hands), self.max_hands)
+        self.landmarks[slot, :count] = hands[:count]
+        self.counts[slot] = count
+        self.timestamps[slot] = timestamp
+        self._publish(slot)
+        return True
+    
+    def put_end(self, timeout: Optional[float] = None) -> bool:
+        """Mark the end of the stream (producer side)"""
+        if not self._free.acquire(timeout=timeout):
+            return False
+        slot = self._write_index
+        self.counts[slot] = END_OF_STREAM
+        self._publish(slot)
+        return True
+    
+    def _publish(self, slot: int):
+        """Make a written slot visible to the consumer"""
+        self._write_index = (slot + 1) % self.slots
+        self._filled.release()
+        if self._notify is not None:
+            self._notify.release()
+    
+    def acquire(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Take the oldest filled slot (consumer side)
+        
+        The slot's `frame`, `hands` and `timestamp` stay valid until
+        `release` is called; the consumer may draw into the frame in place.
+        
+        Args:
+            timeout: Seconds to wait (0 polls, None waits forever)
+        
+        Returns:
+            Slot index, or None if nothing arrived in time
+        """
+        if not self._filled.acquire(timeout=timeout):
+            return None
+        slot = self._read_index
+        self._read_index = (slot + 1) % self.slots
+        return slot
+    
+    def release(self, slot: int):
+        """Hand a slot back to the producer (consumer side)"""
+        self._free.release()
+    
+    def is_end(self, slot: int) -> bool:
+        """Whether a slot marks the end of the stream"""
+        return self.counts[slot] == END_OF_STREAM
+    
+    def frame(self, slot: int) -> np.ndarray:
+        """Frame view of a slot"""
+        return self.frames[slot]
+    
+    def hands(self, slot: int) -> np.ndarray:
+        """(hands, 63) landmarks view of a slot"""
+        return self.landmarks[slot, :max(self.counts[slot], 0)]
+    
+    def timestamp(self, slot: int) -> float:
+        """Capture time of a slot's frame"""
+        return float(self.timestamps[slot])
+    
+    def close(self):
+        """Detach from the block; the creating process also frees it"""
+        self.frames = self.landmarks = self.counts = self.timestamps = None
+        self._shm.close()
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
@@ -0,0 +1,118 @@
+"""
+Persistent trail layer for hand paths and slice slashes
+
+Trails are drawn once into an overlay that fades over time, instead of
+redrawing every stored segment every frame:
+
+    overlay = overlay * decay - fade_step      (one in-place cv2.addWeighted)
+    frame   = saturate(frame + overlay)        (one cv2.add)
+
+The fade step makes old trails reach zero; a pure multiply would leave
+faint uint8 residue forever. Both operations are limited to the bounding box
+of primitives that can still be visible, so the cost follows the trail's
+extent rather than the frame size.
+"""
+import cv2
+import numpy as np
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+
+class TrailRenderer:
+    """Fading overlay that segments are drawn into once"""
+    
+    def __init__(self, half_life: float = 0.12, fade_step: float = 2.0):
+        """
+        Initialize trail renderer
+        
+        Args:
+            half_life: Seconds for a trail's brightness to halve
+            fade_step: Brightness (0-255) subtracted per decay, so trails
+                eventually disappear completely
+        """
+        self.half_life = half_life
+        self.fade_step = fade_step
+        self.overlay: Optional[np.ndarray] = None
+        
+        # [x0, y0, x1, y1, brightness bound] per drawn primitive, oldest first
+        self._regions: Deque[List[float]] = deque()
+    
+    def ensure(self, shape: Tuple[int, ...]):
+        """Allocate (or reallocate) the overlay for frames of this shape"""
+        if self.overlay is None or self.overlay.shape != shape:
+            self.overlay = np.zeros(shape, dtype=np.uint8)
+            self._regions.clear()
+    
+    def _mark(self, x0: int, y0: int, x1: int, y1: int):
+        """Remember the box of a new primitive, clipped to the overlay"""
+        height, width = self.overlay.shape[:2]
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(width, x1), min(height, y1)
+        if x0 < x1 and y0 < y1:
+            self._regions.append([x0, y0, x1, y1, 255.0])
+    
+    def dirty_rect(self) -> Optional[Tuple[int, int, int, int]]:
+        """Bounding box (x0, y0, x1, y1) of everything still visible, or None"""
+        if not self._regions:
+            return None
+        x0, y0, x1, y1, _ = self._regions[0]
+        for rx0, ry0, rx1, ry1, _ in self._regions:
+            x0, y0 = min(x0, rx0), min(y0, ry0)
+            x1, y1 = max(x1, rx1), max(y1, ry1)
+        return x0, y0, x1, y1
+    
+    def add_segment(self, start: Tuple[int, int], end: Tuple[int, int],
+                    color: Tuple[int, int, int], thickness: int = 2):
+        """Draw a new trail segment (drawn once, then only faded)"""
+        if self.overlay is None:
+            return
+        cv2.line(self.overlay, start, end, color, thickness, cv2.LINE_AA)
+        pad = thickness // 2 + 2
+        self._mark(min(start[0], end[0]) - pad, min(start[1], end[1]) - pad,
+                   max(start[0], end[0]) + pad + 1, max(start[1], end[1]) + pad + 1)
+    
+    def add_circle(self, center: Tuple[int, int], radius: int,
+                   color: Tuple[int, int, int], thickness: int = -1):
+        """Draw a new circle (e.g. a hit flash) into the trail layer"""
+        if self.overlay is None:
+            return
+        cv2.circle(self.overlay, center, radius, color, thickness, cv2.LINE_AA)
+        pad = radius + max(thickness, 0) // 2 + 2
+        self._mark(center[0] - pad, center[1] - pad, center[0] + pad + 1, center[1] + pad + 1)
+    
+    def decay(self, dt: float):
+        """
+        Fade the overlay by the time elapsed since the last decay
+        
+        Args:
+            dt: Seconds since the last decay
+        """
+        rect = self.dirty_rect()
+        if rect is None or dt <= 0:
+            return
+        factor = 0.5 ** (dt / self.half_life)
+        x0, y0, x1, y1 = rect
+        roi = self.overlay[y0:y1, x0:x1]
+        cv2.addWeighted(roi, factor, roi, 0.0, -self.fade_step, dst=roi)
+        
+        # Upper bound on each primitive's brightness (+0.5 for rounding);
+        # primitives that reached zero no longer need to be touched
+        for region in self._regions:
+            region[4] = region[4] * factor - self.fade_step + 0.5
+        while self._regions and self._regions[0][4] <= 0:
+            self._regions.popleft()
+    
+    def composite(self, frame: np.ndarray):
+        """Add the trail layer onto the frame in place (saturating)"""
+        rect = self.dirty_rect()
+        if rect is None or self.overlay.shape != frame.shape:
+            return
+        x0, y0, x1, y1 = rect
+        roi = frame[y0:y1, x0:x1]
+        cv2.add(roi, self.overlay[y0:y1, x0:x1], dst=roi)
+    
+    def clear(self):
+        """Erase all trails"""
+        if self.overlay is not None:
+            self.overlay.fill(0)
+        self._regions.clear()
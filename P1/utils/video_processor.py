@@ -3,7 +3,9 @@ Video processing utilities
 """
 import cv2
 import numpy as np
-from typing import Optional, Iterator, Tuple
+import threading
+import time
+from typing import Dict, List, Optional, Iterator, Tuple, Union
 
 
 class VideoProcessor:
@@ -120,3 +122,204 @@ class VideoProcessor:
         writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
         return writer
 
+
+class ThreadedCapture:
+    """Reads frames on a background thread into a ring buffer of preallocated arrays"""
+    
+    def __init__(self,
+                 source: Union[int, str] = 0,
+                 buffer_size: int = 3,
+                 width: Optional[int] = None,
+                 height: Optional[int] = None,
+                 drop_frames: Optional[bool] = None):
+        """
+        Initialize threaded capture
+        
+        Args:
+            source: Camera index or path to a video file
+            buffer_size: Number of preallocated frame slots (at least 3: one being
+                written, one published, one held by the consumer)
+            width: Requested capture width (cameras only)
+            height: Requested capture height (cameras only)
+            drop_frames: If True, the consumer always gets the newest frame and
+                stale frames are dropped. If False, every frame is delivered
+                (the reader waits for the consumer). Defaults to True for camera
+                indices and False for files, so recorded clips replay exactly.
+        """
+        self.source = source
+        self.buffer_size = max(3, buffer_size)
+        self.width = width
+        self.height = height
+        self.drop_frames = isinstance(source, int) if drop_frames is None else drop_frames
+        
+        self.cap: Optional[cv2.VideoCapture] = None
+        self._slots: List[np.ndarray] = []
+        self._slot_times: List[float] = []
+        self._latest = -1       # slot index of the newest published frame
+        self._held = -1         # slot index the consumer is currently using
+        self._published = 0     # sequence number of the newest published frame
+        self._consumed = 0      # sequence number of the last frame handed out
+        self._ended = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._cond = threading.Condition()
+        
+        self.last_timestamp: Optional[float] = None
+        self.counters: Dict[str, float] = {
+            'frames_captured': 0,
+            'frames_delivered': 0,
+            'frames_dropped': 0,
+            'capture_seconds': 0.0,
+            'wait_seconds': 0.0,
+        }
+    
+    def start(self) -> bool:
+        """
+        Open the source and start the reader thread
+        
+        Returns:
+            True if the source was opened and a first frame was read
+        """
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            print(f"Error: Could not open video source {self.source}")
+            return False
+        if self.width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        
+        # Read one frame synchronously to learn the frame shape
+        start = time.perf_counter()
+        ret, first = self.cap.read()
+        if not ret or first is None:
+            print(f"Error: Could not read from video source {self.source}")
+            self.cap.release()
+            return False
+        self.counters['capture_seconds'] += time.perf_counter() - start
+        self.counters['frames_captured'] += 1
+        
+        self._slots = [np.empty_like(first) for _ in range(self.buffer_size)]
+        self._slot_times = [0.0] * self.buffer_size
+        np.copyto(self._slots[0], first)
+        self._slot_times[0] = time.time()
+        self._latest = 0
+        self._published = 1
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, name="ThreadedCapture", daemon=True)
+        self._thread.start()
+        return True
+    
+    def _free_slot(self) -> int:
+        """Pick a slot that is neither published nor held by the consumer"""
+        for i in range(self.buffer_size):
+            if i != self._latest and i != self._held:
+                return i
+        return -1
+    
+    def _reader(self):
+        """Background loop: capture into free slots and publish the newest frame"""
+        while self._running:
+            with self._cond:
+                slot = self._free_slot()
+            
+            start = time.perf_counter()
+            ret, frame = self.cap.read(self._slots[slot])
+            self.counters['capture_seconds'] += time.perf_counter() - start
+            
+            with self._cond:
+                if not ret or frame is None:
+                    self._ended = True
+                    self._cond.notify_all()
+                    return
+                if frame is not self._slots[slot]:
+                    # Frame size changed; reallocate this slot once
+                    self._slots[slot] = frame
+                
+                self.counters['frames_captured'] += 1
+                if not self.drop_frames:
+                    # Lossless mode: wait until the consumer took the previous frame
+                    while self._running and self._consumed < self._published:
+                        self._cond.wait()
+                    if not self._running:
+                        return
+                elif self._consumed < self._published:
+                    self.counters['frames_dropped'] += 1
+                
+                self._slot_times[slot] = time.time()
+                self._latest = slot
+                self._published += 1
+                self._cond.notify_all()
+    
+    def read(self, timeout: Optional[float] = 1.0) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Get the newest frame not yet returned
+        
+        The returned array is a ring buffer slot: it stays valid until the
+        next call to read(). Copy it if it must outlive that.
+        
+        Args:
+            timeout: Maximum seconds to wait for a new frame (None waits forever)
+            
+        Returns:
+            Tuple of (success, frame)
+        """
+        start = time.perf_counter()
+        with self._cond:
+            while self._consumed >= self._published and not self._ended and self._running:
+                if not self._cond.wait(timeout):
+                    break
+            self.counters['wait_seconds'] += time.perf_counter() - start
+            
+            if self._consumed >= self._published:
+                return False, None
+            
+            self._held = self._latest
+            self._consumed = self._published
+            self.last_timestamp = self._slot_times[self._held]
+            self.counters['frames_delivered'] += 1
+            self._cond.notify_all()
+            return True, self._slots[self._held]
+    
+    def stats(self) -> Dict[str, float]:
+        """
+        Get per-stage timing counters
+        
+        Returns:
+            Dictionary with frame counts and mean milliseconds per stage
+        """
+        stats = dict(self.counters)
+        captured = max(1, stats['frames_captured'])
+        delivered = max(1, stats['frames_delivered'])
+        stats['capture_ms'] = 1000 * stats['capture_seconds'] / captured
+        stats['wait_ms'] = 1000 * stats['wait_seconds'] / delivered
+        return stats
+    
+    def isOpened(self) -> bool:
+        """Whether frames can still be read (a frame is waiting or the reader thread still runs)"""
+        if not self._running:
+            return False
+        if self._consumed < self._published:
+            return True
+        return not self._ended and self._thread is not None and self._thread.is_alive()
+    
+    def release(self):
+        """Stop the reader thread and release the capture device"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+    
+    def __enter__(self):
+        if not self.start():
+            raise IOError(f"Could not open video source {self.source}")
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
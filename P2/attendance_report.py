@@ -0,0 +1,194 @@
+import glob
+import json
+import os
+import shutil
+from collections import Counter
+from datetime import datetime
+
+from attendance_store import AttendanceStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARCHIVE_STATE = "_archive.json"  # underscore: skipped by Arrow dataset discovery
+FIRST_DATE = "0000-00-00"
+LAST_DATE = "9999-99-99"
+
+
+class AttendanceReport:
+    """Reporting queries over attendance.db that never scan the whole log
+    
+    - Per-day and per-person totals come from the daily_summary and
+      person_summary tables, which triggers in the store keep current
+    - Record pages are read through the date and (name, date) indexes, using
+      the daily counts to jump to the first day of a page
+    - Closed days (before today) can be archived to Parquet, one partition per
+      month. Per-person counts over a date range read only the name column of
+      the months in range, and SQLite only for days after the archive
+    SQLite stays the system of record; the archive is a copy for range scans.
+    """
+    
+    def __init__(self, db_path="attendance.db", archive_dir="attendance_archive", csv_path=None):
+        # csv_path is only read to import an attendance.csv older than the database
+        self.store = AttendanceStore(db_path, csv_path)
+        self.conn = self.store.conn
+        self.archive_dir = archive_dir
+        self.archived_through = FIRST_DATE
+        self.archived_rows = 0
+        state_file = os.path.join(archive_dir, ARCHIVE_STATE)
+        if os.path.exists(state_file):
+            with open(state_file) as f:
+                state = json.load(f)
+            self.archived_through = state['through']
+            self.archived_rows = state['rows']
+    
+    def totals(self):
+        """(days, records, people) over the whole log"""
+        days, records = self.conn.execute("SELECT count(*), coalesce(sum(people), 0) FROM daily_summary").fetchone()
+        people = self.conn.execute("SELECT count(*) FROM person_summary").fetchone()[0]
+        return days, records, people
+    
+    def days(self, start=None, end=None, offset=0, limit=50):
+        """(date, people, mean confidence) per day in a range, oldest first"""
+        return self.conn.execute(
+            "SELECT date, people, confidence_sum / people FROM daily_summary "
+            "WHERE date >= ? AND date <= ? ORDER BY date LIMIT ? OFFSET ?",
+            (start or FIRST_DATE, end or LAST_DATE, limit, offset)).fetchall()
+    
+    def count_days(self, start=None, end=None):
+        return self.conn.execute("SELECT count(*) FROM daily_summary WHERE date >= ? AND date <= ?",
+                                 (start or FIRST_DATE, end or LAST_DATE)).fetchone()[0]
+    
+    def person(self, name):
+        """(name, days, first date, last date, mean confidence), or None if never marked"""
+        return self.conn.execute(
+            "SELECT name, days, first_date, last_date, confidence_sum / days FROM person_summary WHERE name = ?",
+            (name,)).fetchone()
+    
+    def people(self, start=None, end=None, offset=0, limit=50):
+        """(name, days present) in a date range, most present first"""
+        if start is None and end is None:
+            return self.conn.execute("SELECT name, days FROM person_summary "
+                                     "ORDER BY days DESC, name LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        ranked = sorted(self.person_counts(start, end).items(), key=lambda item: (-item[1], item[0]))
+        return ranked[offset:offset + limit]
+    
+    def person_counts(self, start=None, end=None):
+        """Counter of days present per person in a date range"""
+        start, end = start or FIRST_DATE, end or LAST_DATE
+        counts = Counter()
+        live_start = start
+        if pa is not None and self.archived_rows and start <= self.archived_through:
+            # Archived part: only the name column of the months in range is read
+            table = self.dataset().to_table(columns=['name'], filter=self.date_filter(start, end))
+            if table.num_rows:
+                for row in pc.value_counts(table['name']).to_pylist():
+                    counts[row['values']] = row['counts']
+            live_start = max(start, self.archived_through + "~")  # first key after the watermark
+        if live_start <= end:
+            counts.update(dict(self.conn.execute(
+                "SELECT name, count(*) FROM attendance WHERE date >= ? AND date <= ? GROUP BY name",
+                (live_start, end))))
+        return counts
+    
+    def records(self, start=None, end=None, name=None, offset=0, limit=50):
+        """(name, date, time, confidence) rows in a date range, oldest first
+        
+        For one person the (name, date) index is walked directly. Otherwise the
+        daily counts locate the day holding row `offset`, and the date index is
+        read from that day on, so a late page costs the same as the first one.
+        """
+        start, end = start or FIRST_DATE, end or LAST_DATE
+        columns = "SELECT name, date, time, confidence FROM attendance"
+        if name is not None:
+            return self.conn.execute(f"{columns} WHERE name = ? AND date >= ? AND date <= ? "
+                                     "ORDER BY date LIMIT ? OFFSET ?",
+                                     (name, start, end, limit, offset)).fetchall()
+        skipped = 0
+        first_day = start
+        for date, people in self.conn.execute("SELECT date, people FROM daily_summary "
+                                              "WHERE date >= ? AND date <= ? ORDER BY date", (start, end)):
+            if skipped + people > offset:
+                first_day = date
+                break
+            skipped += people
+        else:
+            return []
+        return self.conn.execute(f"{columns} INDEXED BY attendance_date WHERE date >= ? AND date <= ? "
+                                 "ORDER BY date, id LIMIT ? OFFSET ?",
+                                 (first_day, end, limit, offset - skipped)).fetchall()
+    
+    def count_records(self, start=None, end=None, name=None):
+        if name is not None:
+            return self.conn.execute("SELECT count(*) FROM attendance WHERE name = ? AND date >= ? AND date <= ?",
+                                     (name, start or FIRST_DATE, end or LAST_DATE)).fetchone()[0]
+        return self.conn.execute("SELECT coalesce(sum(people), 0) FROM daily_summary WHERE date >= ? AND date <= ?",
+                                 (start or FIRST_DATE, end or LAST_DATE)).fetchone()[0]
+    
+    def dataset(self):
+        return ds.dataset(self.archive_dir, format='parquet', partitioning='hive')
+    
+    def date_filter(self, start, end):
+        """Arrow filter on the month partitions (pruning whole files) and the date column"""
+        return ((ds.field('month') >= start[:7]) & (ds.field('month') <= end[:7]) &
+                (ds.field('date') >= start) & (ds.field('date') <= end))
+    
+    def archive(self, rebuild=False):
+        """Copy closed days newer than the archive to Parquet; returns the rows written
+        
+        Each run writes one file per month it touches, named after the run's
+        first day. The watermark in _archive.json moves only after the files are
+        written, and files from an interrupted run are removed on the next one.
+        rebuild=True drops the archive and writes it again (after editing past days).
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the Parquet archive (pip install pyarrow)")
+        self.store.flush()
+        if rebuild and os.path.isdir(self.archive_dir):
+            shutil.rmtree(self.archive_dir)
+            self.archived_through, self.archived_rows = FIRST_DATE, 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(self.archive_dir, "month=*", "from-*.parquet")):
+            if os.path.basename(path)[5:15] > self.archived_through:
+                os.remove(path)
+        
+        today = datetime.now().date().isoformat()
+        first, last = self.conn.execute("SELECT min(date), max(date) FROM daily_summary WHERE date > ? AND date < ?",
+                                        (self.archived_through, today)).fetchone()
+        if first is None:
+            return 0
+        written = 0
+        months = [month for (month,) in self.conn.execute(
+            "SELECT DISTINCT substr(date, 1, 7) FROM daily_summary WHERE date >= ? AND date <= ?", (first, last))]
+        for month in months:
+            # One month at a time keeps memory bounded on multi-year logs
+            rows = self.conn.execute("SELECT name, date, time, confidence FROM attendance INDEXED BY attendance_date "
+                                     "WHERE date >= ? AND date <= ? ORDER BY date, id",
+                                     (max(first, month), min(last, month + "-99"))).fetchall()
+            names, dates, times, confidences = zip(*rows)
+            table = pa.table({
+                'name': pa.array(names, pa.string()).dictionary_encode(),
+                'date': pa.array(dates, pa.string()),
+                'time': pa.array(times, pa.string()),
+                'confidence': pa.array(confidences, pa.float32()),
+            })
+            os.makedirs(os.path.join(self.archive_dir, f"month={month}"), exist_ok=True)
+            pq.write_table(table, os.path.join(self.archive_dir, f"month={month}", f"from-{first}.parquet"))
+            written += len(rows)
+        
+        self.archived_through = last
+        self.archived_rows += written
+        state_file = os.path.join(self.archive_dir, ARCHIVE_STATE)
+        with open(state_file + ".tmp", 'w') as f:
+            json.dump({'through': self.archived_through, 'rows': self.archived_rows}, f)
+        os.replace(state_file + ".tmp", state_file)
+        return written
+    
+    def close(self):
+        self.store.close()
+        self.conn.close()
@@ -0,0 +1,241 @@
+import csv
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+CSV_HEADER = ['Name', 'Date', 'Time', 'Confidence']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    confidence REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS attendance_name_date ON attendance (name, date);
+CREATE INDEX IF NOT EXISTS attendance_date ON attendance (date);
+
+-- Per-day and per-person aggregates, kept current by triggers on every insert and delete
+CREATE TABLE IF NOT EXISTS daily_summary (
+    date TEXT PRIMARY KEY,
+    people INTEGER NOT NULL,
+    confidence_sum REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS person_summary (
+    name TEXT PRIMARY KEY,
+    days INTEGER NOT NULL,
+    first_date TEXT,
+    last_date TEXT,
+    confidence_sum REAL NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS attendance_insert AFTER INSERT ON attendance BEGIN
+    INSERT INTO daily_summary VALUES (NEW.date, 1, NEW.confidence)
+        ON CONFLICT (date) DO UPDATE SET people = people + 1,
+                                         confidence_sum = confidence_sum + NEW.confidence;
+    INSERT INTO person_summary VALUES (NEW.name, 1, NEW.date, NEW.date, NEW.confidence)
+        ON CONFLICT (name) DO UPDATE SET days = days + 1,
+                                         first_date = min(first_date, NEW.date),
+                                         last_date = max(last_date, NEW.date),
+                                         confidence_sum = confidence_sum + NEW.confidence;
+END;
+CREATE TRIGGER IF NOT EXISTS attendance_delete AFTER DELETE ON attendance BEGIN
+    UPDATE daily_summary SET people = people - 1, confidence_sum = confidence_sum - OLD.confidence
+        WHERE date = OLD.date;
+    UPDATE person_summary SET days = days - 1, confidence_sum = confidence_sum - OLD.confidence,
+        first_date = (SELECT min(date) FROM attendance WHERE name = OLD.name),
+        last_date = (SELECT max(date) FROM attendance WHERE name = OLD.name)
+        WHERE name = OLD.name;
+    DELETE FROM daily_summary WHERE date = OLD.date AND people <= 0;
+    DELETE FROM person_summary WHERE name = OLD.name AND days <= 0;
+END;
+"""
+
+REBUILD_SUMMARIES = """
+DELETE FROM daily_summary;
+DELETE FROM person_summary;
+INSERT INTO daily_summary SELECT date, count(*), sum(confidence) FROM attendance GROUP BY date;
+INSERT INTO person_summary
+    SELECT name, count(*), min(date), max(date), sum(confidence) FROM attendance GROUP BY name;
+"""
+
+_STOP = object()
+
+
+class AttendanceStore:
+    """Attendance log in SQLite (WAL mode) written by a background thread
+    
+    mark() only checks an in-memory set of (name, date) keys and queues the
+    row; the writer thread inserts queued rows in one transaction per batch,
+    flushing every flush_interval seconds or batch_size rows, and appends the
+    inserted rows to the CSV file. The unique (name, date) index keeps one row
+    per person per day, and each day's keys are loaded from the database the
+    first time that day is checked, so duplicates are caught across restarts.
+    An existing CSV is imported when the database is created.
+    """
+    
+    def __init__(self, db_path="attendance.db", csv_path="attendance.csv",
+                 flush_interval=1.0, batch_size=256):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        
+        self.marked = {}  # date -> names marked that day
+        self.queue = queue.Queue()
+        self.writer = None
+        self.rows_written = 0
+        self.batches = 0
+        
+        created = not os.path.exists(db_path)
+        self.conn = self.connect()
+        self.conn.executescript(SCHEMA)
+        if created and csv_path and os.path.exists(csv_path):
+            self.import_csv(csv_path)
+        elif self.conn.execute("SELECT count(*) FROM daily_summary").fetchone()[0] == 0:
+            # Databases from before the summary tables existed
+            self.rebuild_summaries()
+        if csv_path and not os.path.exists(csv_path):
+            with open(csv_path, 'w', newline='') as f:
+                csv.writer(f).writerow(CSV_HEADER)
+    
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def import_csv(self, path):
+        """Load rows of an attendance CSV written before the database existed"""
+        rows = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                confidence = float(str(row.get('Confidence', '0')).rstrip('%') or 0)
+                rows.append((row['Name'], row['Date'], row['Time'], confidence))
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO attendance (name, date, time, confidence) "
+                                  "VALUES (?, ?, ?, ?)", rows)
+        print(f"✓ Imported {len(rows)} attendance records from {path}")
+    
+    def rebuild_summaries(self):
+        """Recompute daily_summary and person_summary from the attendance rows"""
+        with self.conn:
+            self.conn.executescript("BEGIN;" + REBUILD_SUMMARIES + "COMMIT;")
+    
+    def names_on(self, date):
+        """Set of names marked on a date (loaded from the database once per date)"""
+        names = self.marked.get(date)
+        if names is None:
+            rows = self.conn.execute("SELECT name FROM attendance WHERE date = ?", (date,))
+            names = {name for (name,) in rows}
+            self.marked[date] = names
+        return names
+    
+    def mark(self, name, confidence, when=None):
+        """Queue an attendance row; False if the person is already marked that day"""
+        when = when or datetime.now()
+        date = when.date().isoformat()
+        names = self.names_on(date)
+        if name in names:
+            return False
+        names.add(name)
+        if self.writer is None:
+            self.writer = threading.Thread(target=self.run_writer, name="attendance-writer", daemon=True)
+            self.writer.start()
+        self.queue.put((name, date, when.time().isoformat('seconds'), round(float(confidence), 2)))
+        return True
+    
+    def count(self, date=None):
+        """Number of people marked on a date (default: today)"""
+        return len(self.names_on(date or datetime.now().strftime("%Y-%m-%d")))
+    
+    def run_writer(self):
+        """Writer thread: collect rows until the batch is full or the interval ends"""
+        conn = self.connect()
+        pending = []
+        deadline = None
+        stop = False
+        while not stop:
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, threading.Event):
+                self.write_batch(conn, pending)
+                pending = []
+                item.set()
+                continue
+            elif item is not None:
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+                if len(pending) < self.batch_size:
+                    continue
+            self.write_batch(conn, pending)
+            pending = []
+        conn.close()
+    
+    def write_batch(self, conn, rows):
+        """Insert rows in one transaction and append the ones inserted to the CSV"""
+        if not rows:
+            return
+        insert = "INSERT OR IGNORE INTO attendance (name, date, time, confidence) VALUES (?, ?, ?, ?)"
+        with conn:
+            # rowcount counts only rows this statement inserted, not the summary
+            # trigger writes that total_changes would also include
+            if conn.executemany(insert, rows).rowcount == len(rows):
+                inserted = rows
+            else:
+                # Another process marked some of these people first: redo the batch
+                # row by row so only rows new to the database go to the CSV
+                conn.rollback()
+                inserted = [row for row in rows if conn.execute(insert, row).rowcount]
+        if self.csv_path and inserted:
+            with open(self.csv_path, 'a', newline='') as f:
+                csv.writer(f).writerows([name, date, time_, f"{confidence:.2f}%"]
+                                        for name, date, time_, confidence in inserted)
+        self.rows_written += len(inserted)
+        self.batches += 1
+    
+    def flush(self):
+        """Block until every queued row is in the database"""
+        if self.writer is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+    
+    def reset(self, date=None):
+        """Let everyone be marked again on a day, in this session only
+        
+        Stored rows are kept, so the database and the CSV still agree: a
+        person marked again is ignored by the unique (name, date) index.
+        """
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        self.flush()
+        self.marked[date] = set()
+    
+    def export_csv(self, path=None, start_date=None, end_date=None):
+        """Write the stored attendance (optionally a date range) as CSV"""
+        self.flush()
+        path = path or self.csv_path
+        query = "SELECT name, date, time, confidence FROM attendance WHERE date >= ? AND date <= ? ORDER BY id"
+        rows = self.conn.execute(query, (start_date or "", end_date or "9999")).fetchall()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            writer.writerows([name, date, time_, f"{confidence:.2f}%"] for name, date, time_, confidence in rows)
+        return len(rows)
+    
+    def close(self):
+        """Write everything queued and stop the writer (a later mark starts it again)"""
+        if self.writer is not None:
+            self.queue.put(_STOP)
+            self.writer.join()
+            self.writer = None
@@ -1,31 +1,70 @@
+import argparse
 import cv2
 import os
 import numpy as np
 import pickle
-import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+
+from attendance_store import AttendanceStore
+from face_detector import PRESETS, FaceDetector
+from face_index import load_index
+from face_tracker import FaceTracker
+from lbp_gallery import LBPFeatureExtractor
 # Pandas only needed for view_attendance.py, not for main system
 try:
     import pandas as pd
 except ImportError:
     pd = None
 
+FACE_SIZE = 200
+# A face is named when 100 - distance exceeds this, and track evidence counts
+# predictions closer than ACCEPT_DISTANCE. LBPH predict and the face index
+# (chi-square on the same histograms) share the distance scale; load_model
+# ignores an index whose features would put it on another one
+MIN_CONFIDENCE = 40
+ACCEPT_DISTANCE = 100 - MIN_CONFIDENCE
+
 class AttendanceSystem:
-    def __init__(self, model_path="trained_model", attendance_file="attendance.csv"):
+    def __init__(self, model_path="trained_model", attendance_file="attendance.csv",
+                 recognition_workers=None, detection_interval=10, reverify_seconds=3.0,
+                 detection_preset="full", doorway=None, decision="vote", evidence_size=8):
         self.model_path = model_path
         self.attendance_file = attendance_file
         self.recognizer = None
         self.label_to_name = {}
+        
+        # Face index written by `train_model.py --index`; replaces LBPH predict when present
+        self.face_index = None
+        self.feature_extractor = None
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         
-        # Track attendance in current session (to prevent duplicates)
-        self.session_attendance = set()
+        # 'full' scans the whole frame at every scale; the other presets trade
+        # recall for speed with a downsampled frame and regions of interest
+        self.face_detector = FaceDetector.from_preset(self.face_cascade, detection_preset, doorway)
+        
+        # Batch recognition: preprocessed faces go into one reusable stack and
+        # are predicted on a thread pool (OpenCV releases the GIL in predict)
+        self.recognition_workers = recognition_workers or min(4, os.cpu_count() or 1)
+        self.executor = None
+        self.face_stack = np.empty((0, FACE_SIZE, FACE_SIZE), dtype=np.uint8)
+        
+        # Detect-then-track: the cascade runs every detection_interval frames and
+        # faces are tracked in between. Each track collects evidence_size recent
+        # predictions and is named by a 'vote' or 'sprt' decision; decided
+        # tracks are only re-verified every reverify_seconds
+        self.detection_interval = detection_interval
+        self.tracker = FaceTracker(reverify_seconds=reverify_seconds, evidence_size=evidence_size,
+                                   decision=decision, accept_distance=ACCEPT_DISTANCE)
+        
+        # Attendance goes to SQLite next to the CSV (attendance.csv -> attendance.db);
+        # the CSV still gets every row, and duplicates are caught across restarts
+        attendance_db = os.path.splitext(attendance_file)[0] + ".db"
+        self.store = AttendanceStore(attendance_db, csv_path=attendance_file)
         
         # Load trained model
         self.load_model()
-        
-        # Initialize attendance CSV
-        self.init_attendance_csv()
     
     def load_model(self):
         """Load the trained face recognition model"""
@@ -46,6 +85,20 @@ class AttendanceSystem:
             with open(mapping_file, 'rb') as f:
                 self.label_to_name = pickle.load(f)
             
+            index_dir = os.path.join(self.model_path, "face_index")
+            if os.path.isdir(index_dir):
+                face_index = load_index(index_dir)
+                extractor = LBPFeatureExtractor()
+                if face_index.dim == extractor.dim:
+                    self.face_index = face_index
+                    self.feature_extractor = extractor
+                    print(f"✓ Face index loaded ({face_index.kind}, {len(face_index)} vectors)")
+                else:
+                    # Written with other LBP features, so its distances are on another scale
+                    print(f"WARNING: Face index in '{index_dir}' has {face_index.dim}-dim features, "
+                          f"expected {extractor.dim}; using LBPH predict")
+                    print("Re-run train_model.py --index to rebuild it")
+            
             print(f"✓ Model loaded successfully!")
             print(f"  - Registered faces: {len(self.label_to_name)}")
             for label, name in self.label_to_name.items():
@@ -56,37 +109,10 @@ class AttendanceSystem:
             print(f"ERROR loading model: {e}")
             return False
     
-    def init_attendance_csv(self):
-        """Initialize attendance CSV file with headers if it doesn't exist"""
-        if not os.path.exists(self.attendance_file):
-            with open(self.attendance_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Name', 'Date', 'Time', 'Confidence'])
-    
     def mark_attendance(self, name, confidence):
-        """Mark attendance for a recognized face"""
-        # Create session key (name + date)
-        today = datetime.now().strftime("%Y-%m-%d")
-        session_key = f"{name}_{today}"
-        
-        # Check if already marked in this session
-        if session_key in self.session_attendance:
-            return False
-        
-        # Mark attendance
-        timestamp = datetime.now()
-        date = timestamp.strftime("%Y-%m-%d")
-        time = timestamp.strftime("%H:%M:%S")
-        
-        # Write to CSV
-        with open(self.attendance_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([name, date, time, f"{confidence:.2f}%"])
-        
-        # Add to session tracking
-        self.session_attendance.add(session_key)
-        
-        return True
+        """Mark attendance for a recognized face (False if already marked today)"""
+        # The store checks (name, date) in memory and writes in the background
+        return self.store.mark(name, confidence)
     
     def preprocess_face(self, face_roi):
         """Preprocess face image same as training"""
@@ -101,6 +127,27 @@ class AttendanceSystem:
         
         return blurred
     
+    def preprocess_face_into(self, face_roi, out):
+        """Preprocess a face like preprocess_face, writing into a 200x200 buffer"""
+        cv2.resize(face_roi, (FACE_SIZE, FACE_SIZE), dst=out)
+        cv2.equalizeHist(out, dst=out)
+        cv2.GaussianBlur(out, (3, 3), 0, dst=out)
+        return out
+    
+    def label_result(self, label, confidence):
+        """Turn an LBPH (label, distance) prediction into (name, confidence %)"""
+        # Convert confidence to percentage
+        # LBPH returns lower values for better matches
+        confidence_percent = max(0, 100 - confidence)
+        
+        # Adjusted threshold: only recognize if confidence > MIN_CONFIDENCE%
+        # Lower threshold due to better preprocessing
+        if confidence_percent > MIN_CONFIDENCE:
+            name = self.label_to_name.get(label, "Unknown")
+            return name, confidence_percent
+        else:
+            return "Unknown", confidence_percent
+    
     def recognize_face(self, face_roi):
         """Recognize a face from ROI"""
         if self.recognizer is None:
@@ -111,24 +158,126 @@ class AttendanceSystem:
         
         # Predict
         try:
+            if self.face_index is not None:
+                return self.label_result(*self.search_index(face_processed[None])[0])
             label, confidence = self.recognizer.predict(face_processed)
-            
-            # Convert confidence to percentage
-            # LBPH returns lower values for better matches
-            confidence_percent = max(0, 100 - confidence)
-            
-            # Adjusted threshold: only recognize if confidence > 40%
-            # Lower threshold due to better preprocessing
-            if confidence_percent > 40:
-                name = self.label_to_name.get(label, "Unknown")
-                return name, confidence_percent
-            else:
-                return "Unknown", confidence_percent
+            return self.label_result(label, confidence)
                 
         except Exception as e:
             print(f"Recognition error: {e}")
             return None, 0
     
+    def search_index(self, faces):
+        """(label, chi-square distance) of each preprocessed face from the face index"""
+        labels, distances = self.face_index.search(self.feature_extractor.compute(faces), k=1,
+                                                   rerank='chi2')
+        return [(int(label), float(distance)) for label, distance in zip(labels[:, 0], distances[:, 0])]
+    
+    def predict_range(self, start, stop):
+        """Predict faces start..stop of the face stack (runs on a worker thread)"""
+        results = []
+        for i in range(start, stop):
+            try:
+                results.append(self.recognizer.predict(self.face_stack[i]))
+            except Exception as e:
+                print(f"Recognition error: {e}")
+                results.append(None)
+        return results
+    
+    def predict_faces(self, gray, boxes):
+        """Raw (label, distance) of every face in boxes, None where prediction failed
+        
+        Returns (predictions, timings) with preprocess/predict/total in ms.
+        """
+        start = time.perf_counter()
+        count = len(boxes)
+        if self.recognizer is None or count == 0:
+            return [None] * count, {'faces': count, 'preprocess_ms': 0.0,
+                                    'predict_ms': 0.0, 'total_ms': 0.0}
+        
+        # Grow the stack only when a frame has more faces than ever before
+        if len(self.face_stack) < count:
+            self.face_stack = np.empty((max(count, 2 * len(self.face_stack)), FACE_SIZE, FACE_SIZE),
+                                       dtype=np.uint8)
+        for i, (x, y, w, h) in enumerate(boxes):
+            self.preprocess_face_into(gray[y:y + h, x:x + w], self.face_stack[i])
+        preprocessed = time.perf_counter()
+        
+        # Split the batch into one contiguous chunk per worker
+        workers = min(self.recognition_workers, count)
+        if self.face_index is not None:
+            # The index answers the whole batch in one vectorized search
+            predictions = self.search_index(self.face_stack[:count])
+        elif workers <= 1:
+            predictions = self.predict_range(0, count)
+        else:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.recognition_workers)
+            bounds = np.linspace(0, count, workers + 1).astype(int)
+            chunks = self.executor.map(self.predict_range, bounds[:-1], bounds[1:])
+            predictions = [p for chunk in chunks for p in chunk]
+        predicted = time.perf_counter()
+        
+        timings = {
+            'faces': count,
+            'preprocess_ms': (preprocessed - start) * 1000,
+            'predict_ms': (predicted - preprocessed) * 1000,
+            'total_ms': (time.perf_counter() - start) * 1000,
+        }
+        return predictions, timings
+    
+    def recognize_faces(self, gray, boxes):
+        """Recognize every detected face of a frame in one batch
+        
+        Returns (names, confidences, timings). Names and confidences follow
+        the order of boxes; timings holds preprocess/predict/total in ms.
+        """
+        predictions, timings = self.predict_faces(gray, boxes)
+        names = []
+        confidences = []
+        for prediction in predictions:
+            name, confidence = (None, 0) if prediction is None else self.label_result(*prediction)
+            names.append(name)
+            confidences.append(confidence)
+        return names, confidences, timings
+    
+    def detect_faces(self, gray, previous_boxes=None):
+        """Haar cascade detection with the configured preset, in full-frame coordinates"""
+        return self.face_detector.detect(gray, previous_boxes)
+    
+    def track_faces(self, gray, frame_index, now=None):
+        """Detect on scheduled frames, track in between and gather evidence for the tracks that are due
+        
+        Each prediction goes into its track's evidence buffer; a track only
+        gets a name once the evidence decides. Returns (tracks visible in
+        this frame, tracks whose accepted name has no attendance written yet).
+        """
+        now = time.monotonic() if now is None else now
+        detections = None
+        if frame_index % self.detection_interval == 0:
+            detections = self.detect_faces(gray, [track.box for track in self.tracker.tracks])
+        tracks = self.tracker.update(gray, detections, now)
+        
+        # Skip tracks pushed almost entirely out of the frame
+        due = [track for track in tracks if min(track.clipped_box(gray.shape)[2:]) >= 20
+               and self.tracker.needs_recognition(track, now)]
+        if due:
+            predictions, _ = self.predict_faces(gray, [track.clipped_box(gray.shape) for track in due])
+            for track, prediction in zip(due, predictions):
+                if prediction is None:
+                    continue
+                self.tracker.record(track, *prediction, now)
+                if track.state == 'accepted':
+                    track.name = self.label_to_name.get(track.label, "Unknown")
+                    track.confidence = track.evidence.confidence(track.label)
+                else:
+                    track.name = "Unknown" if track.state == 'rejected' else None
+                    track.confidence = 0
+        
+        ready = [track for track in tracks if track.state == 'accepted'
+                 and track.name != "Unknown" and track.committed != track.name]
+        return tracks, ready
+    
     def run(self):
         """Run the real-time attendance system"""
         if self.recognizer is None:
@@ -171,7 +320,8 @@ class AttendanceSystem:
         print("\nStarting camera...\n")
         
         frame_count = 0
-        detection_interval = 5  # Process every 5th frame for better performance
+        self.tracker.reset()
+        self.face_detector.reset()
         
         while True:
             ret, frame = cap.read()
@@ -181,47 +331,45 @@ class AttendanceSystem:
             frame = cv2.flip(frame, 1)  # Mirror the frame
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
-            # Detect faces (every frame)
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(100, 100)
-            )
-            
-            # Process recognition (every Nth frame for performance)
+            # Detect faces every Nth frame, track them in between
+            tracks, ready = self.track_faces(gray, frame_count)
             frame_count += 1
-            if frame_count % detection_interval == 0:
-                for (x, y, w, h) in faces:
-                    face_roi = gray[y:y + h, x:x + w]
-                    name, confidence = self.recognize_face(face_roi)
+            
+            for track in tracks:
+                x, y, w, h = track.clipped_box(frame.shape)
+                name = track.name
+                confidence = track.confidence
+                
+                # Draw rectangle and label
+                if name and name != "Unknown":
+                    color = (0, 255, 0)  # Green for recognized
+                    label_text = f"#{track.id} {name} ({confidence:.1f}%)"
                     
-                    # Draw rectangle and label
-                    if name and name != "Unknown":
-                        color = (0, 255, 0)  # Green for recognized
-                        label_text = f"{name} ({confidence:.1f}%)"
-                        
-                        # Mark attendance if not already marked
+                    # Mark attendance once the track's evidence has decided
+                    if track in ready:
+                        track.committed = name
                         if self.mark_attendance(name, confidence):
                             # Show notification
                             cv2.putText(frame, "ATTENDANCE MARKED!", 
                                        (x, y - 50), cv2.FONT_HERSHEY_SIMPLEX, 
                                        0.7, (0, 255, 255), 2)
-                    else:
-                        color = (0, 0, 255)  # Red for unknown
-                        label_text = "Unknown"
-                    
-                    # Draw bounding box
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-                    
-                    # Draw name label
-                    cv2.putText(frame, label_text, 
-                               (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 
-                               0.7, color, 2)
+                elif track.state == 'pending':
+                    color = (0, 255, 255)  # Yellow while evidence is gathered
+                    label_text = f"#{track.id} ..."
+                else:
+                    color = (0, 0, 255)  # Red for unknown
+                    label_text = f"#{track.id} Unknown"
+                
+                # Draw bounding box
+                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+                
+                # Draw name label
+                cv2.putText(frame, label_text, 
+                           (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 
+                           0.7, color, 2)
             
             # Display session info
-            today_count = len([k for k in self.session_attendance 
-                              if datetime.now().strftime("%Y-%m-%d") in k])
+            today_count = self.store.count()
             info_text = f"Today's Attendance: {today_count} | Registered: {len(self.label_to_name)}"
             cv2.putText(frame, info_text, (10, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
@@ -235,24 +383,38 @@ class AttendanceSystem:
             if key == ord('q'):
                 break
             elif key == ord('r'):
-                # Reset today's attendance
-                today = datetime.now().strftime("%Y-%m-%d")
-                self.session_attendance = {k for k in self.session_attendance 
-                                          if today not in k}
-                print(f"\n✓ Reset attendance for {datetime.now().strftime('%Y-%m-%d')}")
+                # Reset today's marks for this session; stored rows are kept
+                self.store.reset()
+                print(f"\n✓ Reset attendance for {datetime.now().strftime('%Y-%m-%d')} (records kept)")
         
         cap.release()
         cv2.destroyAllWindows()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.store.close()
         
         # Show final statistics
         print("\n" + "=" * 50)
         print("SESSION SUMMARY")
         print("=" * 50)
-        print(f"Total attendance marked today: {len(self.session_attendance)}")
-        print(f"Attendance saved to: {self.attendance_file}")
+        print(f"Total attendance marked today: {self.store.count()}")
+        print(f"Predictions: {self.tracker.predictions_made} made, "
+              f"{self.tracker.predictions_saved} saved by decided tracks")
+        print(f"Attendance saved to: {self.store.db_path} and {self.attendance_file}")
         print("\n✓ Attendance system closed.")
 
 if __name__ == "__main__":
-    system = AttendanceSystem()
+    parser = argparse.ArgumentParser(description="Real-time face recognition attendance")
+    parser.add_argument('--detector', choices=list(PRESETS), default="full",
+                        help="Detection preset, from best recall (full) to fastest (fast)")
+    parser.add_argument('--doorway', nargs='+', metavar='X,Y',
+                        help="Doorway polygon in camera pixels, always searched by the ROI presets")
+    parser.add_argument('--decision', choices=['vote', 'sprt'], default="vote",
+                        help="How a track's predictions decide its name (default: vote)")
+    args = parser.parse_args()
+    
+    doorway = [tuple(int(v) for v in point.split(',')) for point in args.doorway] if args.doorway else None
+    system = AttendanceSystem(detection_preset=args.detector, doorway=doorway, decision=args.decision)
     system.run()
 
@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the attendance system
+
+Run from the P2 directory, e.g. ``python -m benchmarks.lbp_search``
+"""
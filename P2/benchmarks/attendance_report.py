@@ -0,0 +1,144 @@
+"""
+Benchmark attendance reporting on a large synthetic log: full CSV scans against AttendanceReport
+
+The log has one row per present person per day (the store's unique key)
+over --days days. The baseline is what view_attendance.py used to do:
+pd.read_csv of the whole file, then value_counts and boolean filters. The
+report answers the same questions from the summary tables, the indexes and
+the Parquet archive. Load and archive times are one-off costs, shown apart
+from the per-query times.
+
+Usage:
+    python -m benchmarks.attendance_report --rows 10000000
+    python -m benchmarks.attendance_report --rows 1000000 --people 2000 --days 365
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from attendance_report import AttendanceReport
+from attendance_store import SCHEMA
+
+
+def make_log(rows, people, days, seed=0):
+    """Columns (names, dates, times, confidences) with unique (name, date) pairs, oldest first"""
+    rng = np.random.default_rng(seed)
+    per_day = rng.multinomial(rows, np.full(days, 1.0 / days))
+    per_day = np.minimum(per_day, people)
+    first = date(2022, 1, 1)
+    all_names = np.array([f"person{i:05d}" for i in range(people)], dtype=object)
+    names = np.concatenate([all_names[rng.choice(people, count, replace=False)] for count in per_day])
+    dates = np.repeat(np.array([(first + timedelta(days=d)).isoformat() for d in range(days)], dtype=object), per_day)
+    seconds = rng.integers(8 * 3600, 18 * 3600, len(names))
+    times = np.array([f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(24 * 3600)],
+                     dtype=object)[seconds]
+    confidences = np.round(rng.uniform(40, 100, len(names)), 2)
+    return names, dates, times, confidences
+
+
+def load_database(path, log):
+    """Insert the log through the store's schema, so the summary triggers run"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.executemany("INSERT INTO attendance (name, date, time, confidence) VALUES (?, ?, ?, ?)",
+                         zip(*(column.tolist() for column in log)))
+    conn.close()
+
+
+def timed(function, repeat=3):
+    """Best of `repeat` runs in milliseconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def csv_queries(csv_path, person, start, end, offset):
+    """The old view: every query starts from a full read of the CSV"""
+    def load():
+        return pd.read_csv(csv_path)
+    return {
+        'totals': lambda: len(load()),
+        'days (all)': lambda: load()['Date'].value_counts().sort_index(),
+        'people (all)': lambda: load()['Name'].value_counts(),
+        'people (range)': lambda: (lambda df: df[(df['Date'] >= start) & (df['Date'] <= end)]['Name']
+                                   .value_counts())(load()),
+        'person': lambda: (lambda df: df[df['Name'] == person])(load()),
+        'records page': lambda: load().iloc[offset:offset + 20],
+    }
+
+
+def report_queries(report, person, start, end, offset):
+    return {
+        'totals': report.totals,
+        'days (all)': lambda: report.days(limit=-1),
+        'people (all)': lambda: report.people(limit=-1),
+        'people (range)': lambda: report.person_counts(start, end),
+        'person': lambda: (report.person(person), report.records(name=person, limit=-1)),
+        'records page': lambda: report.records(offset=offset, limit=20),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--people', type=int, default=12000)
+    parser.add_argument('--days', type=int, default=3 * 365)
+    parser.add_argument('--skip-csv', action='store_true', help="Skip the (slow) pandas baseline")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    log = make_log(args.rows, args.people, args.days)
+    rows = len(log[0])
+    print(f"{rows} rows, {args.people} people, {args.days} days (generated in {time.perf_counter() - start:.1f}s)")
+    
+    names, dates = log[0], log[1]
+    person = names[len(names) // 2]
+    range_start, range_end = dates[len(dates) // 2], dates[min(len(dates) - 1, len(dates) // 2 + rows // 12)]
+    offset = rows * 9 // 10
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "attendance.db")
+        start = time.perf_counter()
+        load_database(db_path, log)
+        print(f"SQLite load with summary triggers: {time.perf_counter() - start:.1f}s")
+        
+        report = AttendanceReport(db_path, os.path.join(tmp, "attendance_archive"))
+        start = time.perf_counter()
+        archived = report.archive()
+        print(f"Parquet archive of {archived} rows: {time.perf_counter() - start:.1f}s")
+        queries = report_queries(report, person, range_start, range_end, offset)
+        
+        baseline = {}
+        if not args.skip_csv:
+            csv_path = os.path.join(tmp, "attendance.csv")
+            pd.DataFrame({'Name': names, 'Date': dates, 'Time': log[2], 'Confidence': log[3]}).to_csv(
+                csv_path, index=False)
+            baseline = csv_queries(csv_path, person, range_start, range_end, offset)
+        
+        print(f"\nPeople range {range_start}..{range_end}, person {person}, records page at offset {offset}")
+        print(f"\n{'query':<16} {'CSV scan ms':>12} {'report ms':>10} {'speedup':>8}")
+        for name, query in queries.items():
+            ms, _ = timed(query)
+            if name in baseline:
+                base_ms, _ = timed(baseline[name], repeat=1)
+                print(f"{name:<16} {base_ms:>12.1f} {ms:>10.2f} {base_ms / ms:>7.0f}x")
+            else:
+                print(f"{name:<16} {'-':>12} {ms:>10.2f} {'-':>8}")
+        report.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark marking attendance events: per-row CSV appends against AttendanceStore
+
+Events are random (person, day) pairs, so some are duplicates that must be
+rejected. The CSV baseline is the old mark_attendance: an in-memory set and
+one open/append/close of the CSV per new row. For the store, "mark" is the
+time the caller spends in mark(), and "durable" also waits for the writer
+thread to commit everything. The restart run opens the same database again
+and re-marks every event, all of which must now be duplicates.
+
+Usage:
+    python -m benchmarks.attendance_writes --events 10000 --batch-sizes 1 64 256
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from attendance_store import AttendanceStore
+
+
+def make_events(count, people, days, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    return [(f"person{rng.randrange(people):05d}",
+             start + timedelta(days=rng.randrange(days), seconds=rng.randrange(36000)),
+             rng.uniform(40, 100)) for _ in range(count)]
+
+
+def csv_baseline(path, events):
+    """The old mark_attendance loop; returns rows written"""
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerow(['Name', 'Date', 'Time', 'Confidence'])
+    marked = set()
+    for name, when, confidence in events:
+        date = when.strftime("%Y-%m-%d")
+        if (name, date) in marked:
+            continue
+        with open(path, 'a', newline='') as f:
+            csv.writer(f).writerow([name, date, when.strftime("%H:%M:%S"), f"{confidence:.2f}%"])
+        marked.add((name, date))
+    return len(marked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--people', type=int, default=500)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 256])
+    args = parser.parse_args()
+    
+    events = make_events(args.events, args.people, args.days)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        rows = csv_baseline(os.path.join(tmp, "baseline.csv"), events)
+        baseline = time.perf_counter() - start
+        print(f"{len(events)} events, {rows} unique (person, day) rows")
+        
+        print(f"\n{'writer':<18} {'mark ev/s':>11} {'durable ev/s':>13} {'rows':>6} {'batches':>8} "
+              f"{'restart ev/s':>13} {'rejected':>9}")
+        print(f"{'csv per row':<18} {len(events) / baseline:>11.0f} {len(events) / baseline:>13.0f} "
+              f"{rows:>6} {'-':>8} {'-':>13} {'-':>9}")
+        for batch_size in args.batch_sizes:
+            db_path = os.path.join(tmp, f"attendance-{batch_size}.db")
+            csv_path = os.path.join(tmp, f"attendance-{batch_size}.csv")
+            store = AttendanceStore(db_path, csv_path, batch_size=batch_size)
+            start = time.perf_counter()
+            for name, when, confidence in events:
+                store.mark(name, confidence, when)
+            marked = time.perf_counter() - start
+            store.close()
+            durable = time.perf_counter() - start
+            
+            # A new process would start from the database alone
+            restarted = AttendanceStore(db_path, csv_path, batch_size=batch_size)
+            start = time.perf_counter()
+            rejected = sum(1 for name, when, confidence in events
+                           if not restarted.mark(name, confidence, when))
+            restart = time.perf_counter() - start
+            restarted.close()
+            
+            name = f"store batch {batch_size}"
+            print(f"{name:<18} {len(events) / marked:>11.0f} {len(events) / durable:>13.0f} "
+                  f"{store.rows_written:>6} {store.batches:>8} {len(events) / restart:>13.0f} {rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
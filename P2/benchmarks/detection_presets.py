@@ -0,0 +1,90 @@
+"""
+Benchmark face detection presets: recall against time per frame
+
+Ground truth is the 'full' preset (the original full-frame detectMultiScale
+with scaleFactor 1.1 and minSize 100) run on every frame. Each preset then
+detects on the same frames, feeding its own previous boxes back as the
+'tracks' region like the attendance loop does. A face counts as found when
+a preset box overlaps it with IoU >= 0.5.
+
+Usage:
+    python -m benchmarks.detection_presets entrance.mp4 --doorway 400,0 880,0 880,720 400,720
+"""
+import argparse
+import time
+
+import cv2
+
+from face_detector import PRESETS, FaceDetector
+from face_tracker import box_iou
+
+
+def read_frames(video, max_frames, step):
+    """Grayscale frames of a video (every `step`-th one)"""
+    cap = cv2.VideoCapture(video)
+    frames = []
+    index = 0
+    while max_frames is None or len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        index += 1
+    cap.release()
+    return frames
+
+
+def run_preset(detector, frames):
+    """Boxes of every frame and the mean milliseconds per frame"""
+    results = []
+    previous = []
+    elapsed = 0.0
+    scanned = 0.0
+    for gray in frames:
+        start = time.perf_counter()
+        boxes = detector.detect(gray, previous)
+        elapsed += time.perf_counter() - start
+        scanned += detector.scanned_fraction
+        results.append(boxes)
+        previous = boxes
+    return results, elapsed * 1000 / len(frames), scanned / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', help="Recorded video, e.g. of an entrance")
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--doorway', nargs='+', metavar='X,Y', help="Doorway polygon in video pixels")
+    parser.add_argument('--step', type=int, default=1,
+                        help="Use every Nth frame, like a detection interval (default: 1)")
+    parser.add_argument('--max-frames', type=int, default=300)
+    args = parser.parse_args()
+    
+    doorway = [tuple(int(v) for v in point.split(',')) for point in args.doorway] if args.doorway else None
+    frames = read_frames(args.video, args.max_frames, args.step)
+    if not frames:
+        print(f"Could not read frames from {args.video}")
+        return
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    truth, _, _ = run_preset(FaceDetector.from_preset(cascade, 'full'), frames)
+    total = sum(len(boxes) for boxes in truth)
+    print(f"{len(frames)} frames of {frames[0].shape[1]}x{frames[0].shape[0]}, {total} faces found by 'full'")
+    
+    print(f"\n{'preset':<10} {'ms/frame':>9} {'speedup':>8} {'scanned':>8} {'recall':>7} {'extra':>6}")
+    base_ms = None
+    for preset in args.presets:
+        results, ms, scanned = run_preset(FaceDetector.from_preset(cascade, preset, doorway), frames)
+        found = extra = 0
+        for expected, boxes in zip(truth, results):
+            matched = sum(1 for e in expected if any(box_iou(e, b) >= 0.5 for b in boxes))
+            found += matched
+            extra += max(0, len(boxes) - matched)
+        base_ms = base_ms or ms
+        recall = found / total if total else float('nan')
+        print(f"{preset:<10} {ms:>9.2f} {base_ms / ms:>7.1f}x {scanned:>8.0%} {recall:>7.1%} {extra:>6}")
+
+
+if __name__ == "__main__":
+    main()
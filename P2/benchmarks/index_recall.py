@@ -0,0 +1,92 @@
+"""
+Recall vs queries per second of the face index backends
+
+Exact brute force is the reference. IVF is run at increasing nprobe on a
+synthetic clustered gallery and on LBP histograms of synthetic faces.
+
+Usage:
+    python -m benchmarks.index_recall --vectors 10000 100000 --identities 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from face_index import BruteForceIndex, IVFIndex
+from lbp_gallery import LBPFeatureExtractor
+from benchmarks.synthetic import iter_gallery, queries
+
+
+def clustered(count, dim, people, seed=0):
+    """Gallery of `count` vectors around `people` random centres, plus 200 queries"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(people, dim)).astype(np.float32)
+    labels = rng.integers(0, people, count).astype(np.int32)
+    vectors = centres[labels] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+    query_labels = rng.integers(0, people, 200).astype(np.int32)
+    query_vectors = centres[query_labels] + 0.3 * rng.normal(size=(200, dim)).astype(np.float32)
+    return vectors, labels, query_vectors
+
+
+def lbp_gallery(identities, per_identity, query_count):
+    """LBP histograms of synthetic faces and of fresh query images"""
+    extractor = LBPFeatureExtractor()
+    batches = [(extractor.compute(faces), labels) for faces, labels in iter_gallery(identities, per_identity)]
+    vectors = np.concatenate([b[0] for b in batches])
+    labels = np.concatenate([b[1] for b in batches])
+    query_faces, _ = queries(identities, query_count)
+    return vectors, labels, extractor.compute(query_faces)
+
+
+def qps(search, query_vectors):
+    """Queries per second of search(query_vectors) and its result"""
+    start = time.perf_counter()
+    result = search(query_vectors)
+    return len(query_vectors) / (time.perf_counter() - start), result
+
+
+def report(name, vectors, labels, query_vectors, nprobes):
+    exact = BruteForceIndex(vectors.shape[1])
+    exact.add(vectors, labels)
+    exact_qps, (truth, _) = qps(lambda q: exact.search_rows(q, 1), query_vectors)
+    print(f"\n{name}: {len(vectors)} vectors x {vectors.shape[1]} dims")
+    print(f"  {'backend':<18} {'recall@1':>9} {'qps':>10}")
+    print(f"  {'brute':<18} {1.0:>9.3f} {exact_qps:>10.1f}")
+    
+    nlist = max(1, int(np.sqrt(len(vectors))))
+    ivf = IVFIndex(vectors.shape[1], nlist=nlist)
+    start = time.perf_counter()
+    ivf.train(vectors[np.random.default_rng(0).permutation(len(vectors))[:max(nlist * 40, 10000)]])
+    ivf.add(vectors, labels)
+    print(f"  (IVF with {nlist} lists built in {time.perf_counter() - start:.2f} s)")
+    for nprobe in nprobes:
+        if nprobe > nlist:
+            break
+        ivf_qps, (rows, _) = qps(lambda q: ivf.search_rows(q, 1, nprobe=nprobe), query_vectors)
+        # Rows are numbered differently per index; compare the vectors found
+        recall = np.mean(np.all(ivf.vectors(rows[:, 0]) == exact.vectors(truth[:, 0]), axis=1))
+        print(f"  {f'ivf nprobe={nprobe}':<18} {recall:>9.3f} {ivf_qps:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, nargs='+', default=[10000, 100000],
+                        help="Synthetic gallery sizes")
+    parser.add_argument('--dim', type=int, default=128, help="Synthetic vector dimension")
+    parser.add_argument('--identities', type=int, nargs='*', default=[1000],
+                        help="Synthetic-face gallery sizes (LBP histograms)")
+    parser.add_argument('--per-identity', type=int, default=5)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+    
+    for count in args.vectors:
+        vectors, labels, query_vectors = clustered(count, args.dim, people=max(1, count // 5))
+        report("synthetic", vectors, labels, query_vectors, args.nprobe)
+    for identities in args.identities:
+        vectors, labels, query_vectors = lbp_gallery(identities, args.per_identity, 200)
+        report("LBP faces", vectors, labels, query_vectors, args.nprobe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark the NumPy LBP gallery against OpenCV's LBPHFaceRecognizer
+
+For each gallery size: time per query, queries per second and top-1
+accuracy of OpenCV LBPH (linear chi-square scan in C++), the NumPy gallery
+with chi-square and L2 blocked scans, an L2 shortlist of 64 re-ranked by
+chi-square, and reduced galleries of one centroid or three medoids per person.
+Where OpenCV runs, the largest difference between its predict distances and
+the NumPy chi-square distances is printed too (they should agree).
+
+Usage:
+    python -m benchmarks.lbp_search --identities 10 100 1000 --per-identity 5
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from lbp_gallery import LBPFeatureExtractor, LBPGallery
+from benchmarks.synthetic import iter_gallery, queries
+
+
+def time_queries(predict, faces, labels):
+    """Run predict(faces) -> labels; return (ms per query, accuracy)"""
+    start = time.perf_counter()
+    predicted = predict(faces)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / len(faces), float(np.mean(np.asarray(predicted) == labels))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--identities', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--per-identity', type=int, default=5, help="Gallery images per person")
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--opencv-max', type=int, default=1000,
+                        help="Skip OpenCV above this many identities (it keeps every histogram)")
+    args = parser.parse_args()
+    
+    extractor = LBPFeatureExtractor()
+    print(f"{'identities':>10} {'engine':<16} {'ms/query':>10} {'qps':>9} {'top-1':>7}")
+    for identities in args.identities:
+        query_faces, query_labels = queries(identities, args.queries)
+        query_features = extractor.compute(query_faces)
+        
+        gallery = LBPGallery(extractor.dim, capacity=identities * args.per_identity)
+        opencv = None
+        if identities <= args.opencv_max:
+            opencv = cv2.face.LBPHFaceRecognizer_create(radius=1, neighbors=8, grid_x=8, grid_y=8)
+        for faces, labels in iter_gallery(identities, args.per_identity):
+            gallery.add(extractor.compute(faces), labels)
+            if opencv is not None:
+                if opencv.empty():
+                    opencv.train(list(faces), labels)
+                else:
+                    opencv.update(list(faces), labels)
+        
+        # The NumPy timings include computing the query histograms
+        engines = []
+        if opencv is not None:
+            engines.append(('opencv lbph', lambda f: [opencv.predict(face)[0] for face in f]))
+        engines.append(('numpy chi2', lambda f: gallery.search(extractor.compute(f))[0][:, 0]))
+        engines.append(('numpy l2', lambda f: gallery.search(extractor.compute(f), metric='l2')[0][:, 0]))
+        engines.append(('l2 64 + chi2', lambda f: gallery.search(extractor.compute(f), shortlist=64)[0][:, 0]))
+        centroids = gallery.reduced('centroid')
+        engines.append(('centroid chi2', lambda f: centroids.search(extractor.compute(f))[0][:, 0]))
+        if args.per_identity > 3:
+            medoids = gallery.reduced('medoids', 3)
+            engines.append(('3-medoid chi2', lambda f: medoids.search(extractor.compute(f))[0][:, 0]))
+        
+        if opencv is not None:
+            # Same histograms and distance as OpenCV, so the scales must agree
+            expected = np.array([opencv.predict(face)[1] for face in query_faces])
+            found = gallery.search(query_features)[1][:, 0]
+            print(f"{identities:>10} max |numpy chi2 - opencv| distance: {np.abs(found - expected).max():.4f}")
+        
+        for name, predict in engines:
+            ms, accuracy = time_queries(predict, query_faces, query_labels)
+            print(f"{identities:>10} {name:<16} {ms:>10.2f} {1000 / ms:>9.1f} {accuracy:>7.1%}")
+        start = time.perf_counter()
+        extractor.compute(query_faces)
+        extract_ms = (time.perf_counter() - start) * 1000 / len(query_faces)
+        print(f"{'':>10} (histogram extraction alone: {extract_ms:.2f} ms/face)")
+
+
+if __name__ == "__main__":
+    main()
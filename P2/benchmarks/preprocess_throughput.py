@@ -0,0 +1,74 @@
+"""
+Benchmark training-image loading: images/sec against worker count
+
+Compares the serial loop the trainer used to run (imread + preprocessing
+per file) with FaceCache loading through thread and process pools, cold
+(every image decoded) and warm (every image found in the on-disk cache,
+so only the files are hashed).
+
+Usage:
+    python -m benchmarks.preprocess_throughput --dataset dataset --workers 1 2 4 8
+    python -m benchmarks.preprocess_throughput --synthetic 2000
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+import cv2
+
+from face_cache import FaceCache, load_face
+from benchmarks.synthetic import faces_of
+
+
+def write_synthetic(root, images, per_identity=50):
+    """JPEG dataset of synthetic 480x480 faces; returns the file paths"""
+    paths = []
+    for identity in range((images + per_identity - 1) // per_identity):
+        count = min(per_identity, images - len(paths))
+        os.makedirs(os.path.join(root, f"person{identity:04d}"), exist_ok=True)
+        for i, face in enumerate(faces_of(identity, count)):
+            path = os.path.join(root, f"person{identity:04d}", f"{i}.jpg")
+            cv2.imwrite(path, cv2.resize(face, (480, 480)))
+            paths.append(path)
+    return paths
+
+
+def images_per_second(load, paths):
+    start = time.perf_counter()
+    load(paths)
+    return len(paths) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default="dataset", help="Dataset with one folder per person")
+    parser.add_argument('--synthetic', type=int, help="Benchmark this many generated JPEGs instead")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--pools', nargs='+', default=['thread', 'process'], choices=['thread', 'process'])
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            paths = write_synthetic(os.path.join(tmp, "dataset"), args.synthetic)
+        else:
+            paths = sorted(glob.glob(os.path.join(args.dataset, "*", "*")))
+            paths = [p for p in paths if p.endswith(('.jpg', '.jpeg', '.png'))]
+        print(f"{len(paths)} images, {os.cpu_count()} CPUs")
+        
+        print(f"\n{'pool':<8} {'workers':>8} {'cold img/s':>11} {'warm img/s':>11}")
+        serial = images_per_second(lambda p: [load_face(path) for path in p], paths)
+        print(f"{'serial':<8} {1:>8} {serial:>11.1f} {'-':>11}")
+        for pool in args.pools:
+            for workers in args.workers:
+                cache_dir = os.path.join(tmp, f"cache-{pool}-{workers}")
+                cold = images_per_second(FaceCache(cache_dir, workers=workers, pool=pool).load, paths)
+                # A fresh instance reads the cache from disk, like the next training run
+                warm = images_per_second(FaceCache(cache_dir, workers=workers, pool=pool).load, paths)
+                print(f"{pool:<8} {workers:>8} {cold:>11.1f} {warm:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
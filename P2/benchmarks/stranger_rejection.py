@@ -0,0 +1,121 @@
+"""
+Check that track evidence rejects unenrolled faces with each recognizer backend
+
+Enrolls --identities synthetic people, then builds an AttendanceSystem on
+LBPH predict and another on a brute-force face index. For each backend,
+tracks of enrolled people and of strangers are fed --predictions fresh
+images through the system's own tracker, so the evidence uses the
+accept_distance the system passes for that backend. Strangers are textures
+of a finer scale than the enrolled ones (the synthetic people all look alike
+to LBP, far more than real faces do).
+
+Prints the distance range and the decisions of each group, and exits with
+status 1 if a stranger is accepted or an enrolled person is not.
+
+Usage:
+    python -m benchmarks.stranger_rejection --identities 20 --strangers 20
+"""
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from attendance_system import AttendanceSystem
+from benchmarks.synthetic import FACE_SIZE, faces_of
+from face_index import create_index
+from lbp_gallery import LBPFeatureExtractor
+
+
+def stranger_faces(stranger, count, grid=150):
+    """(count, 200, 200) images of one unenrolled person"""
+    rng = np.random.default_rng((stranger, 99))
+    small = rng.integers(0, 256, (grid, grid), dtype=np.uint8)
+    base = cv2.resize(small, (FACE_SIZE, FACE_SIZE), interpolation=cv2.INTER_CUBIC).astype(np.int16)
+    noisy = base + rng.integers(-20, 21, (count, FACE_SIZE, FACE_SIZE))
+    faces = np.clip(noisy, 0, 255).astype(np.uint8)
+    for face in faces:
+        cv2.GaussianBlur(face, (3, 3), 0, dst=face)
+    return faces
+
+
+def write_model(model_dir, identities, per_identity, with_index):
+    """An LBPH model (and optionally a face index) as train_model.py saves them"""
+    faces = np.concatenate([faces_of(i, per_identity) for i in range(identities)])
+    labels = np.repeat(np.arange(identities, dtype=np.int32), per_identity)
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(list(faces), labels)
+    os.makedirs(model_dir, exist_ok=True)
+    recognizer.write(os.path.join(model_dir, "lbph_model.yml"))
+    with open(os.path.join(model_dir, "label_to_name.pkl"), 'wb') as f:
+        pickle.dump({i: f"person{i:04d}" for i in range(identities)}, f)
+    if with_index:
+        extractor = LBPFeatureExtractor()
+        index = create_index('brute', extractor.dim)
+        index.add(extractor.compute(faces), labels)
+        index.save(os.path.join(model_dir, "face_index"))
+
+
+def run_tracks(system, groups, predictions):
+    """Feed each (label, faces) group to a new track; returns (decisions, distances) per group"""
+    results = []
+    for label, faces in groups:
+        track = system.tracker.new_track((0, 0, FACE_SIZE, FACE_SIZE), 0.0)
+        if system.face_index is not None:
+            raw = system.search_index(faces[:predictions])
+        else:
+            raw = [system.recognizer.predict(face) for face in faces[:predictions]]
+        for step, (predicted, distance) in enumerate(raw):
+            system.tracker.record(track, predicted, distance, step * system.tracker.retry_seconds)
+        results.append((track.state, track.label, [distance for _, distance in raw]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--identities', type=int, default=20)
+    parser.add_argument('--per-identity', type=int, default=5)
+    parser.add_argument('--strangers', type=int, default=20)
+    parser.add_argument('--predictions', type=int, default=8)
+    args = parser.parse_args()
+    
+    enrolled = [(i, faces_of(i, args.predictions, seed=7)) for i in range(args.identities)]
+    strangers = [(None, stranger_faces(s, args.predictions)) for s in range(args.strangers)]
+    failures = 0
+    
+    tmp = tempfile.mkdtemp()
+    try:
+        for backend in ('lbph', 'index'):
+            model_dir = os.path.join(tmp, backend)
+            write_model(model_dir, args.identities, args.per_identity, backend == 'index')
+            system = AttendanceSystem(model_path=model_dir,
+                                      attendance_file=os.path.join(tmp, f"{backend}.csv"))
+            print(f"\n{backend}: accept_distance {system.tracker.accept_distance}")
+            for group, groups in (('enrolled', enrolled), ('strangers', strangers)):
+                results = run_tracks(system, groups, args.predictions)
+                distances = np.concatenate([distances for _, _, distances in results])
+                decisions = Counter(state for state, _, _ in results)
+                if group == 'enrolled':
+                    wrong = sum(state != 'accepted' or label != expected
+                                for (expected, _), (state, label, _) in zip(groups, results))
+                else:
+                    wrong = decisions['accepted']
+                failures += wrong
+                print(f"  {group:<10} distance {distances.min():6.1f}..{distances.max():6.1f}  "
+                      f"{dict(decisions)}  wrong: {wrong}")
+            system.store.close()
+    finally:
+        shutil.rmtree(tmp)
+    
+    print(f"\n{'FAIL' if failures else 'OK'}: {failures} wrong decision(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Synthetic preprocessed faces for benchmarks
+
+Each identity is a smooth random texture; its images add per-image noise,
+so nearest-neighbour search has a well-defined right answer.
+"""
+import cv2
+import numpy as np
+
+FACE_SIZE = 200
+
+
+def identity_base(identity):
+    """Smooth 200x200 texture that stands in for one person's face"""
+    rng = np.random.default_rng(identity)
+    small = rng.integers(0, 256, (25, 25), dtype=np.uint8)
+    return cv2.resize(small, (FACE_SIZE, FACE_SIZE), interpolation=cv2.INTER_CUBIC)
+
+
+def faces_of(identity, count, seed=0, noise=20):
+    """(count, 200, 200) uint8 noisy images of one identity"""
+    rng = np.random.default_rng((identity, seed))
+    base = identity_base(identity).astype(np.int16)
+    noisy = base + rng.integers(-noise, noise + 1, (count, FACE_SIZE, FACE_SIZE))
+    faces = np.clip(noisy, 0, 255).astype(np.uint8)
+    for face in faces:
+        cv2.GaussianBlur(face, (3, 3), 0, dst=face)
+    return faces
+
+
+def iter_gallery(identities, per_identity, batch_identities=64, seed=0):
+    """Yield (faces, labels) batches covering identities 0..identities-1"""
+    for start in range(0, identities, batch_identities):
+        ids = range(start, min(start + batch_identities, identities))
+        faces = np.concatenate([faces_of(i, per_identity, seed) for i in ids])
+        labels = np.repeat(np.asarray(ids, dtype=np.int32), per_identity)
+        yield faces, labels
+
+
+def queries(identities, count, seed=1):
+    """(faces, labels) of `count` fresh images of random enrolled identities"""
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, identities, count).astype(np.int32)
+    faces = np.concatenate([faces_of(int(i), 1, seed=seed + k) for k, i in enumerate(labels)])
+    return faces, labels
@@ -0,0 +1,92 @@
+"""
+Benchmark detect-then-track against per-frame detection on a recorded video
+
+The baseline is the old AttendanceSystem.run loop: Haar detection on every
+frame and batch recognition of every face on every 5th frame. The tracking
+pipeline (AttendanceSystem.track_faces) detects every N frames and follows
+faces with optical flow in between, recognizing each track once and again
+every few seconds. Reports CPU ms per frame, frames per second, faces per
+second (face boxes produced, including tracked ones), recognitions per frame
+and the predictions saved by tracks whose evidence had already decided.
+Video timestamps drive the re-verification timer, so results do not depend
+on how fast the machine is.
+
+Usage:
+    python -m benchmarks.tracking_cost entrance.mp4 --intervals 5 10 15
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+
+from attendance_system import AttendanceSystem
+
+
+def run_pipeline(system, video, max_frames, interval=None):
+    """Process the video; interval None runs the per-frame-detection baseline"""
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    system.tracker.reset()
+    system.face_detector.reset()
+    if interval:
+        system.detection_interval = interval
+    
+    frames = faces = recognitions = 0
+    cpu = wall = 0.0
+    while max_frames is None or frames < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if interval is None:
+            boxes = system.detect_faces(gray)
+            if frames % 5 == 0:
+                system.recognize_faces(gray, boxes)
+                recognitions += len(boxes)
+            faces += len(boxes)
+        else:
+            tracks, _ = system.track_faces(gray, frames, now=frames / fps)
+            faces += len(tracks)
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+        frames += 1
+    cap.release()
+    if interval is not None:
+        recognitions = system.tracker.predictions_made
+    saved = system.tracker.predictions_saved if interval is not None else 0
+    return frames, cpu, wall, faces, recognitions, saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', help="Recorded video, e.g. of an entrance")
+    parser.add_argument('--intervals', type=int, nargs='+', default=[5, 10, 15],
+                        help="Detection intervals of the tracking pipeline")
+    parser.add_argument('--reverify', type=float, default=3.0, help="Seconds between re-verifications")
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--model-path', default="trained_model")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        system = AttendanceSystem(model_path=args.model_path,
+                                  attendance_file=os.path.join(tmp, "attendance.csv"),
+                                  reverify_seconds=args.reverify)
+        print(f"\n{'pipeline':<18} {'frames':>7} {'cpu ms/frame':>13} {'fps':>7} "
+              f"{'faces/s':>8} {'recog/frame':>12} {'saved':>6}")
+        for interval in [None] + args.intervals:
+            frames, cpu, wall, faces, recognitions, saved = run_pipeline(system, args.video,
+                                                                         args.max_frames, interval)
+            if frames == 0:
+                print(f"Could not read frames from {args.video}")
+                return
+            name = "detect every frame" if interval is None else f"detect/{interval} + track"
+            print(f"{name:<18} {frames:>7} {cpu * 1000 / frames:>13.2f} {frames / wall:>7.1f} "
+                  f"{faces / wall:>8.1f} {recognitions / frames:>12.3f} {saved:>6}")
+
+
+if __name__ == "__main__":
+    main()
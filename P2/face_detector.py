@@ -0,0 +1,188 @@
+import cv2
+import numpy as np
+
+# Detection presets from best recall to fastest. Sizes are in full-resolution pixels;
+# rois lists the regions searched between full scans (None = always the whole frame).
+PRESETS = {
+    'full': {'working_width': None, 'scale_factor': 1.1, 'min_neighbors': 5,
+             'min_size': 100, 'max_size': None, 'rois': None, 'full_scan_every': 1},
+    'quality': {'working_width': 960, 'scale_factor': 1.1, 'min_neighbors': 5,
+                'min_size': 100, 'max_size': 500, 'rois': ('motion', 'doorway', 'tracks'),
+                'full_scan_every': 5},
+    'balanced': {'working_width': 640, 'scale_factor': 1.15, 'min_neighbors': 4,
+                 'min_size': 110, 'max_size': 450, 'rois': ('motion', 'doorway', 'tracks'),
+                 'full_scan_every': 10},
+    'fast': {'working_width': 480, 'scale_factor': 1.25, 'min_neighbors': 3,
+             'min_size': 120, 'max_size': 400, 'rois': ('motion', 'doorway', 'tracks'),
+             'full_scan_every': 30},
+}
+
+
+def merge_rects(rects):
+    """Union overlapping (x1, y1, x2, y2) rectangles until none overlap"""
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return rects
+
+
+def suppress_duplicates(boxes, iou_threshold=0.5):
+    """Drop boxes overlapping a larger box by more than iou_threshold"""
+    kept = []
+    for box in sorted(boxes, key=lambda b: b[2] * b[3], reverse=True):
+        x, y, w, h = box
+        duplicate = False
+        for kx, ky, kw, kh in kept:
+            iw = max(0, min(x + w, kx + kw) - max(x, kx))
+            ih = max(0, min(y + h, ky + kh) - max(y, ky))
+            inter = iw * ih
+            if inter / (w * h + kw * kh - inter) > iou_threshold:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(box)
+    return kept
+
+
+class FaceDetector:
+    """Haar cascade detection on a downsampled frame, restricted to regions of interest
+    
+    The frame is resized to `working_width` and only face sizes between
+    min_size and max_size (full-resolution pixels) are searched. With rois,
+    only the union of these regions is scanned:
+    - 'motion': areas that changed since the previous call
+    - 'doorway': the bounding box of a polygon where people enter
+    - 'tracks': boxes of the previous faces, expanded by track_margin
+    Every `full_scan_every` calls the whole frame is scanned, which picks up
+    faces that stand still outside the other regions. Boxes are returned in
+    full-resolution coordinates.
+    
+    The cascade's cost is set by the smallest face relative to the frame, so
+    downsampling alone mostly saves the pyramid resizes; the large savings
+    come from the regions, a coarser scale step and a larger minimum face.
+    """
+    
+    def __init__(self, cascade, working_width=640, scale_factor=1.15, min_neighbors=4,
+                 min_size=100, max_size=None, rois=None, doorway=None, full_scan_every=10,
+                 track_margin=0.5, motion_threshold=25, min_motion_area=0.002):
+        self.cascade = cascade
+        self.working_width = working_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.max_size = max_size
+        self.rois = set(rois or ())
+        self.doorway = None if doorway is None else np.asarray(doorway, dtype=np.int32)
+        self.full_scan_every = max(1, full_scan_every)
+        self.track_margin = track_margin
+        self.motion_threshold = motion_threshold
+        self.min_motion_area = min_motion_area
+        self.prev_small = None
+        self.calls = 0
+        self.scanned_fraction = 1.0  # share of the working frame scanned by the last call
+    
+    @classmethod
+    def from_preset(cls, cascade, preset, doorway=None):
+        params = dict(PRESETS[preset])
+        if 'doorway' in (params['rois'] or ()) and doorway is None:
+            params['rois'] = tuple(r for r in params['rois'] if r != 'doorway')
+        return cls(cascade, doorway=doorway, **params)
+    
+    def motion_rects(self, small):
+        """Bounding boxes of the areas that changed since the previous frame"""
+        if self.prev_small is None or self.prev_small.shape != small.shape:
+            return []
+        diff = cv2.absdiff(small, self.prev_small)
+        _, mask = cv2.threshold(diff, self.motion_threshold, 255, cv2.THRESH_BINARY)
+        mask = cv2.dilate(mask, None, iterations=4)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_area = self.min_motion_area * small.shape[0] * small.shape[1]
+        rects = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= min_area:
+                rects.append((x, y, x + w, y + h))
+        return rects
+    
+    def regions(self, small, scale, previous_boxes):
+        """Regions to scan as (x1, y1, x2, y2) in working-resolution pixels"""
+        height, width = small.shape[:2]
+        if not self.rois or self.calls % self.full_scan_every == 0:
+            return [(0, 0, width, height)]
+        
+        rects = []
+        if 'motion' in self.rois:
+            rects += self.motion_rects(small)
+        if 'doorway' in self.rois and self.doorway is not None:
+            x, y, w, h = cv2.boundingRect(self.doorway)
+            rects.append((x / scale, y / scale, (x + w) / scale, (y + h) / scale))
+        if 'tracks' in self.rois:
+            for x, y, w, h in (previous_boxes if previous_boxes is not None else ()):
+                mx, my = w * self.track_margin, h * self.track_margin
+                rects.append(((x - mx) / scale, (y - my) / scale,
+                              (x + w + mx) / scale, (y + h + my) / scale))
+        
+        # Every region must fit the smallest window; clip to the frame
+        min_window = self.min_size / scale
+        clipped = []
+        for x1, y1, x2, y2 in rects:
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            half_w = max(x2 - x1, min_window * 1.2) / 2
+            half_h = max(y2 - y1, min_window * 1.2) / 2
+            x1, x2 = int(max(0, cx - half_w)), int(min(width, cx + half_w))
+            y1, y2 = int(max(0, cy - half_h)), int(min(height, cy + half_h))
+            if x2 - x1 >= min_window and y2 - y1 >= min_window:
+                clipped.append((x1, y1, x2, y2))
+        return merge_rects(clipped)
+    
+    def detect(self, gray, previous_boxes=None):
+        """(N, 4) int array of face boxes in full-resolution (x, y, w, h)"""
+        height, width = gray.shape[:2]
+        if self.working_width and width > self.working_width:
+            scale = width / self.working_width
+            small = cv2.resize(gray, (self.working_width, int(round(height / scale))),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            scale = 1.0
+            small = gray
+        
+        regions = self.regions(small, scale, previous_boxes)
+        self.prev_small = small
+        self.calls += 1
+        min_window = int(round(self.min_size / scale))
+        max_window = int(round(self.max_size / scale)) if self.max_size else 0
+        
+        boxes = []
+        scanned = 0
+        for x1, y1, x2, y2 in regions:
+            scanned += (x2 - x1) * (y2 - y1)
+            found = self.cascade.detectMultiScale(
+                small[y1:y2, x1:x2],
+                scaleFactor=self.scale_factor,
+                minNeighbors=self.min_neighbors,
+                minSize=(min_window, min_window),
+                maxSize=(max_window, max_window)
+            )
+            boxes += [(x + x1, y + y1, w, h) for x, y, w, h in found]
+        self.scanned_fraction = scanned / float(small.shape[0] * small.shape[1])
+        
+        if len(regions) > 1:
+            boxes = suppress_duplicates(boxes)
+        if not boxes:
+            return np.empty((0, 4), dtype=np.int32)
+        return np.round(np.asarray(boxes, dtype=np.float64) * scale).astype(np.int32)
+    
+    def reset(self):
+        self.prev_small = None
+        self.calls = 0
@@ -0,0 +1,279 @@
+import json
+import os
+import numpy as np
+
+from lbp_gallery import EPS
+
+INDEX_FILE = "index.json"
+
+
+def kmeans(vectors, clusters, iterations=10, seed=0, block=8192):
+    """Plain k-means (L2) returning (clusters, dim) float32 centroids"""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest_centroids(vectors, centroids, block)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=clusters)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random vectors
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def nearest_centroids(vectors, centroids, block=8192):
+    """Index of the nearest centroid of every vector"""
+    c_norms = np.einsum('ij,ij->i', centroids, centroids)
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        rows = vectors[start:start + block]
+        assign[start:start + block] = np.argmin(c_norms[None, :] - 2.0 * (rows @ centroids.T), axis=1)
+    return assign
+
+
+class IVFIndex:
+    """Inverted-file index: vectors are bucketed by their nearest k-means centroid
+    
+    A query scans only the `nprobe` buckets nearest to it, which trades recall
+    for speed (nprobe = nlist is exact). Vectors loaded from disk form the
+    base segment, stored sorted by bucket and optionally memory-mapped;
+    vectors added later go to an in-memory delta segment. Removing a person
+    tombstones their rows, and saving compacts both segments into one.
+    """
+    
+    kind = "ivf"
+    
+    def __init__(self, dim, nlist=64, nprobe=8):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        
+        # Base segment: rows sorted by bucket, bucket b is rows offsets[b]:offsets[b+1]
+        self.base_vectors = np.empty((0, dim), dtype=np.float32)
+        self.base_labels = np.empty(0, dtype=np.int32)
+        self.base_alive = np.empty(0, dtype=bool)
+        self.base_sq_norms = np.empty(0, dtype=np.float32)
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+        
+        # Delta segment: appended rows in arrival order
+        self.delta_size = 0
+        self.delta_vectors = np.empty((256, dim), dtype=np.float32)
+        self.delta_labels = np.empty(256, dtype=np.int32)
+        self.delta_lists = np.empty(256, dtype=np.int32)
+        self.delta_alive = np.empty(256, dtype=bool)
+        self.delta_sq_norms = np.empty(256, dtype=np.float32)
+    
+    def __len__(self):
+        """Number of live vectors"""
+        return int(self.base_alive.sum() + self.delta_alive[:self.delta_size].sum())
+    
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+    
+    def train(self, vectors, iterations=10, seed=0):
+        """Fit the coarse quantizer on a sample of vectors"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(vectors) < self.nlist:
+            raise ValueError(f"Need at least {self.nlist} vectors to train {self.nlist} lists")
+        self.centroids = kmeans(vectors, self.nlist, iterations, seed)
+    
+    def add(self, vectors, labels):
+        """Append vectors of one or more people (no rebuild)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+        if not self.is_trained:
+            self.train(vectors)
+        end = self.delta_size + len(vectors)
+        if end > len(self.delta_vectors):
+            capacity = max(end, 2 * len(self.delta_vectors))
+            for name in ('delta_vectors', 'delta_labels', 'delta_lists', 'delta_alive', 'delta_sq_norms'):
+                old = getattr(self, name)
+                grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:self.delta_size] = old[:self.delta_size]
+                setattr(self, name, grown)
+        rows = slice(self.delta_size, end)
+        self.delta_vectors[rows] = vectors
+        self.delta_labels[rows] = labels
+        self.delta_lists[rows] = nearest_centroids(vectors, self.centroids)
+        self.delta_alive[rows] = True
+        self.delta_sq_norms[rows] = np.einsum('ij,ij->i', vectors, vectors)
+        self.delta_size = end
+    
+    def remove(self, label):
+        """Tombstone every vector of a person; returns the number removed"""
+        base = self.base_alive & (self.base_labels == label)
+        delta = self.delta_alive[:self.delta_size] & (self.delta_labels[:self.delta_size] == label)
+        self.base_alive[base] = False
+        self.delta_alive[:self.delta_size][delta] = False
+        return int(base.sum() + delta.sum())
+    
+    def vectors(self, rows):
+        """Vectors of row ids (base rows first, then delta rows)"""
+        rows = np.asarray(rows)
+        base_count = len(self.base_labels)
+        out = np.empty(rows.shape + (self.dim,), dtype=np.float32)
+        in_base = rows < base_count
+        out[in_base] = self.base_vectors[rows[in_base]]
+        out[~in_base] = self.delta_vectors[rows[~in_base] - base_count]
+        return out
+    
+    def labels_of(self, rows):
+        """Labels of row ids"""
+        rows = np.asarray(rows)
+        base_count = len(self.base_labels)
+        out = np.empty(rows.shape, dtype=np.int32)
+        in_base = rows < base_count
+        out[in_base] = self.base_labels[rows[in_base]]
+        out[~in_base] = self.delta_labels[rows[~in_base] - base_count]
+        return out
+    
+    def probe(self, queries, nprobe):
+        """(Q, nlist) mask of the buckets each query scans"""
+        mask = np.zeros((len(queries), self.nlist), dtype=bool)
+        if nprobe >= self.nlist:
+            mask[:] = True
+            return mask
+        c_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        dist = c_norms[None, :] - 2.0 * (queries @ self.centroids.T)
+        nearest = np.argpartition(dist, nprobe - 1, axis=1)[:, :nprobe]
+        np.put_along_axis(mask, nearest, True, axis=1)
+        return mask
+    
+    def search_rows(self, queries, k, nprobe=None):
+        """Row ids and L2 distances (Q, k) of the nearest live rows, nearest first"""
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        n = len(queries)
+        best_dist = np.full((n, k), np.inf, dtype=np.float32)
+        best_rows = np.full((n, k), -1, dtype=np.int64)
+        if not self.is_trained:
+            return best_rows, best_dist
+        
+        mask = self.probe(queries, nprobe or self.nprobe)
+        q_norms = np.einsum('ij,ij->i', queries, queries)
+        base_count = len(self.base_labels)
+        delta_lists = self.delta_lists[:self.delta_size]
+        
+        # Bucket-major: every query probing a bucket is scored in one matrix product
+        for bucket in np.flatnonzero(mask.any(axis=0)):
+            who = np.flatnonzero(mask[:, bucket])
+            start, stop = self.offsets[bucket], self.offsets[bucket + 1]
+            delta_rows = np.flatnonzero(delta_lists == bucket)
+            for vectors, norms, alive, rows in (
+                    (self.base_vectors[start:stop], self.base_sq_norms[start:stop],
+                     self.base_alive[start:stop], np.arange(start, stop)),
+                    (self.delta_vectors[delta_rows], self.delta_sq_norms[delta_rows],
+                     self.delta_alive[delta_rows], delta_rows + base_count)):
+                if len(rows) == 0:
+                    continue
+                dist = q_norms[who, None] + norms[None, :] - 2.0 * (queries[who] @ vectors.T)
+                dist[:, ~alive] = np.inf
+                merged_dist = np.concatenate([best_dist[who], dist], axis=1)
+                merged_rows = np.concatenate([best_rows[who], np.broadcast_to(rows, dist.shape)], axis=1)
+                top = np.argpartition(merged_dist, k - 1, axis=1)[:, :k]
+                best_dist[who] = np.take_along_axis(merged_dist, top, axis=1)
+                best_rows[who] = np.take_along_axis(merged_rows, top, axis=1)
+        
+        order = np.argsort(best_dist, axis=1)
+        best_dist = np.sqrt(np.maximum(np.take_along_axis(best_dist, order, axis=1), 0))
+        return np.take_along_axis(best_rows, order, axis=1), best_dist
+    
+    def search(self, queries, k=1, nprobe=None, rerank=None, shortlist=32):
+        """Labels and distances (Q, k) of the nearest people's vectors
+        
+        With rerank='chi2' the `shortlist` nearest rows under L2 are re-ranked
+        by chi-square. For LBPFeatureExtractor vectors (OpenCV's LBPH
+        histograms) these are the distances LBPH predict would return.
+        Missing results have label -1 and distance inf.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if rerank != 'chi2':
+            rows, dist = self.search_rows(queries, k, nprobe)
+            return np.where(np.isfinite(dist), self.labels_of(np.maximum(rows, 0)), -1), dist
+        
+        rows, dist = self.search_rows(queries, max(k, shortlist), nprobe)
+        valid = np.isfinite(dist)
+        candidates = self.vectors(np.maximum(rows, 0))
+        q = queries[:, None, :]
+        diff = q - candidates
+        chi2 = 2.0 * np.einsum('qcd,qcd->qc', diff, diff / (q + candidates + EPS))
+        chi2[~valid] = np.inf
+        order = np.argsort(chi2, axis=1)[:, :k]
+        rows = np.take_along_axis(rows, order, axis=1)
+        chi2 = np.take_along_axis(chi2, order, axis=1).astype(np.float32)
+        return np.where(np.isfinite(chi2), self.labels_of(np.maximum(rows, 0)), -1), chi2
+    
+    def save(self, path):
+        """Write the live vectors, sorted by bucket, to a directory"""
+        os.makedirs(path, exist_ok=True)
+        delta = slice(0, self.delta_size)
+        vectors = np.concatenate([self.base_vectors[self.base_alive],
+                                  self.delta_vectors[delta][self.delta_alive[delta]]])
+        labels = np.concatenate([self.base_labels[self.base_alive],
+                                 self.delta_labels[delta][self.delta_alive[delta]]])
+        base_lists = np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.offsets))
+        lists = np.concatenate([base_lists[self.base_alive],
+                                self.delta_lists[delta][self.delta_alive[delta]]])
+        order = np.argsort(lists, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=self.nlist))])
+        
+        np.save(os.path.join(path, "vectors.npy"), vectors[order])
+        np.save(os.path.join(path, "labels.npy"), labels[order])
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        if self.is_trained:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        with open(os.path.join(path, INDEX_FILE), 'w') as f:
+            json.dump({'kind': self.kind, 'dim': self.dim, 'nlist': self.nlist,
+                       'nprobe': self.nprobe, 'count': int(len(labels))}, f)
+    
+    def load_segments(self, path, mmap=True):
+        """Make a saved directory the base segment (vectors memory-mapped if mmap)"""
+        self.base_vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode='r' if mmap else None)
+        self.base_labels = np.load(os.path.join(path, "labels.npy"))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.base_alive = np.ones(len(self.base_labels), dtype=bool)
+        # One pass over the vectors; they are then read only for probed buckets
+        self.base_sq_norms = np.empty(len(self.base_labels), dtype=np.float32)
+        for start in range(0, len(self.base_labels), 65536):
+            rows = self.base_vectors[start:start + 65536]
+            self.base_sq_norms[start:start + 65536] = np.einsum('ij,ij->i', rows, rows)
+        centroids = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids):
+            self.centroids = np.load(centroids)
+
+
+class BruteForceIndex(IVFIndex):
+    """Exact search: one bucket that every query scans"""
+    
+    kind = "brute"
+    
+    def __init__(self, dim, nlist=1, nprobe=1):
+        super().__init__(dim, nlist=1, nprobe=1)
+        self.centroids = np.zeros((1, dim), dtype=np.float32)
+    
+    def train(self, vectors, iterations=10, seed=0):
+        """Nothing to train"""
+
+
+def create_index(kind, dim, **params):
+    """New empty index of a kind ('brute' or 'ivf')"""
+    if kind == "brute":
+        return BruteForceIndex(dim)
+    if kind == "ivf":
+        return IVFIndex(dim, **params)
+    raise ValueError(f"Unknown index type '{kind}'")
+
+
+def load_index(path, mmap=True):
+    """Open an index saved with save(); vectors are memory-mapped by default"""
+    with open(os.path.join(path, INDEX_FILE)) as f:
+        meta = json.load(f)
+    params = {} if meta['kind'] == "brute" else {'nlist': meta['nlist'], 'nprobe': meta['nprobe']}
+    index = create_index(meta['kind'], meta['dim'], **params)
+    index.load_segments(path, mmap)
+    return index
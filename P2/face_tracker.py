@@ -0,0 +1,284 @@
+import math
+
+import cv2
+import numpy as np
+
+UNKNOWN = -1
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    x1 = max(a[0], b[0])
+    y1 = max(a[1], b[1])
+    x2 = min(a[0] + a[2], b[0] + b[2])
+    y2 = min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class TrackEvidence:
+    """Fixed-size ring buffer of a track's (label, distance) predictions and the decision they support
+    
+    A prediction supports its label when its distance is below accept_distance
+    (the 40% confidence threshold); otherwise it counts for Unknown. Methods:
+    - 'vote': each prediction weighs its confidence (100 - distance); once
+      min_votes predictions are in, the option holding vote_share of the
+      total weight is accepted (a label) or rejected (Unknown)
+    - 'sprt': Wald's sequential probability ratio test on whether the leading
+      label is right, taking a supporting prediction as right with probability
+      p_match if it is, p_other if not; stops at error rates alpha and beta
+    """
+    
+    def __init__(self, size=8, method='vote', accept_distance=60.0, min_votes=3, vote_share=0.7,
+                 p_match=0.8, p_other=0.2, alpha=0.01, beta=0.05):
+        if method not in ('vote', 'sprt'):
+            raise ValueError(f"Unknown decision method '{method}'")
+        self.labels = np.full(size, UNKNOWN, dtype=np.int32)
+        self.distances = np.zeros(size, dtype=np.float64)  # LBPH reports DBL_MAX for no match
+        self.count = 0
+        self.head = 0
+        self.method = method
+        self.accept_distance = accept_distance
+        self.min_votes = min_votes
+        self.vote_share = vote_share
+        self.agree_llr = math.log(p_match / p_other)
+        self.disagree_llr = math.log((1 - p_match) / (1 - p_other))
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+    
+    def add(self, label, distance):
+        """Record one prediction, overwriting the oldest once the buffer is full"""
+        self.labels[self.head] = label
+        self.distances[self.head] = distance
+        self.head = (self.head + 1) % len(self.labels)
+        self.count = min(self.count + 1, len(self.labels))
+    
+    def votes(self):
+        """Labels (UNKNOWN where not supported) and confidences of the buffered predictions"""
+        labels = self.labels[:self.count].copy()
+        distances = self.distances[:self.count]
+        labels[distances >= self.accept_distance] = UNKNOWN
+        return labels, np.clip(100 - distances, 1, 100)
+    
+    def decide(self):
+        """('accepted', label), ('rejected', UNKNOWN) or ('pending', None)"""
+        if self.count == 0:
+            return 'pending', None
+        labels, weights = self.votes()
+        options, inverse = np.unique(labels, return_inverse=True)
+        totals = np.bincount(inverse, weights=weights)
+        
+        if self.method == 'vote':
+            if self.count < self.min_votes:
+                return 'pending', None
+            best = int(np.argmax(totals))
+            if totals[best] < self.vote_share * totals.sum():
+                return 'pending', None
+            label = int(options[best])
+            return ('rejected', UNKNOWN) if label == UNKNOWN else ('accepted', label)
+        
+        supported = options != UNKNOWN
+        if not supported.any():
+            leader = UNKNOWN
+        else:
+            leader = int(options[supported][np.argmax(totals[supported])])
+        agree = int(np.sum(labels == leader)) if leader != UNKNOWN else 0
+        llr = agree * self.agree_llr + (self.count - agree) * self.disagree_llr
+        if llr >= self.upper:
+            return 'accepted', leader
+        if llr <= self.lower:
+            return 'rejected', UNKNOWN
+        return 'pending', None
+    
+    def confidence(self, label):
+        """Mean confidence of the buffered predictions supporting a label"""
+        labels, weights = self.votes()
+        support = weights[labels == label]
+        return float(support.mean()) if len(support) else 0.0
+
+
+class Track:
+    """One face followed across frames, with its accumulated recognition evidence"""
+    
+    def __init__(self, track_id, box, now, evidence=None):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.created_at = now
+        self.evidence = evidence or TrackEvidence()
+        self.state = 'pending'
+        self.label = None
+        self.name = None
+        self.confidence = 0
+        self.recognized_at = None
+        self.checked_at = None
+        self.committed = None  # name whose attendance this track has written
+        self.points = None
+        self.lost = False
+        self.missed = 0  # detection rounds in a row without a matching detection
+    
+    def clipped_box(self, shape):
+        """Integer (x, y, w, h) inside a frame of the given shape"""
+        height, width = shape[:2]
+        x, y, w, h = self.box
+        x1, y1 = max(0, int(x)), max(0, int(y))
+        x2, y2 = min(width, int(x + w)), min(height, int(y + h))
+        return x1, y1, max(0, x2 - x1), max(0, y2 - y1)
+
+
+class FaceTracker:
+    """Detect-then-track: boxes of periodic detections are carried between them by optical flow
+    
+    Each track keeps a few corner points inside its face. Between detections the
+    points are followed with pyramidal Lucas-Kanade flow, and the box moves by
+    their median shift and scales by their median change in spread. A detection
+    round matches detections to tracks by IoU: matched tracks snap to the
+    detected box, unmatched detections start new tracks, and tracks missed for
+    more than max_missed rounds end. Track IDs are never reused.
+    
+    Undecided tracks are recognized every retry_seconds until their evidence
+    reaches a decision; decided ones only every reverify_seconds. Every
+    skipped query of a decided track counts in predictions_saved.
+    accept_distance must be on the scale of the recognizer's distances.
+    """
+    
+    def __init__(self, reverify_seconds=3.0, retry_seconds=0.2, iou_threshold=0.3, max_missed=2,
+                 max_points=30, min_points=5, evidence_size=8, decision='vote', accept_distance=60.0):
+        self.reverify_seconds = reverify_seconds
+        self.retry_seconds = retry_seconds
+        self.evidence_size = evidence_size
+        self.decision = decision
+        self.accept_distance = accept_distance
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.max_points = max_points
+        self.min_points = min_points
+        self.tracks = []
+        self.next_id = 1
+        self.prev_gray = None
+        self.predictions_made = 0
+        self.predictions_saved = 0
+    
+    def update(self, gray, detections=None, now=0.0):
+        """Advance every track to this frame; pass detections on detection frames
+        
+        Returns the tracks visible in this frame.
+        """
+        if self.prev_gray is not None:
+            self.propagate(gray)
+        if detections is not None:
+            self.match(gray, detections, now)
+        self.prev_gray = gray.copy()
+        return [track for track in self.tracks if not track.lost]
+    
+    def needs_recognition(self, track, now):
+        """Whether a track is due for a prediction (call once per frame and track)"""
+        if track.checked_at is None:
+            return True
+        if now - track.checked_at < self.retry_seconds:
+            return False
+        track.checked_at = now
+        if track.state != 'pending' and now - track.recognized_at < self.reverify_seconds:
+            # Decided: this query is skipped until re-verification
+            self.predictions_saved += 1
+            return False
+        return True
+    
+    def record(self, track, label, distance, now):
+        """Add a prediction to a track's evidence and update its decision"""
+        track.evidence.add(label, distance)
+        track.recognized_at = track.checked_at = now
+        track.state, track.label = track.evidence.decide()
+        self.predictions_made += 1
+    
+    def new_track(self, box, now):
+        evidence = TrackEvidence(self.evidence_size, self.decision, self.accept_distance)
+        track = Track(self.next_id, box, now, evidence)
+        self.next_id += 1
+        return track
+    
+    def seed_points(self, track, gray):
+        """Pick corner points in the central part of the box (less background)"""
+        x, y, w, h = track.clipped_box(gray.shape)
+        x, y, w, h = x + w // 10, y + h // 10, w * 8 // 10, h * 8 // 10
+        track.points = None
+        if w < 8 or h < 8:
+            return
+        corners = cv2.goodFeaturesToTrack(gray[y:y + h, x:x + w], self.max_points, 0.01, 5)
+        if corners is not None and len(corners) >= self.min_points:
+            track.points = corners.reshape(-1, 2) + np.float32([x, y])
+    
+    def propagate(self, gray):
+        """Move every live track by the optical flow of its points (one LK call for all)"""
+        live = [track for track in self.tracks if track.points is not None and not track.lost]
+        if not live:
+            return
+        old = np.concatenate([track.points for track in live]).reshape(-1, 1, 2)
+        new, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, old, None,
+                                                  winSize=(15, 15), maxLevel=2)
+        old = old.reshape(-1, 2)
+        new = new.reshape(-1, 2)
+        status = status.ravel().astype(bool)
+        
+        start = 0
+        for track in live:
+            stop = start + len(track.points)
+            ok = status[start:stop]
+            before, after = old[start:stop][ok], new[start:stop][ok]
+            start = stop
+            if len(after) < self.min_points:
+                # Lost until a detection picks the face up again
+                track.points = None
+                track.lost = True
+                continue
+            
+            shift = np.median(after - before, axis=0)
+            spread_before = np.median(np.abs(before - np.median(before, axis=0)))
+            spread_after = np.median(np.abs(after - np.median(after, axis=0)))
+            scale = spread_after / spread_before if spread_before > 0 else 1.0
+            x, y, w, h = track.box
+            cx, cy = x + w / 2 + shift[0], y + h / 2 + shift[1]
+            w, h = w * scale, h * scale
+            track.box = np.float32([cx - w / 2, cy - h / 2, w, h])
+            track.points = after
+    
+    def match(self, gray, detections, now):
+        """Greedily pair detections with tracks by IoU, start and end tracks"""
+        detections = [np.asarray(d, dtype=np.float32) for d in detections]
+        pairs = sorted(((box_iou(track.box, det), t, d)
+                        for t, track in enumerate(self.tracks)
+                        for d, det in enumerate(detections)), reverse=True)
+        matched_tracks = set()
+        matched_detections = set()
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            matched_tracks.add(t)
+            matched_detections.add(d)
+            track = self.tracks[t]
+            track.box = detections[d]
+            track.lost = False
+            track.missed = 0
+            self.seed_points(track, gray)
+        
+        kept = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            kept.append(track)
+        for d, det in enumerate(detections):
+            if d not in matched_detections:
+                track = self.new_track(det, now)
+                self.seed_points(track, gray)
+                kept.append(track)
+        self.tracks = kept
+    
+    def reset(self):
+        self.tracks = []
+        self.prev_gray = None
+        self.predictions_made = 0
+        self.predictions_saved = 0
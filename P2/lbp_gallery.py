@@ -0,0 +1,285 @@
+import os
+import numpy as np
+
+# OpenCV's LBPH operator: 8 neighbours on a circle of radius 1, 256 patterns
+NEIGHBORS = 8
+RADIUS = 1
+PATTERNS = 2 ** NEIGHBORS
+EPS = 1e-10
+FLT_EPSILON = np.finfo(np.float32).eps
+
+
+def sample_points(radius=RADIUS, neighbors=NEIGHBORS):
+    """Offsets and bilinear weights of each neighbour, computed as OpenCV's elbp does"""
+    points = []
+    for n in range(neighbors):
+        x = np.float32(radius * np.cos(2.0 * np.pi * n / neighbors))
+        y = np.float32(-radius * np.sin(2.0 * np.pi * n / neighbors))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        tx, ty = x - np.float32(fx), y - np.float32(fy)
+        one = np.float32(1)
+        weights = ((one - tx) * (one - ty), tx * (one - ty), (one - tx) * ty, tx * ty)
+        points.append(((fy, fx), (fy, cx), (cy, fx), (cy, cx), weights))
+    return points
+
+
+class LBPFeatureExtractor:
+    """Vectorized LBP spatial histograms, the same as OpenCV's LBPHFaceRecognizer computes
+    
+    Neighbours are interpolated bilinearly in float32, each grid cell gets a
+    256-bin histogram normalized by its pixel count, and the pixels past the
+    last whole cell are left out, all as in OpenCV. So chi-square distances
+    between these features equal LBPH predict distances.
+    """
+    
+    def __init__(self, grid_x=8, grid_y=8, face_size=200, batch_size=64):
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.face_size = face_size
+        self.batch_size = batch_size
+        self.dim = grid_x * grid_y * PATTERNS
+        self.points = sample_points()
+        
+        # LBP codes exist for the interior pixels only; cells have whole sizes
+        inner = face_size - 2 * RADIUS
+        cell_h, cell_w = inner // grid_y, inner // grid_x
+        self.used = (cell_h * grid_y, cell_w * grid_x)
+        rows = np.arange(self.used[0]) // cell_h
+        cols = np.arange(self.used[1]) // cell_w
+        self.cell_offsets = (rows[:, None] * grid_x + cols[None, :]).ravel() * PATTERNS
+        self.cell_scale = np.float32(1.0 / (cell_h * cell_w))
+    
+    def codes(self, faces):
+        """LBP code of every interior pixel of a (N, size, size) uint8 stack"""
+        size = self.face_size
+        values = faces.astype(np.float32)
+        center = values[:, RADIUS:size - RADIUS, RADIUS:size - RADIUS]
+        code = np.zeros(center.shape, dtype=np.int32)
+        for bit, (p1, p2, p3, p4, (w1, w2, w3, w4)) in enumerate(self.points):
+            def at(offset):
+                dy, dx = offset
+                return values[:, RADIUS + dy:size - RADIUS + dy, RADIUS + dx:size - RADIUS + dx]
+            # Same float32 operations, in the same order, as OpenCV
+            t = w1 * at(p1) + w2 * at(p2) + w3 * at(p3) + w4 * at(p4)
+            code |= ((t > center) | (np.abs(t - center) < FLT_EPSILON)).astype(np.int32) << bit
+        return code
+    
+    def compute(self, faces):
+        """Histograms of a (N, size, size) uint8 stack as an (N, dim) float32 matrix"""
+        faces = np.asarray(faces, dtype=np.uint8)
+        if faces.ndim == 2:
+            faces = faces[None]
+        features = np.empty((len(faces), self.dim), dtype=np.float32)
+        for start in range(0, len(faces), self.batch_size):
+            batch = faces[start:start + self.batch_size]
+            n = len(batch)
+            codes = self.codes(batch)[:, :self.used[0], :self.used[1]]
+            
+            # One bincount for the whole batch: every (image, cell, pattern) gets its own slot
+            index = codes.reshape(n, -1) + self.cell_offsets
+            index += (np.arange(n) * self.dim)[:, None]
+            counts = np.bincount(index.ravel(), minlength=n * self.dim)
+            features[start:start + n] = counts.reshape(n, self.dim) * self.cell_scale
+        return features
+
+
+def chi_square(queries, gallery):
+    """OpenCV's HISTCMP_CHISQR_ALT between every query and gallery row: 2 * sum((a-b)^2 / (a+b))"""
+    q = queries[:, None, :]
+    g = gallery[None, :, :]
+    diff = q - g
+    return 2.0 * np.einsum('qgd,qgd->qg', diff, diff / (q + g + EPS))
+
+
+def merge_topk(best_dist, best_index, dist, start, k):
+    """Merge a block of distances (rows start..) into the running k best per query"""
+    merged_dist = np.concatenate([best_dist, dist.astype(np.float32)], axis=1)
+    merged_index = np.concatenate(
+        [best_index, np.broadcast_to(np.arange(start, start + dist.shape[1]), dist.shape)], axis=1)
+    top = np.argpartition(merged_dist, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(merged_dist, top, axis=1), np.take_along_axis(merged_index, top, axis=1)
+
+
+class LBPGallery:
+    """Contiguous float32 matrix of gallery histograms with blocked nearest-neighbour search"""
+    
+    def __init__(self, dim, capacity=1024):
+        self.dim = dim
+        self.size = 0
+        self._features = np.empty((capacity, dim), dtype=np.float32)
+        self._labels = np.empty(capacity, dtype=np.int32)
+        self._sq_norms = np.empty(capacity, dtype=np.float32)
+    
+    @property
+    def features(self):
+        return self._features[:self.size]
+    
+    @property
+    def labels(self):
+        return self._labels[:self.size]
+    
+    def add(self, features, labels):
+        """Append histograms and their labels (the matrix grows by doubling)"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.dim)
+        labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+        end = self.size + len(features)
+        if end > len(self._features):
+            capacity = max(end, 2 * len(self._features))
+            for name in ('_features', '_labels', '_sq_norms'):
+                old = getattr(self, name)
+                grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                grown[:self.size] = old[:self.size]
+                setattr(self, name, grown)
+        self._features[self.size:end] = features
+        self._labels[self.size:end] = labels
+        self._sq_norms[self.size:end] = np.einsum('ij,ij->i', features, features)
+        self.size = end
+    
+    def block_size(self, queries, memory_mb):
+        """Gallery rows per block so a chi-square block stays within memory_mb"""
+        per_row = max(1, queries) * self.dim * 4 * 3  # diff, quotient and temporaries
+        return max(1, int(memory_mb * 1024 * 1024 // per_row))
+    
+    def nearest_l2(self, queries, k, memory_mb=64):
+        """Row indices (Q, k) of the k nearest rows under L2, unordered"""
+        q_norms = np.einsum('ij,ij->i', queries, queries)
+        block = max(4096, self.block_size(0, memory_mb))
+        best_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+        best_index = np.zeros((len(queries), k), dtype=np.int64)
+        for start in range(0, self.size, block):
+            stop = min(start + block, self.size)
+            dist = self._sq_norms[None, start:stop] - 2.0 * (queries @ self._features[start:stop].T)
+            dist += q_norms[:, None]
+            best_dist, best_index = merge_topk(best_dist, best_index, dist, start, k)
+        return best_index
+    
+    def rerank(self, queries, candidates, k):
+        """Exact chi-square among each query's candidate rows"""
+        rows = self._features[candidates]
+        q = queries[:, None, :]
+        diff = q - rows
+        dist = 2.0 * np.einsum('qcd,qcd->qc', diff, diff / (q + rows + EPS))
+        order = np.argsort(dist, axis=1)[:, :k]
+        index = np.take_along_axis(candidates, order, axis=1)
+        return self._labels[index], np.take_along_axis(dist, order, axis=1).astype(np.float32)
+    
+    def search(self, queries, k=1, metric='chi2', memory_mb=64, shortlist=None):
+        """Nearest gallery rows of each query, scanning the gallery in blocks
+        
+        metric is 'chi2' (OpenCV's HISTCMP_CHISQR_ALT, the LBPH distance) or 'l2'
+        (a matrix product per block, much faster). With a shortlist, chi2
+        only re-ranks the `shortlist` nearest rows under L2. Returns
+        (labels, distances) of shape (Q, k), nearest first.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        n = len(queries)
+        k = min(k, self.size)
+        if metric == 'chi2' and shortlist and shortlist < self.size:
+            return self.rerank(queries, self.nearest_l2(queries, max(k, shortlist), memory_mb), k)
+        
+        best_dist = np.full((n, k), np.inf, dtype=np.float32)
+        best_index = np.zeros((n, k), dtype=np.int64)
+        if self.size == 0:
+            return np.full((n, 0), -1, dtype=np.int32), best_dist
+        
+        if metric == 'l2':
+            q_norms = np.einsum('ij,ij->i', queries, queries)
+            block = max(4096, self.block_size(0, memory_mb))
+        else:
+            block = self.block_size(n, memory_mb)
+        
+        for start in range(0, self.size, block):
+            stop = min(start + block, self.size)
+            rows = self._features[start:stop]
+            if metric == 'l2':
+                dist = q_norms[:, None] + self._sq_norms[None, start:stop] - 2.0 * (queries @ rows.T)
+                np.maximum(dist, 0, out=dist)
+                np.sqrt(dist, out=dist)
+            else:
+                dist = chi_square(queries, rows)
+            
+            best_dist, best_index = merge_topk(best_dist, best_index, dist, start, k)
+        
+        order = np.argsort(best_dist, axis=1)
+        best_dist = np.take_along_axis(best_dist, order, axis=1)
+        best_index = np.take_along_axis(best_index, order, axis=1)
+        return self._labels[best_index], best_dist
+    
+    def reduced(self, mode='centroid', medoids=3):
+        """Smaller gallery with one centroid or up to `medoids` medoids per person
+        
+        Medoids are chosen greedily (the PAM build step) under chi-square.
+        """
+        result = LBPGallery(self.dim, capacity=max(1, len(np.unique(self.labels)) * medoids))
+        for label in np.unique(self.labels):
+            members = self.features[self.labels == label]
+            if mode == 'centroid':
+                result.add(members.mean(axis=0, keepdims=True), [label])
+                continue
+            if len(members) <= medoids:
+                result.add(members, [label] * len(members))
+                continue
+            
+            dist = chi_square(members, members)
+            chosen = [int(np.argmin(dist.sum(axis=1)))]
+            nearest = dist[chosen[0]].copy()
+            while len(chosen) < medoids:
+                # Add the member that lowers the total distance to the nearest medoid most
+                gain = np.maximum(nearest[None, :] - dist, 0).sum(axis=1)
+                gain[chosen] = -1
+                best = int(np.argmax(gain))
+                chosen.append(best)
+                np.minimum(nearest, dist[best], out=nearest)
+            result.add(members[chosen], [label] * len(chosen))
+        return result
+    
+    def save(self, path):
+        # Through a file object: np.savez would append .npz to a path like lbp_model.yml
+        with open(path, 'wb') as f:
+            np.savez(f, features=self.features, labels=self.labels)
+    
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        gallery = cls(data['features'].shape[1], capacity=max(1, len(data['labels'])))
+        gallery.add(data['features'], data['labels'])
+        return gallery
+
+
+class LBPRecognizer:
+    """Drop-in for cv2.face.LBPHFaceRecognizer backed by LBPFeatureExtractor and LBPGallery"""
+    
+    def __init__(self, grid_x=8, grid_y=8, face_size=200, metric='chi2', shortlist=64):
+        self.extractor = LBPFeatureExtractor(grid_x, grid_y, face_size)
+        self.gallery = LBPGallery(self.extractor.dim)
+        self.metric = metric
+        self.shortlist = shortlist
+    
+    def train(self, faces, labels):
+        """Replace the gallery with these faces"""
+        self.gallery = LBPGallery(self.extractor.dim, capacity=max(1, len(labels)))
+        self.update(faces, labels)
+    
+    def update(self, faces, labels):
+        """Add faces to the gallery"""
+        self.gallery.add(self.extractor.compute(np.asarray(faces)), labels)
+    
+    def predict_batch(self, faces):
+        """Labels and distances of a (N, size, size) stack of preprocessed faces"""
+        labels, distances = self.gallery.search(self.extractor.compute(faces), k=1, metric=self.metric,
+                                                shortlist=self.shortlist)
+        return labels[:, 0], distances[:, 0]
+    
+    def predict(self, face):
+        """(label, distance) of one preprocessed face, like LBPHFaceRecognizer.predict"""
+        labels, distances = self.predict_batch(face[None])
+        return int(labels[0]), float(distances[0])
+    
+    def save(self, path):
+        self.gallery.save(path)
+    
+    def read(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.gallery = LBPGallery.load(path)
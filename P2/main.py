@@ -26,7 +26,7 @@ def register_face():
 def train_model():
     """Train the face recognition model"""
     print("\n>>> Training Face Recognition Model...\n")
-    os.system("python3 train_model.py")
+    os.system("python3 train_model.py --incremental")
 
 def start_attendance():
     """Start the attendance system"""
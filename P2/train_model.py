@@ -1,16 +1,39 @@
+import argparse
 import cv2
+import json
 import os
 import numpy as np
 import pickle
+import shutil
+
+from face_cache import FaceCache, preprocess_image
+from face_index import create_index, load_index
+from lbp_gallery import LBPFeatureExtractor
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MANIFEST_FILE = "manifest.json"
+
+# Full retrain once this fraction of the LBPH samples is stale
+COMPACT_RATIO = 0.25
 
 class FaceTrainer:
-    def __init__(self, dataset_path="dataset", model_path="trained_model"):
+    def __init__(self, dataset_path="dataset", model_path="trained_model", index_type=None, nlist=None,
+                 workers=None, use_cache=True):
         self.dataset_path = dataset_path
         self.model_path = model_path
         
+        # Optional gallery index ('brute' or 'ivf') built next to the LBPH model
+        self.index_type = index_type
+        self.nlist = nlist
+        
         # Create model directory
         os.makedirs(self.model_path, exist_ok=True)
         
+        # Images are decoded in a worker pool; preprocessed faces are cached by
+        # file hash so later trainings skip decoding (use_cache=False keeps them in memory)
+        cache_dir = os.path.join(self.model_path, "face_cache") if use_cache else None
+        self.face_cache = FaceCache(cache_dir, workers=workers)
+        
         # Initialize LBPH Face Recognizer with optimized parameters
         # Parameters: radius=1, neighbors=8, grid_x=8, grid_y=8, threshold=80
         # Lower threshold = more strict recognition
@@ -30,63 +53,122 @@ class FaceTrainer:
     
     def preprocess_image(self, image):
         """Preprocess image for better recognition"""
-        # Apply histogram equalization for better contrast
-        equalized = cv2.equalizeHist(image)
-        
-        # Apply slight Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(equalized, (3, 3), 0)
+        return preprocess_image(image)
+    
+    def scan_dataset(self):
+        """Signature (size and mtime) of every image, by person folder"""
+        if not os.path.exists(self.dataset_path):
+            print(f"Dataset directory '{self.dataset_path}' not found!")
+            return None
         
-        # Ensure consistent size (200x200)
-        if image.shape != (200, 200):
-            blurred = cv2.resize(blurred, (200, 200))
+        people = {}
+        for person_name in sorted(os.listdir(self.dataset_path)):
+            person_path = os.path.join(self.dataset_path, person_name)
+            if not os.path.isdir(person_path):
+                continue
+            files = {}
+            for image_name in sorted(os.listdir(person_path)):
+                if image_name.endswith(IMAGE_EXTENSIONS):
+                    stat = os.stat(os.path.join(person_path, image_name))
+                    files[image_name] = f"{stat.st_size}:{stat.st_mtime_ns}"
+            people[person_name] = files
+        return people
+    
+    def load_manifest(self):
+        """Manifest of the last training, or None"""
+        manifest_file = os.path.join(self.model_path, MANIFEST_FILE)
+        if not os.path.exists(manifest_file):
+            return None
+        with open(manifest_file) as f:
+            return json.load(f)
+    
+    def save_manifest(self, people, label_of, next_label, samples, stale):
+        """Record what the saved model was trained on"""
+        manifest = {
+            'people': people,            # person -> {image: "size:mtime_ns"}
+            'labels': label_of,          # every label ever assigned, so none is reused
+            'next_label': next_label,
+            'samples': samples,          # histograms stored in the LBPH model
+            'stale': stale,              # of which belong to removed or replaced images
+        }
+        with open(os.path.join(self.model_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f)
+    
+    def assign_labels(self, names, manifest):
+        """Keep every known person's label; new people get labels never used before"""
+        if manifest is not None:
+            label_of = dict(manifest['labels'])
+        else:
+            # Models trained before the manifest existed keep their mapping too
+            label_of = {}
+            mapping_file = os.path.join(self.model_path, "label_to_name.pkl")
+            if os.path.exists(mapping_file):
+                with open(mapping_file, 'rb') as f:
+                    label_of = {name: label for label, name in pickle.load(f).items()}
+        next_label = max(label_of.values(), default=-1) + 1
+        if manifest is not None:
+            next_label = max(next_label, manifest['next_label'])
+        for name in names:
+            if name not in label_of:
+                label_of[name] = next_label
+                next_label += 1
+        return label_of, next_label
+    
+    def load_people(self, people):
+        """Preprocessed faces of the given images, as person -> [(image name, face)]
         
-        return blurred
+        All images are loaded in one pass through the face cache, so misses from
+        every person share the worker pool.
+        """
+        paths = [os.path.join(self.dataset_path, person_name, image_name)
+                 for person_name, image_names in people.items() for image_name in image_names]
+        faces = iter(self.face_cache.load(paths))
+        loaded = {}
+        for person_name, image_names in people.items():
+            pairs = zip(image_names, faces)
+            loaded[person_name] = [(image_name, face) for image_name, face in pairs if face is not None]
+        return loaded
     
-    def get_images_and_labels(self):
-        """Load images and labels from dataset"""
+    def get_images_and_labels(self, people=None, label_of=None):
+        """Load images and labels from dataset
+        
+        people maps person folders to the image names to load (default: scan the
+        dataset); label_of gives each person's label (default: 0, 1, ... by name).
+        """
         faces = []
         labels = []
         label_to_name = {}
-        current_label = 0
         
-        if not os.path.exists(self.dataset_path):
-            print(f"Dataset directory '{self.dataset_path}' not found!")
-            return None, None, None
+        if people is None:
+            people = self.scan_dataset()
+            if people is None:
+                return None, None, None
+        if label_of is None:
+            label_of = {name: label for label, name in enumerate(sorted(people))}
         
         # Iterate through each person's folder
-        for person_name in sorted(os.listdir(self.dataset_path)):
-            person_path = os.path.join(self.dataset_path, person_name)
-            
-            if not os.path.isdir(person_path):
-                continue
-            
+        loaded_people = self.load_people(people)
+        for person_name, loaded in loaded_people.items():
+            current_label = label_of[person_name]
             label_to_name[current_label] = person_name
             
-            # Load all images for this person
-            image_count = 0
-            for image_name in sorted(os.listdir(person_path)):
-                if image_name.endswith(('.jpg', '.jpeg', '.png')):
-                    image_path = os.path.join(person_path, image_name)
-                    
-                    # Read image in grayscale
-                    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-                    
-                    if image is not None:
-                        # Preprocess image
-                        processed = self.preprocess_image(image)
-                        faces.append(processed)
-                        labels.append(current_label)
-                        image_count += 1
+            for _, processed in loaded:
+                faces.append(processed)
+                labels.append(current_label)
+            image_count = len(loaded)
             
             print(f"  Loaded {image_count} images for {person_name}")
-            current_label += 1
         
         return faces, labels, label_to_name
     
     def train(self):
         """Train the face recognition model"""
         print("Loading images from dataset...")
-        faces, labels, label_to_name = self.get_images_and_labels()
+        people = self.scan_dataset()
+        if people is None:
+            return False
+        label_of, next_label = self.assign_labels(people, self.load_manifest())
+        faces, labels, label_to_name = self.get_images_and_labels(people, label_of)
         
         if faces is None or len(faces) == 0:
             print("ERROR: No images found in dataset!")
@@ -116,6 +198,15 @@ class FaceTrainer:
                 pickle.dump(label_to_name, f)
             print(f"✓ Label mapping saved to {mapping_file}")
             
+            index_dir = os.path.join(self.model_path, "face_index")
+            if self.index_type:
+                self.build_index(faces, labels)
+            elif os.path.isdir(index_dir):
+                # An index from an earlier training would no longer match the model
+                shutil.rmtree(index_dir)
+            
+            self.save_manifest(people, label_of, next_label, samples=len(faces), stale=0)
+            
             print("\n✓ Training completed successfully!")
             print(f"  - Total images: {len(faces)}")
             print(f"  - Total people: {len(label_to_name)}")
@@ -129,16 +220,147 @@ class FaceTrainer:
         except Exception as e:
             print(f"ERROR during training: {e}")
             return False
+    
+    def train_incremental(self):
+        """Update the saved model with only the images added or changed since the last training
+        
+        New images are appended with LBPH `update`. LBPH cannot forget samples, so
+        samples of removed people and replaced images stay in the model as stale
+        entries: their labels are dropped from the label mapping (removed people
+        are reported as Unknown). Once stale entries exceed COMPACT_RATIO of the
+        model, this falls back to a full retrain, which compacts it. The face index,
+        if any, supports removal, so it is always kept exact.
+        """
+        model_file = os.path.join(self.model_path, "lbph_model.yml")
+        index_dir = os.path.join(self.model_path, "face_index")
+        manifest = self.load_manifest()
+        if manifest is None or not os.path.exists(model_file):
+            print("No previous training found, training from scratch...")
+            return self.train()
+        if not self.use_lbph:
+            print("ERROR: LBPH recognizer not available!")
+            return False
+        
+        index = load_index(index_dir, mmap=False) if os.path.isdir(index_dir) else None
+        if self.index_type and (index is None or index.kind != self.index_type):
+            print(f"No {self.index_type} face index to update, training from scratch...")
+            return self.train()
+        
+        people = self.scan_dataset()
+        if people is None:
+            return False
+        
+        # Diff the dataset against the manifest, image by image
+        old_people = manifest['people']
+        removed = [name for name in old_people if name not in people]
+        changed = {}
+        new_images = {}
+        stale = manifest['stale']
+        for name in removed:
+            stale += len(old_people[name])
+        for name, files in people.items():
+            old_files = old_people.get(name, {})
+            if files == old_files:
+                continue
+            changed[name] = list(files)
+            new_images[name] = {image for image, signature in files.items()
+                                if old_files.get(image) != signature}
+            stale += sum(1 for image, signature in old_files.items() if files.get(image) != signature)
+        
+        if not removed and not changed:
+            print("✓ Model is up to date, nothing to train")
+            return True
+        
+        added = sum(len(images) for images in new_images.values())
+        samples = manifest['samples'] + added
+        if samples == 0 or stale / samples > COMPACT_RATIO:
+            print(f"Stale samples reached {stale}/{samples}, compacting with a full retrain...")
+            return self.train()
+        
+        print(f"Updating model: {len(changed)} new or changed, {len(removed)} removed person(s)")
+        label_of, next_label = self.assign_labels(people, manifest)
+        
+        # Only changed people are read; the index needs all their images, LBPH only the new ones
+        print("Loading changed images...")
+        faces, labels = [], []
+        update_faces, update_labels = [], []
+        for name, loaded in self.load_people(changed).items():
+            for image_name, face in loaded:
+                faces.append(face)
+                labels.append(label_of[name])
+                if image_name in new_images[name]:
+                    update_faces.append(face)
+                    update_labels.append(label_of[name])
+            print(f"  Loaded {len(loaded)} images for {name}")
+        
+        try:
+            self.recognizer.read(model_file)
+            if update_faces:
+                self.recognizer.update(update_faces, np.array(update_labels))
+            self.recognizer.save(model_file)
+            print(f"✓ Model updated with {len(update_faces)} images ({model_file})")
+            
+            label_to_name = {label_of[name]: name for name in people}
+            mapping_file = os.path.join(self.model_path, "label_to_name.pkl")
+            with open(mapping_file, 'wb') as f:
+                pickle.dump(label_to_name, f)
+            print(f"✓ Label mapping saved to {mapping_file}")
+            
+            if index is not None:
+                for name in removed + list(changed):
+                    if name in label_of:
+                        index.remove(label_of[name])
+                if faces:
+                    index.add(LBPFeatureExtractor().compute(np.array(faces)), labels)
+                index.save(index_dir)
+                print(f"✓ Face index ({index.kind}, {len(index)} vectors) saved to {index_dir}")
+            
+            self.save_manifest(people, label_of, next_label, samples, stale)
+            print("\n✓ Incremental training completed successfully!")
+            print(f"  - Total people: {len(label_to_name)}")
+            print(f"  - Stale samples: {stale}/{samples} (full retrain above {COMPACT_RATIO:.0%})")
+            return True
+        
+        except Exception as e:
+            print(f"ERROR during training: {e}")
+            return False
+    
+    def build_index(self, faces, labels):
+        """Save LBP histograms of the training faces as a searchable face index"""
+        extractor = LBPFeatureExtractor()
+        features = extractor.compute(np.array(faces))
+        params = {}
+        if self.index_type == "ivf":
+            # About sqrt(N) lists keeps both the coarse and the fine scan short
+            nlist = self.nlist or max(1, int(np.sqrt(len(features))))
+            params = {'nlist': min(nlist, len(features)), 'nprobe': max(1, min(nlist, len(features)) // 8)}
+        index = create_index(self.index_type, extractor.dim, **params)
+        index.add(features, labels)
+        index_dir = os.path.join(self.model_path, "face_index")
+        index.save(index_dir)
+        print(f"✓ Face index ({self.index_type}, {len(index)} vectors) saved to {index_dir}")
 
 if __name__ == "__main__":
-    trainer = FaceTrainer()
+    parser = argparse.ArgumentParser(description="Train the face recognition model")
+    parser.add_argument('--index', choices=['brute', 'ivf'],
+                        help="Also build a face index for large enrollments")
+    parser.add_argument('--nlist', type=int, help="IVF lists (default: sqrt of the image count)")
+    parser.add_argument('--workers', type=int, help="Image decoding workers (default: CPU count)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Do not keep preprocessed faces in trained_model/face_cache")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only process people added, changed or removed since the last training")
+    args = parser.parse_args()
+    
+    trainer = FaceTrainer(index_type=args.index, nlist=args.nlist, workers=args.workers,
+                          use_cache=not args.no_cache)
     
     print("=" * 50)
     print("FACE RECOGNITION MODEL TRAINING")
     print("=" * 50)
     print()
     
-    success = trainer.train()
+    success = trainer.train_incremental() if args.incremental else trainer.train()
     
     if success:
         print("\n✓ Model is ready for face recognition!")
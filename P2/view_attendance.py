@@ -1,73 +1,168 @@
-import pandas as pd
+import argparse
 import os
+import sys
 from datetime import datetime
 
-def view_attendance(attendance_file="attendance.csv"):
-    """View and analyze attendance records"""
-    if not os.path.exists(attendance_file):
-        print(f"Attendance file '{attendance_file}' not found!")
-        return
-    
-    try:
-        # Read CSV
-        df = pd.read_csv(attendance_file)
-        
-        print("=" * 70)
-        print("ATTENDANCE RECORDS")
-        print("=" * 70)
+from attendance_report import AttendanceReport
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+RECORD_HEADER = f"{'Name':<24} {'Date':<10}  {'Time':<8}  {'Confidence':>10}"
+
+
+def format_record(row):
+    name, date, time_, confidence = row
+    return f"{name:<24} {date:<10}  {time_:<8}  {confidence:>9.2f}%"
+
+
+def format_day(row):
+    date, people, confidence = row
+    return f"{date:<10}  {people:>8}  {confidence:>9.2f}%"
+
+
+def format_person_count(row):
+    name, days = row
+    return f"{name:<24} {days:>8}"
+
+
+def page_through(title, header, fetch, total, format_row, page=0, page_size=20):
+    """Print one page of rows; on a terminal, n/p/q move between pages"""
+    pages = max(1, (total + page_size - 1) // page_size)
+    page = min(max(0, page), pages - 1)
+    while True:
         print()
-        
-        # Display all records
-        print("All Records:")
+        print(f"{title} (page {page + 1}/{pages}, {total} total)")
         print("-" * 70)
-        print(df.to_string(index=False))
-        print()
-        
-        # Statistics
-        print("=" * 70)
-        print("STATISTICS")
-        print("=" * 70)
-        print()
-        
-        # Total records
-        print(f"Total Attendance Records: {len(df)}")
-        print()
-        
-        # By date
-        print("Attendance by Date:")
-        date_counts = df['Date'].value_counts().sort_index()
-        for date, count in date_counts.items():
-            print(f"  {date}: {count} record(s)")
-        print()
-        
-        # By person
-        print("Attendance by Person:")
-        person_counts = df['Name'].value_counts()
-        for name, count in person_counts.items():
-            print(f"  {name}: {count} record(s)")
-        print()
-        
-        # Today's attendance
-        today = datetime.now().strftime("%Y-%m-%d")
-        today_records = df[df['Date'] == today]
-        print(f"Today's Attendance ({today}):")
-        if len(today_records) > 0:
-            print(today_records.to_string(index=False))
+        print(header)
+        for row in fetch(page * page_size, page_size):
+            print(format_row(row))
+        if not sys.stdin.isatty() or pages == 1:
+            return
+        choice = input("[n]ext, [p]revious, page number or [q]uit: ").strip().lower()
+        if choice == 'n':
+            page = min(page + 1, pages - 1)
+        elif choice == 'p':
+            page = max(page - 1, 0)
+        elif choice.isdigit():
+            page = min(max(int(choice) - 1, 0), pages - 1)
         else:
-            print("  No attendance marked today.")
-        print()
-        
-        # Export options
+            return
+
+
+def show_summary(report, args):
+    """Totals, recent days, most present people and today's attendance"""
+    days, records, people = report.totals()
+    print("=" * 70)
+    print("ATTENDANCE SUMMARY")
+    print("=" * 70)
+    print(f"Total Attendance Records: {records}")
+    print(f"Days: {days}    People: {people}")
+    if report.archived_rows:
+        print(f"Archived: {report.archived_rows} records through {report.archived_through}")
+    
+    print()
+    print("Recent Days:")
+    for row in report.days(offset=max(0, days - 7), limit=7):
+        print(f"  {format_day(row)}")
+    
+    print()
+    print("Most Present:")
+    for row in report.people(limit=10):
+        print(f"  {format_person_count(row)}")
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    page_through(f"Today's Attendance ({today})", RECORD_HEADER,
+                 lambda offset, limit: report.records(today, today, offset=offset, limit=limit),
+                 report.count_records(today, today), format_record, page_size=args.page_size)
+    
+    if sys.stdin.isatty():
         print("=" * 70)
         export = input("Export to Excel? (y/n): ").strip().lower()
         if export == 'y':
-            excel_file = f"attendance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            df.to_excel(excel_file, index=False)
-            print(f"✓ Exported to {excel_file}")
-        
-    except Exception as e:
-        print(f"Error reading attendance file: {e}")
+            export_records(report, args)
 
-if __name__ == "__main__":
-    view_attendance()
 
+def export_records(report, args):
+    """Write the records of a date range to Excel (or CSV with --csv)"""
+    if args.csv or pd is None:
+        path = f"attendance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        rows = report.store.export_csv(path, args.start, args.end)
+    else:
+        path = f"attendance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        records = report.records(args.start, args.end, limit=-1)
+        df = pd.DataFrame(records, columns=['Name', 'Date', 'Time', 'Confidence'])
+        df.to_excel(path, index=False)
+        rows = len(df)
+    print(f"✓ Exported {rows} records to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="View and analyze attendance records")
+    parser.add_argument('command', nargs='?', default='summary',
+                        choices=['summary', 'days', 'people', 'person', 'records', 'archive', 'export'])
+    parser.add_argument('name', nargs='?', help="Person for the 'person' command")
+    parser.add_argument('--start', help="First date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Last date (YYYY-MM-DD)")
+    parser.add_argument('--page', type=int, default=1)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--db', default="attendance.db")
+    parser.add_argument('--csv-file', default="attendance.csv", help="CSV imported if the database is missing")
+    parser.add_argument('--archive-dir', default="attendance_archive")
+    parser.add_argument('--rebuild', action='store_true', help="archive: rewrite the whole archive")
+    parser.add_argument('--csv', action='store_true', help="export: write CSV instead of Excel")
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.db) and not os.path.exists(args.csv_file):
+        print(f"Attendance database '{args.db}' not found!")
+        return
+    
+    report = AttendanceReport(args.db, args.archive_dir, args.csv_file)
+    page = args.page - 1
+    try:
+        if args.command == 'summary':
+            show_summary(report, args)
+        elif args.command == 'days':
+            page_through("Attendance by Date", f"{'Date':<10}  {'People':>8}  {'Confidence':>10}",
+                         lambda offset, limit: report.days(args.start, args.end, offset, limit),
+                         report.count_days(args.start, args.end), format_day, page, args.page_size)
+        elif args.command == 'people':
+            if args.start or args.end:
+                counts = report.person_counts(args.start, args.end)
+                ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+                fetch = lambda offset, limit: ranked[offset:offset + limit]
+                total = len(ranked)
+            else:
+                fetch = lambda offset, limit: report.people(offset=offset, limit=limit)
+                total = report.totals()[2]
+            page_through("Attendance by Person", f"{'Name':<24} {'Days':>8}",
+                         fetch, total, format_person_count, page, args.page_size)
+        elif args.command == 'person':
+            if not args.name:
+                parser.error("the 'person' command needs a name")
+            summary = report.person(args.name)
+            if summary is None:
+                print(f"No attendance recorded for {args.name}")
+                return
+            name, days, first_date, last_date, confidence = summary
+            print(f"{name}: {days} day(s) from {first_date} to {last_date}, mean confidence {confidence:.2f}%")
+            page_through(f"Attendance of {name}", RECORD_HEADER,
+                         lambda offset, limit: report.records(args.start, args.end, name, offset, limit),
+                         report.count_records(args.start, args.end, name), format_record, page, args.page_size)
+        elif args.command == 'records':
+            page_through("Attendance Records", RECORD_HEADER,
+                         lambda offset, limit: report.records(args.start, args.end, offset=offset, limit=limit),
+                         report.count_records(args.start, args.end), format_record, page, args.page_size)
+        elif args.command == 'archive':
+            rows = report.archive(rebuild=args.rebuild)
+            print(f"✓ Archived {rows} records to {args.archive_dir} (through {report.archived_through})")
+        elif args.command == 'export':
+            export_records(report, args)
+    finally:
+        report.close()
+
+
+if __name__ == "__main__":
+    main()